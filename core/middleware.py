@@ -0,0 +1,165 @@
+import json
+import logging
+import time
+from collections import Counter
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+
+logger = logging.getLogger('cashcare.requests')
+
+# Registro da requisição atual. Fica num ContextVar, e não no wrapper de cada
+# conexão: consultas em threads de apoio (sync_to_async, executor do dashboard
+# assíncrono) herdam o contexto e entram na conta da requisição que as disparou
+_current_recorder = ContextVar('request_timing_recorder', default=None)
+
+
+def _record_query(execute, sql, params, many, context):
+    recorder = _current_recorder.get()
+    if recorder is None:
+        return execute(sql, params, many, context)
+    return recorder(execute, sql, params, many, context)
+
+
+@receiver(connection_created, dispatch_uid='cashcare.request_timing')
+def install_query_recorder(connection, **kwargs):
+    # Uma vez por conexão, em qualquer thread, mesmo com a medição desligada:
+    # conexões persistentes das threads de apoio podem ter sido abertas antes
+    # de a medição ser ligada. Fora de uma requisição medida o wrapper só
+    # repassa a consulta
+    if _record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_record_query)
+
+
+class QueryRecorder:
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append({
+                'alias': context['connection'].alias,
+                'sql': sql,
+                'params': params,
+                'ms': (time.perf_counter() - started) * 1000,
+            })
+
+    @property
+    def total_ms(self):
+        return sum(query['ms'] for query in self.queries)
+
+    def duplicates(self):
+        # Mesma consulta com os mesmos parâmetros mais de uma vez
+        counts = Counter((query['sql'], repr(query['params'])) for query in self.queries)
+        return {sql: count for (sql, _), count in counts.items() if count > 1}
+
+    def repeated(self, threshold):
+        # Mesmo SQL com parâmetros diferentes várias vezes: típico N+1
+        counts = Counter(query['sql'] for query in self.queries)
+        return {sql: count for sql, count in counts.items() if count >= threshold}
+
+
+# Consultas e tempos de cada requisição no cabeçalho Server-Timing e numa
+# linha de log em JSON; acima de REQUEST_TIMING_SLOW_MS registra também as
+# consultas. Funciona em WSGI e ASGI, sem adaptar a cadeia de middlewares
+class RequestTimingMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.enabled = getattr(settings, 'REQUEST_TIMING_ENABLED', settings.DEBUG)
+        self.slow_ms = getattr(settings, 'REQUEST_TIMING_SLOW_MS', 0)
+        self.n_plus_one_threshold = getattr(settings, 'REQUEST_TIMING_N_PLUS_ONE', 5)
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        if not self.enabled:
+            return self.get_response(request)
+
+        recorder, token, started = self.start(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current_recorder.reset(token)
+        self.report(request, response, recorder, (time.perf_counter() - started) * 1000)
+        return response
+
+    async def __acall__(self, request):
+        if not self.enabled:
+            return await self.get_response(request)
+
+        recorder, token, started = self.start(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current_recorder.reset(token)
+        self.report(request, response, recorder, (time.perf_counter() - started) * 1000)
+        return response
+
+    def start(self, request):
+        # Conexões já abertas nesta thread não passam pelo connection_created
+        for connection in connections.all(initialized_only=True):
+            install_query_recorder(connection)
+        recorder = QueryRecorder()
+        request._timing = {'render_ms': 0.0}
+        return recorder, _current_recorder.set(recorder), time.perf_counter()
+
+    def process_template_response(self, request, response):
+        # Renderiza aqui para medir o template separado da view
+        if hasattr(request, '_timing'):
+            started = time.perf_counter()
+            response.render()
+            request._timing['render_ms'] += (time.perf_counter() - started) * 1000
+        return response
+
+    def report(self, request, response, recorder, total_ms):
+        db_ms = recorder.total_ms
+        render_ms = request._timing['render_ms']
+        duplicates = recorder.duplicates()
+        repeated = recorder.repeated(self.n_plus_one_threshold)
+
+        response['Server-Timing'] = ', '.join([
+            f'db;dur={db_ms:.1f};desc="{len(recorder.queries)} consultas"',
+            f'view;dur={max(total_ms - db_ms - render_ms, 0):.1f}',
+            f'render;dur={render_ms:.1f}',
+            f'total;dur={total_ms:.1f}',
+        ])
+
+        entry = {
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'total_ms': round(total_ms, 1),
+            'db_ms': round(db_ms, 1),
+            'render_ms': round(render_ms, 1),
+            'queries': len(recorder.queries),
+            'duplicates': sum(count - 1 for count in duplicates.values()),
+            'n_plus_one': len(repeated),
+        }
+        logger.info(json.dumps(entry))
+
+        for sql, count in repeated.items():
+            logger.warning(json.dumps({'path': request.path, 'n_plus_one': count, 'sql': sql}))
+
+        if self.slow_ms and total_ms >= self.slow_ms:
+            logger.warning(json.dumps({
+                **entry,
+                'slow': True,
+                'query_list': [
+                    {'ms': round(query['ms'], 2), 'alias': query['alias'], 'sql': query['sql']}
+                    for query in recorder.queries
+                ],
+            }))
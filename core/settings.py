@@ -33,6 +33,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.RequestTimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -44,6 +45,14 @@ MIDDLEWARE = [
 
 ROOT_URLCONF = 'core.urls'
 
+# Instrumentação por requisição (core.middleware.RequestTimingMiddleware).
+# Só em desenvolvimento por padrão: o Server-Timing expõe consultas e tempos
+REQUEST_TIMING_ENABLED = config('REQUEST_TIMING_ENABLED', default=DEBUG, cast=bool)
+# Acima deste tempo a lista de consultas vai para o log; 0 desliga
+REQUEST_TIMING_SLOW_MS = config('REQUEST_TIMING_SLOW_MS', default=0, cast=int)
+# Mesmo SQL repetido esta quantidade de vezes na requisição conta como N+1
+REQUEST_TIMING_N_PLUS_ONE = config('REQUEST_TIMING_N_PLUS_ONE', default=5, cast=int)
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
@@ -61,17 +70,97 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'core.wsgi.application'
 
+# Servido por ASGI (ex.: uvicorn core.asgi:application), as views assíncronas
+# rodam direto no event loop, sem uma thread por requisição
+ASGI_APPLICATION = 'core.asgi.application'
+
 
 # Database
 # https://docs.djangoproject.com/en/6.0/ref/settings/#databases
 
-DATABASES = {
+# DATABASE_PROFILE=sqlite (padrão) ou postgres
+
+DATABASE_PROFILE = config('DATABASE_PROFILE', default='sqlite')
+
+if DATABASE_PROFILE == 'postgres':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': config('POSTGRES_DB', default='cashcare'),
+            'USER': config('POSTGRES_USER', default='cashcare'),
+            'PASSWORD': config('POSTGRES_PASSWORD', default=''),
+            'HOST': config('POSTGRES_HOST', default='localhost'),
+            'PORT': config('POSTGRES_PORT', default='5432'),
+            # Atrás do PgBouncer em modo transaction os cursores do servidor
+            # (usados por .iterator() nas exportações) precisam ser desligados
+            'DISABLE_SERVER_SIDE_CURSORS': config('POSTGRES_DISABLE_SERVER_SIDE_CURSORS', default=False, cast=bool),
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {},
+        }
+    }
+
+    # Pool nativo (psycopg_pool) ou conexões persistentes: o Django não aceita os dois
+    if config('POSTGRES_POOL', default=True, cast=bool):
+        DATABASES['default']['CONN_MAX_AGE'] = 0
+        DATABASES['default']['OPTIONS']['pool'] = {
+            'min_size': config('POSTGRES_POOL_MIN_SIZE', default=2, cast=int),
+            'max_size': config('POSTGRES_POOL_MAX_SIZE', default=10, cast=int),
+            'timeout': config('POSTGRES_POOL_TIMEOUT', default=10, cast=int),
+        }
+    else:
+        DATABASES['default']['CONN_MAX_AGE'] = config('CONN_MAX_AGE', default=60, cast=int)
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': config('SQLITE_PATH', default=str(BASE_DIR / 'db.sqlite3')),
+            'CONN_MAX_AGE': config('CONN_MAX_AGE', default=60, cast=int),
+            'OPTIONS': {},
+        }
+    }
+
+    # WAL: leitores não bloqueiam o escritor. IMMEDIATE pega o lock de escrita
+    # no início da transação, então escritores concorrentes esperam o timeout
+    # em vez de falhar com "database is locked" no meio dela
+    if config('SQLITE_TUNING', default=True, cast=bool):
+        DATABASES['default']['OPTIONS'] = {
+            'timeout': config('SQLITE_BUSY_TIMEOUT', default=20, cast=int),
+            'transaction_mode': 'IMMEDIATE',
+            'init_command': (
+                'PRAGMA journal_mode=WAL;'
+                'PRAGMA synchronous=NORMAL;'
+                f"PRAGMA mmap_size={config('SQLITE_MMAP_SIZE', default=128 * 1024 * 1024, cast=int)};"
+                'PRAGMA cache_size=-20000;'
+                'PRAGMA temp_store=MEMORY;'
+            ),
+        }
+
+
+# Cache
+# https://docs.djangoproject.com/en/6.0/topics/cache/
+# locmem é por processo: em produção com vários workers use file ou redis,
+# senão a invalidação por versão não chega aos outros processos
+
+CACHE_BACKENDS = {
+    'locmem': 'django.core.cache.backends.locmem.LocMemCache',
+    'file': 'django.core.cache.backends.filebased.FileBasedCache',
+    'redis': 'django.core.cache.backends.redis.RedisCache',
+}
+
+CACHE_BACKEND = config('CACHE_BACKEND', default='locmem')
+
+CACHES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'BACKEND': CACHE_BACKENDS[CACHE_BACKEND],
+        'LOCATION': config(
+            'CACHE_LOCATION',
+            default=str(BASE_DIR / '.cache') if CACHE_BACKEND == 'file' else 'cashcare'
+        ),
     }
 }
 
+TRANSACTIONS_CACHE_TIMEOUT = config('TRANSACTIONS_CACHE_TIMEOUT', default=60 * 60, cast=int)
+
 
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
@@ -93,6 +182,15 @@ AUTH_PASSWORD_VALIDATORS = [
 
 AUTH_USER_MODEL = 'accounts.User'
 
+# Paginação por cursor na lista de transações (sem COUNT(*) nem OFFSET)
+TRANSACTIONS_CURSOR_PAGINATION = config('TRANSACTIONS_CURSOR_PAGINATION', default=False, cast=bool)
+
+# Dashboard assíncrono: consultas independentes em paralelo (melhor sob ASGI)
+TRANSACTIONS_ASYNC_DASHBOARD = config('TRANSACTIONS_ASYNC_DASHBOARD', default=False, cast=bool)
+# Threads do dashboard assíncrono, compartilhadas pelo processo: no máximo
+# uma conexão com o banco por thread
+TRANSACTIONS_ASYNC_WORKERS = config('TRANSACTIONS_ASYNC_WORKERS', default=4, cast=int)
+
 LOGIN_URL = 'login'
 LOGIN_REDIRECT_URL = 'dashboard'
 LOGOUT_REDIRECT_URL = 'login'
@@ -113,3 +211,24 @@ USE_TZ = True
 # https://docs.djangoproject.com/en/6.0/howto/static-files/
 
 STATIC_URL = 'static/'
+
+
+# Logging
+# https://docs.djangoproject.com/en/6.0/topics/logging/
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'cashcare.requests': {
+            'handlers': ['console'],
+            'level': config('REQUEST_TIMING_LOG_LEVEL', default='INFO'),
+            'propagate': False,
+        },
+    },
+}
@@ -1,6 +1,7 @@
 from django.contrib import admin
 
-from .models import Transaction
+from .models import Account, Budget, DailyBalance, ExchangeRate, MonthlySummary, RecurringRule, Transaction
+from .service import rebase_transactions
 
 
 @admin.register(Transaction)
@@ -8,3 +9,50 @@ class TransactionAdmin(admin.ModelAdmin):
     list_display = ('user', 'title', 'type', 'category', 'amount', 'is_completed')
     search_fields = ('user', 'title', 'description')
     list_filter = ('user', 'type', 'category', 'is_completed')
+
+
+@admin.register(DailyBalance)
+class DailyBalanceAdmin(admin.ModelAdmin):
+    list_display = ('user', 'date', 'net', 'running_balance')
+    list_filter = ('user',)
+
+
+@admin.register(MonthlySummary)
+class MonthlySummaryAdmin(admin.ModelAdmin):
+    list_display = ('user', 'month', 'type', 'category', 'total', 'count')
+    list_filter = ('type', 'category')
+
+
+@admin.register(RecurringRule)
+class RecurringRuleAdmin(admin.ModelAdmin):
+    list_display = ('user', 'title', 'frequency', 'amount', 'next_date', 'generated', 'is_active')
+    search_fields = ('title', 'description')
+    list_filter = ('frequency', 'is_installment', 'is_active')
+    readonly_fields = ('generated', 'next_date')
+
+
+@admin.register(Budget)
+class BudgetAdmin(admin.ModelAdmin):
+    list_display = ('user', 'month', 'category', 'limit', 'spent')
+    list_filter = ('category',)
+    readonly_fields = ('spent',)
+
+
+@admin.register(Account)
+class AccountAdmin(admin.ModelAdmin):
+    list_display = ('user', 'name', 'kind', 'currency', 'balance', 'is_default')
+    list_filter = ('kind', 'currency')
+    search_fields = ('name',)
+    readonly_fields = ('balance',)
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        if change and 'currency' in form.changed_data:
+            rebase_transactions([obj.currency], account_ids=[obj.pk])
+
+
+@admin.register(ExchangeRate)
+class ExchangeRateAdmin(admin.ModelAdmin):
+    list_display = ('currency', 'date', 'rate')
+    list_filter = ('currency',)
+    date_hierarchy = 'date'
@@ -0,0 +1,206 @@
+import hashlib
+from datetime import datetime, time
+from functools import wraps
+
+from django.http import Http404, JsonResponse
+from django.utils import timezone
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition, require_GET
+
+from .filters import TransactionFilter
+from .forecast import HORIZONS, ForecastService
+from .fx import consolidated_balance, get_rates_last_modified, get_rates_version
+from .models import Transaction
+from .pagination import CursorPaginator, InvalidCursor
+from .service import DashboardService, get_data_version, get_last_modified
+from .views import _calendar_month_data
+
+
+# API somente leitura, v1. Tudo sai de .values(): nenhuma instância de
+# modelo é criada para montar as respostas
+
+API_VERSION = 'v1'
+
+TRANSACTION_FIELDS = (
+    'id', 'account', 'title', 'description', 'amount', 'type', 'category',
+    'is_completed', 'date', 'created_at', 'updated_at',
+)
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 500
+
+
+class ApiError(Exception):
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+
+def _error(message, status):
+    return JsonResponse({'error': message}, status=status)
+
+
+def api_view(view):
+    # Sessão obrigatória (401 em JSON, sem redirecionar para o login),
+    # ETag pela versão dos dados do usuário e das cotações (saldo consolidado
+    # e previsão mudam com uma cotação nova) e cache só no cliente. O dia
+    # também entra: mês atual, pendências e previsão partem de "hoje"
+    def etag(request, *args, **kwargs):
+        raw = f'{API_VERSION}:{get_rates_version()}:{timezone.localdate()}:{request.get_full_path()}'
+        digest = hashlib.md5(raw.encode()).hexdigest()
+        return f'"{request.user.pk}-{get_data_version(request.user.pk)}-{digest}"'
+
+    def last_modified(request, *args, **kwargs):
+        today = timezone.make_aware(datetime.combine(timezone.localdate(), time.min))
+        return max(filter(None, (get_last_modified(request.user.pk), get_rates_last_modified(), today)))
+
+    conditional_view = condition(etag_func=etag, last_modified_func=last_modified)(view)
+
+    @wraps(view)
+    @require_GET
+    def wrapper(request, *args, **kwargs):
+        if not request.user.is_authenticated:
+            return _error('Autenticação necessária', 401)
+        try:
+            response = conditional_view(request, *args, **kwargs)
+        except ApiError as error:
+            return _error(error.message, error.status)
+        except Http404 as error:
+            return _error(str(error) or 'Não encontrado', 404)
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+    return wrapper
+
+
+def _parse_fields(request):
+    raw = request.GET.get('fields', '')
+    if not raw:
+        return TRANSACTION_FIELDS
+
+    fields = tuple(dict.fromkeys(name.strip() for name in raw.split(',') if name.strip()))
+    invalid = [name for name in fields if name not in TRANSACTION_FIELDS]
+    if invalid:
+        raise ApiError(f'Campos inválidos: {", ".join(invalid)}')
+    return fields
+
+
+def _parse_limit(request):
+    raw = request.GET.get('limit', '')
+    if not raw:
+        return DEFAULT_LIMIT
+    if not raw.isdigit() or not 1 <= int(raw) <= MAX_LIMIT:
+        raise ApiError(f'limit deve estar entre 1 e {MAX_LIMIT}')
+    return int(raw)
+
+
+@api_view
+def transaction_list(request):
+    fields = _parse_fields(request)
+    paginator_fields = ('date', 'created_at', 'id')
+
+    queryset = TransactionFilter(request.GET, request.user).filter(
+        Transaction.objects.filter(user=request.user)
+    ).values(*dict.fromkeys(fields + paginator_fields))
+
+    paginator = CursorPaginator(queryset, _parse_limit(request))
+    try:
+        page = paginator.page(request.GET.get('cursor'))
+    except InvalidCursor:
+        raise ApiError('Cursor inválido')
+
+    return JsonResponse({
+        'results': [{name: row[name] for name in fields} for row in page.object_list],
+        'next': page.next_cursor,
+        'previous': page.previous_cursor,
+    })
+
+
+@api_view
+def dashboard(request):
+    service = DashboardService(request.user)
+
+    days = request.GET.get('days', '30')
+    granularity = request.GET.get('granularity', 'day')
+    if not days.isdigit() or not 1 <= int(days) <= 366:
+        raise ApiError('days deve estar entre 1 e 366')
+    if granularity not in DashboardService.SERIES_GRANULARITIES:
+        raise ApiError('granularity deve ser day, week ou month')
+
+    snapshot = service.get_monthly_snapshot()
+    labels, balances = service.get_balance_series(days=int(days), granularity=granularity)
+    category_labels = dict(Transaction.Category.choices)
+    consolidated = consolidated_balance(request.user)
+
+    return JsonResponse({
+        'balance': consolidated.total,
+        'accounts': [
+            {
+                'id': account.pk,
+                'name': account.name,
+                'kind': account.kind,
+                'currency': account.currency,
+                'balance': account.balance,
+                'balance_brl': converted,
+            }
+            for account, converted in consolidated.accounts
+        ],
+        'month': {
+            'start': service.first_day_month,
+            'income': snapshot.monthly_income,
+            'expense': snapshot.monthly_expense,
+            'savings': snapshot.monthly_savings,
+            'expenses_by_category': [
+                {'category': category, 'label': category_labels.get(category, category), 'total': total}
+                for category, total in snapshot.expenses_by_category
+            ],
+        },
+        'balance_series': {
+            'granularity': granularity,
+            'labels': labels,
+            'balances': balances,
+        },
+        'budgets': [
+            {
+                'category': budget.category,
+                'label': budget.get_category_display(),
+                'limit': budget.limit,
+                'spent': budget.spent,
+                'remaining': budget.remaining,
+                'percent': budget.percent,
+                'over': budget.is_over,
+            }
+            for budget in service.get_budgets()
+        ],
+        'recent_transactions': list(
+            request.user.transactions.filter(is_completed=True).order_by(
+                '-date', '-created_at'
+            ).values(*TRANSACTION_FIELDS)[:5]
+        ),
+    })
+
+
+@api_view
+def forecast(request):
+    days = request.GET.get('days', str(HORIZONS[0]))
+    if not days.isdigit() or int(days) not in HORIZONS:
+        raise ApiError(f"days deve ser um de {', '.join(map(str, HORIZONS))}")
+
+    result = ForecastService(request.user).get_forecast(int(days))
+    return JsonResponse({
+        'start': result.start,
+        'balance': result.opening,
+        'first_negative': result.first_negative,
+        'lowest_balance': result.lowest_balance,
+        'end_balance': result.end_balance,
+        'dates': result.dates,
+        'balances': result.balances,
+    })
+
+
+@api_view
+def calendar_month(request, year, month):
+    data = _calendar_month_data(request.user, year, month)
+    data['days'] = {str(day): values for day, values in data['days'].items()}
+    return JsonResponse(data)
@@ -0,0 +1,133 @@
+import statistics
+import time
+from datetime import timedelta
+from itertools import count
+
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from . import categorizer
+from .models import Transaction
+from .service import bump_data_version
+from .synthetic import create_users, generate_transactions
+
+
+# Cenários medidos sem o cache do usuário: o custo real de uma página fria
+def _list(query=''):
+    return lambda context: ('get', f"{reverse('transaction_list')}{query}", None)
+
+
+def _create(context):
+    # Título diferente a cada repetição: um repetido cairia no aviso de duplicata
+    return 'post', reverse('transaction_create'), {
+        'title': f"Benchmark {next(context['created'])}", 'description': '', 'amount': '42.00', 'type': 'OUT',
+        'category': 'ALM', 'date': context['today'].isoformat(), 'is_completed': 'on',
+    }
+
+
+def _complete(context):
+    pk = context['pending'].pop()
+    return 'post', reverse('transaction_complete', args=[pk]), {}
+
+
+def _delete(context):
+    pk = context['deletable'].pop()
+    return 'post', reverse('transaction_delete', args=[pk]), {}
+
+
+def _bulk_complete(context):
+    ids = [str(context['pending'].pop()) for _ in range(min(100, len(context['pending'])))]
+    return 'post', reverse('transaction_bulk'), {'action': 'complete', 'ids': ids}
+
+
+SCENARIOS = {
+    'dashboard': lambda context: ('get', reverse('dashboard'), None),
+    'list': _list(),
+    'list_page_5': _list('?page=5'),
+    'list_search': _list('?search=super'),
+    'list_period_30': _list('?period=30'),
+    'list_custom_dates': lambda context: _list(
+        f"?start_date={context['today'] - timedelta(days=90)}&end_date={context['today']}"
+    )(context),
+    'list_type_out': _list('?type_out=OUT'),
+    'list_pending': _list('?status_pending=pending'),
+    'list_category': _list('?category=ALM&category=LAZ'),
+    'calendar': lambda context: ('get', reverse('calendar'), None),
+    'calendar_json': lambda context: (
+        'get', reverse('calendar_json', args=[context['today'].year, context['today'].month]), None
+    ),
+    'reports': lambda context: ('get', reverse('reports'), None),
+    'api_transactions': lambda context: ('get', reverse('api_transaction_list'), None),
+    'create': _create,
+    'complete': _complete,
+    'delete': _delete,
+    'bulk_complete_100': _bulk_complete,
+}
+
+
+def prepare_user(size, seed=None):
+    # Um único usuário com todas as linhas: o pior caso por requisição
+    user = create_users(1, prefix=f'bench{size}-')[0]
+    generate_transactions([user.pk], size, seed=seed)
+    return user
+
+
+@override_settings(ALLOWED_HOSTS=['*'])
+def run_scenarios(user, size, names=None, repeat=5):
+    client = Client()
+    client.force_login(user)
+
+    transactions = Transaction.objects.filter(user=user).order_by('-date')
+    context = {
+        'today': timezone.now().date(),
+        'pending': list(transactions.filter(is_completed=False).values_list('pk', flat=True)[:repeat * 200]),
+        'deletable': list(transactions.values_list('pk', flat=True)[:repeat]),
+        'created': count(1),
+    }
+
+    results = []
+    for name in names or SCENARIOS:
+        timings = []
+        queries = 0
+        for _ in range(repeat):
+            method, url, data = SCENARIOS[name](context)
+            # Só as entradas do usuário medido: o cache pode ser compartilhado
+            bump_data_version(user.pk)
+            categorizer.discard_model(user.pk)
+            with CaptureQueriesContext(connection) as captured:
+                started = time.perf_counter()
+                response = getattr(client, method)(url, data)
+                elapsed = time.perf_counter() - started
+            if response.status_code >= 400:
+                raise RuntimeError(f'{name}: HTTP {response.status_code} em {url}')
+            timings.append(elapsed * 1000)
+            queries = max(queries, len(captured))
+
+        results.append({
+            'size': size,
+            'scenario': name,
+            'queries': queries,
+            'median_ms': round(statistics.median(timings), 2),
+            'min_ms': round(min(timings), 2),
+            'max_ms': round(max(timings), 2),
+        })
+    return results
+
+
+def compare(results, baseline, tolerance=0.25, min_delta_ms=5):
+    # Regressão: mais consultas, ou mediana acima da tolerância (e de um mínimo absoluto)
+    previous = {(row['size'], row['scenario']): row for row in baseline['results']}
+    regressions = []
+    for row in results:
+        old = previous.get((row['size'], row['scenario']))
+        if old is None:
+            continue
+        slower = row['median_ms'] - old['median_ms']
+        if row['queries'] > old['queries'] or (
+            slower > min_delta_ms and row['median_ms'] > old['median_ms'] * (1 + tolerance)
+        ):
+            regressions.append((row, old))
+    return regressions
@@ -0,0 +1,126 @@
+from collections import defaultdict
+
+from django.db import transaction as db_transaction
+from django.db.models import Min, Sum
+from django.utils import timezone
+
+from . import categorizer, search
+from .models import Transaction
+from .service import (
+    apply_account_delta, apply_balance_delta, bump_data_version, delete_rows, refresh_daily_balances,
+    refresh_monthly_summaries, signed_amount
+)
+
+
+# Ações em lote: um UPDATE/DELETE por conjunto e um único delta de saldo,
+# sem passar pelos signals de cada instância
+
+
+def _completed_net_by_day(queryset):
+    return list(
+        queryset.filter(is_completed=True).values('date').annotate(
+            net=Sum(signed_amount('base_amount'))
+        ).order_by('date')
+    )
+
+
+def _net_by_account(queryset):
+    # Saldo da conta na moeda dela: soma o valor original
+    return list(
+        queryset.values('account_id').annotate(net=Sum(signed_amount())).order_by().values_list('account_id', 'net')
+    )
+
+
+def _apply_changes(user_id, rows, sign=1, accounts=()):
+    if rows:
+        apply_balance_delta(user_id, sign * sum(row['net'] for row in rows))
+        for account_id, net in accounts:
+            apply_account_delta(account_id, sign * net)
+        refresh_daily_balances(user_id, rows[0]['date'])
+        refresh_monthly_summaries(user_id, rows[0]['date'])
+    db_transaction.on_commit(lambda: bump_data_version(user_id))
+
+
+def _lock(queryset):
+    # Trava as linhas antes de calcular os deltas: uma conclusão ou exclusão
+    # em paralelo espera, e as somas valem para exatamente o que é alterado
+    pks = list(queryset.select_for_update().values_list('pk', flat=True))
+    return Transaction.objects.filter(pk__in=pks).order_by()
+
+
+@db_transaction.atomic
+def bulk_complete(user_id, queryset):
+    pending = _lock(queryset.filter(user_id=user_id, is_completed=False).order_by())
+    rows = list(
+        pending.values('date').annotate(net=Sum(signed_amount('base_amount'))).order_by('date')
+    )
+    accounts = _net_by_account(pending)
+    updated = pending.update(is_completed=True, updated_at=timezone.now())
+    _apply_changes(user_id, rows, accounts=accounts)
+    return updated
+
+
+@db_transaction.atomic
+def bulk_delete(user_id, queryset):
+    queryset = _lock(queryset.filter(user_id=user_id).order_by())
+    rows = _completed_net_by_day(queryset)
+    accounts = _net_by_account(queryset.filter(is_completed=True))
+    rows_deleted = list(queryset.values_list('pk', 'title', 'description', 'category'))
+    if not rows_deleted:
+        return 0
+
+    pks = [pk for pk, *_ in rows_deleted]
+    forget = [state for _, *state in rows_deleted]
+    db_transaction.on_commit(lambda: categorizer.update_model(user_id, forget=forget))
+
+    search.remove_transactions(pks)
+    # QuerySet.delete() carregaria cada linha para disparar os signals
+    deleted = delete_rows(Transaction.objects.filter(pk__in=pks))
+    _apply_changes(user_id, rows, sign=-1, accounts=accounts)
+    return deleted
+
+
+@db_transaction.atomic
+def bulk_recategorize(user_id, queryset, category):
+    queryset = queryset.filter(user_id=user_id)
+    since = queryset.filter(is_completed=True).aggregate(since=Min('date'))['since']
+    forget = list(queryset.exclude(category=category).values_list('title', 'description', 'category'))
+    updated = queryset.update(category=category, updated_at=timezone.now())
+    if since:
+        refresh_monthly_summaries(user_id, since)
+
+    learn = [(title, description, category) for title, description, _ in forget]
+    db_transaction.on_commit(lambda: categorizer.update_model(user_id, forget=forget, learn=learn))
+    _apply_changes(user_id, [])
+    return updated
+
+
+@db_transaction.atomic
+def bulk_autocategorize(user_id, queryset, min_confidence=categorizer.MIN_CONFIDENCE):
+    # Só o que está em OUTROS e tem sugestão confiável; um UPDATE por categoria
+    rows = queryset.filter(
+        user_id=user_id, category=Transaction.Category.OUTROS
+    ).order_by().values_list('pk', 'title', 'description', 'is_completed', 'date')
+    model = categorizer.Categorizer.load(user_id)
+
+    by_category = defaultdict(list)
+    learn = []
+    since = None
+    for pk, title, description, is_completed, day in rows.iterator(chunk_size=2000):
+        category = model.suggest(title, description, min_confidence)
+        if category is None:
+            continue
+        by_category[category].append(pk)
+        learn.append((title, description, category))
+        if is_completed and (since is None or day < since):
+            since = day
+
+    now = timezone.now()
+    for category, pks in by_category.items():
+        Transaction.objects.filter(pk__in=pks).update(category=category, updated_at=now)
+    if since:
+        refresh_monthly_summaries(user_id, since)
+
+    db_transaction.on_commit(lambda: categorizer.update_model(user_id, learn=learn))
+    _apply_changes(user_id, [])
+    return len(learn)
@@ -0,0 +1,205 @@
+import math
+import re
+import time
+import unicodedata
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+
+from django.core.cache import cache
+
+from .models import Transaction
+
+
+# Naive Bayes multinomial por usuário sobre as palavras de título e descrição.
+# O modelo são só contagens, guardadas no cache e ajustadas a cada escrita
+# (+1 ao aprender, -1 ao esquecer); o treino completo só acontece quando o
+# cache não tem o modelo. OUTROS é o padrão de quem não escolheu, então não
+# serve de exemplo.
+#
+# Ler, ajustar e gravar de volta não é atômico no cache: cada escrita pega
+# uma trava por usuário (cache.add). Quem não consegue a trava não espera,
+# avança a geração do modelo: a chave muda, o que estava sendo gravado fica
+# órfão e o próximo load() treina de novo com o banco já atualizado
+
+MODEL_TIMEOUT = 60 * 60 * 24
+
+LOCK_TIMEOUT = 60
+
+MIN_CONFIDENCE = 0.5
+
+TITLE_WEIGHT = 2
+
+_TOKEN_PATTERN = re.compile(r'[a-z0-9]{2,}')
+
+
+def _model_key(user_id, generation):
+    return f'transactions:categorizer:{user_id}:{generation}'
+
+
+def _generation_key(user_id):
+    return f'transactions:categorizer:generation:{user_id}'
+
+
+def _lock_key(user_id):
+    return f'transactions:categorizer:lock:{user_id}'
+
+
+def get_generation(user_id):
+    # Começa pelo relógio, como a versão dos dados: uma geração descartada
+    # do cache nunca volta a apontar para um modelo antigo
+    key = _generation_key(user_id)
+    generation = cache.get(key)
+    if generation is None:
+        cache.add(key, time.time_ns(), timeout=None)
+        generation = cache.get(key)
+    return generation
+
+
+def _bump_generation(user_id):
+    key = _generation_key(user_id)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, time.time_ns(), timeout=None)
+
+
+@contextmanager
+def _write_lock(user_id):
+    key = _lock_key(user_id)
+    acquired = cache.add(key, 1, LOCK_TIMEOUT)
+    try:
+        yield acquired
+    finally:
+        if acquired:
+            cache.delete(key)
+
+
+def _words(text):
+    text = unicodedata.normalize('NFKD', (text or '').lower()).encode('ascii', 'ignore').decode()
+    return [token for token in _TOKEN_PATTERN.findall(text) if not token.isdigit()]
+
+
+def tokenize(title, description=''):
+    # Presença de cada palavra no lançamento; as do título pesam mais
+    counts = dict.fromkeys(_words(description), 1)
+    counts.update(dict.fromkeys(_words(title), TITLE_WEIGHT))
+    return counts
+
+
+class Categorizer:
+    def __init__(self, user_id, documents=None, tokens=None, totals=None, generation=None):
+        self.user_id = user_id
+        self.generation = generation
+        self.documents = Counter(documents or {})
+        self.tokens = defaultdict(Counter, {category: Counter(counts) for category, counts in (tokens or {}).items()})
+        self.totals = Counter(totals or {})
+        self._vocabulary = None
+
+    @classmethod
+    def load(cls, user_id):
+        generation = get_generation(user_id)
+        state = cache.get(_model_key(user_id, generation))
+        if state is not None:
+            return cls(user_id, generation=generation, **state)
+        return cls.train(user_id)
+
+    @classmethod
+    def train(cls, user_id, batch_size=2000):
+        # Com a trava: um ajuste que chegue durante a leitura do banco avança a
+        # geração e este modelo não é usado por ninguém além de quem pediu
+        with _write_lock(user_id) as acquired:
+            model = cls(user_id, generation=get_generation(user_id))
+            rows = Transaction.objects.filter(user_id=user_id).exclude(
+                category=Transaction.Category.OUTROS
+            ).values_list('title', 'description', 'category')
+            for title, description, category in rows.iterator(chunk_size=batch_size):
+                model.learn(title, description, category)
+            if acquired:
+                model.save()
+        return model
+
+    def save(self):
+        state = {
+            'documents': dict(self.documents),
+            'tokens': {
+                category: {token: count for token, count in counts.items() if count > 0}
+                for category, counts in self.tokens.items()
+            },
+            'totals': dict(self.totals),
+        }
+        cache.set(_model_key(self.user_id, self.generation), state, MODEL_TIMEOUT)
+
+    def learn(self, title, description, category, weight=1):
+        if category == Transaction.Category.OUTROS:
+            return
+        self.documents[category] += weight
+        for token, count in tokenize(title, description).items():
+            self.tokens[category][token] += weight * count
+            self.totals[category] += weight * count
+        self._vocabulary = None
+
+    def forget(self, title, description, category):
+        self.learn(title, description, category, weight=-1)
+
+    @property
+    def vocabulary(self):
+        if self._vocabulary is None:
+            self._vocabulary = len({
+                token for counts in self.tokens.values() for token, count in counts.items() if count > 0
+            })
+        return self._vocabulary
+
+    def predict(self, title, description=''):
+        # (categoria, probabilidade) ou (None, 0) sem palavra conhecida
+        tokens = tokenize(title, description)
+        categories = [category for category, count in self.documents.items() if count > 0]
+        if not tokens or not categories:
+            return None, 0.0
+        if not any(self.tokens[category].get(token, 0) > 0 for category in categories for token in tokens):
+            return None, 0.0
+
+        vocabulary = self.vocabulary + 1
+        documents = sum(self.documents[category] for category in categories)
+        scores = {}
+        for category in categories:
+            counts = self.tokens[category]
+            denominator = math.log(max(self.totals[category], 0) + vocabulary)
+            score = math.log(self.documents[category] / documents)
+            for token, count in tokens.items():
+                score += count * (math.log(max(counts.get(token, 0), 0) + 1) - denominator)
+            scores[category] = score
+
+        best = max(scores, key=scores.get)
+        top = scores[best]
+        confidence = 1 / sum(math.exp(score - top) for score in scores.values())
+        return best, confidence
+
+    def suggest(self, title, description='', min_confidence=MIN_CONFIDENCE):
+        category, confidence = self.predict(title, description)
+        return category if confidence >= min_confidence else None
+
+
+def update_model(user_id, forget=(), learn=()):
+    # Ajuste incremental de um modelo já em cache; sem modelo, nada a fazer:
+    # o próximo load() treina com o banco já atualizado
+    with _write_lock(user_id) as acquired:
+        if not acquired:
+            # Outra escrita em andamento: perderia um dos ajustes
+            _bump_generation(user_id)
+            return
+
+        generation = get_generation(user_id)
+        state = cache.get(_model_key(user_id, generation))
+        if state is None:
+            return
+
+        model = Categorizer(user_id, generation=generation, **state)
+        for title, description, category in forget:
+            model.forget(title, description, category)
+        for title, description, category in learn:
+            model.learn(title, description, category)
+        model.save()
+
+
+def discard_model(user_id):
+    _bump_generation(user_id)
@@ -0,0 +1,37 @@
+from django.db.models import Count, Min
+
+from .models import Transaction
+
+
+# Duplicata provável: mesmo usuário, data, valor com sinal e título normalizado.
+# A impressão digital guardada em cada transação é indexada junto com o
+# usuário, então cada candidato é uma busca no índice, nunca um icontains
+
+
+def duplicates_of(transaction):
+    return Transaction.objects.filter(
+        user_id=transaction.user_id, fingerprint=transaction.fingerprint
+    ).exclude(pk=transaction.pk)
+
+
+def existing_fingerprints(user_id, fingerprints):
+    fingerprints = set(fingerprints)
+    if not fingerprints:
+        return set()
+    return set(Transaction.objects.filter(
+        user_id=user_id, fingerprint__in=fingerprints
+    ).values_list('fingerprint', flat=True))
+
+
+def duplicate_groups(user_ids=None):
+    # (usuário, impressão digital, quantidade, pk mais antigo) dos grupos com
+    # mais de um lançamento; o GROUP BY percorre o índice em ordem
+    queryset = Transaction.objects.exclude(fingerprint='')
+    if user_ids:
+        queryset = queryset.filter(user_id__in=user_ids)
+
+    return queryset.values('user_id', 'fingerprint').annotate(
+        total=Count('pk'), first=Min('pk')
+    ).filter(total__gt=1).order_by('user_id', 'fingerprint').values_list(
+        'user_id', 'fingerprint', 'total', 'first'
+    )
@@ -0,0 +1,193 @@
+import csv
+import re
+import zipfile
+from datetime import date
+from xml.sax.saxutils import escape
+
+from .models import Transaction
+from .templatetags.br_filters import br_number
+
+
+EXPORT_HEADER = ['Data', 'Título', 'Descrição', 'Tipo', 'Categoria', 'Valor', 'Status']
+EXPORT_FIELDS = ('date', 'title', 'description', 'type', 'category', 'amount', 'is_completed')
+
+ROWS_PER_CHUNK = 500
+
+# Texto que começa assim vira fórmula ao abrir o CSV numa planilha
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+def export_rows(queryset, chunk_size=2000):
+    # values_list + iterator: nenhuma instância de modelo, nenhum resultado inteiro em memória
+    type_labels = dict(Transaction.Type.choices)
+    category_labels = dict(Transaction.Category.choices)
+
+    rows = queryset.order_by(*Transaction._meta.ordering).values_list(*EXPORT_FIELDS)
+    for day, title, description, type, category, amount, is_completed in rows.iterator(chunk_size=chunk_size):
+        yield (
+            day,
+            title,
+            description,
+            type_labels.get(type, type),
+            category_labels.get(category, category),
+            amount if type == Transaction.Type.INCOME else -amount,
+            'Concluída' if is_completed else 'Pendente',
+        )
+
+
+def _csv_text(value):
+    # Apóstrofo na frente: a planilha mostra o texto como está
+    return f"'{value}" if value.startswith(FORMULA_PREFIXES) else value
+
+
+class _Echo:
+    def write(self, value):
+        return value
+
+
+def stream_csv(rows):
+    writer = csv.writer(_Echo(), delimiter=';')
+    yield '\ufeff' + writer.writerow(EXPORT_HEADER)
+
+    chunk = []
+    for day, title, description, type, category, amount, status in rows:
+        chunk.append(writer.writerow([
+            day.strftime('%d/%m/%Y'), _csv_text(title), _csv_text(description), type, category,
+            br_number(amount, 2), status
+        ]))
+        if len(chunk) >= ROWS_PER_CHUNK:
+            yield ''.join(chunk)
+            chunk = []
+
+    if chunk:
+        yield ''.join(chunk)
+
+
+class _ZipStream:
+    # Destino sem seek: o zipfile grava cada arquivo com data descriptor
+    def __init__(self):
+        self.chunks = []
+        self.offset = 0
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.offset += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.offset
+
+    def flush(self):
+        pass
+
+    def pop(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+XLSX_STATIC_PARTS = {
+    '[Content_Types].xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '<Override PartName="/xl/styles.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+        '</Types>'
+    ),
+    '_rels/.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+        'Target="xl/workbook.xml"/>'
+        '</Relationships>'
+    ),
+    'xl/workbook.xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        '<sheets><sheet name="Transações" sheetId="1" r:id="rId1"/></sheets>'
+        '</workbook>'
+    ),
+    'xl/_rels/workbook.xml.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+        'Target="worksheets/sheet1.xml"/>'
+        '<Relationship Id="rId2" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" '
+        'Target="styles.xml"/>'
+        '</Relationships>'
+    ),
+    # Estilo 1: valor com duas casas; estilo 2: data
+    'xl/styles.xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+        '<fonts count="1"><font/></fonts>'
+        '<fills count="1"><fill/></fills>'
+        '<borders count="1"><border/></borders>'
+        '<cellStyleXfs count="1"><xf/></cellStyleXfs>'
+        '<cellXfs count="3"><xf/><xf numFmtId="4" applyNumberFormat="1"/>'
+        '<xf numFmtId="14" applyNumberFormat="1"/></cellXfs>'
+        '</styleSheet>'
+    ),
+}
+
+EXCEL_EPOCH = date(1899, 12, 30)
+
+INVALID_XML_CHARS = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+
+def _text_cell(value):
+    return f'<c t="inlineStr"><is><t xml:space="preserve">{escape(INVALID_XML_CHARS.sub("", str(value)))}</t></is></c>'
+
+
+def _xlsx_row(values):
+    day, title, description, type, category, amount, status = values
+    return ''.join([
+        '<row>',
+        f'<c s="2"><v>{(day - EXCEL_EPOCH).days}</v></c>',
+        _text_cell(title),
+        _text_cell(description),
+        _text_cell(type),
+        _text_cell(category),
+        f'<c s="1"><v>{amount}</v></c>',
+        _text_cell(status),
+        '</row>',
+    ])
+
+
+def stream_xlsx(rows):
+    output = _ZipStream()
+
+    with zipfile.ZipFile(output, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for name, content in XLSX_STATIC_PARTS.items():
+            archive.writestr(name, content)
+        yield output.pop()
+
+        with archive.open('xl/worksheets/sheet1.xml', 'w', force_zip64=True) as sheet:
+            sheet.write((
+                '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+                '<sheetData>'
+                '<row>' + ''.join(_text_cell(title) for title in EXPORT_HEADER) + '</row>'
+            ).encode())
+
+            chunk = []
+            for values in rows:
+                chunk.append(_xlsx_row(values))
+                if len(chunk) >= ROWS_PER_CHUNK:
+                    sheet.write(''.join(chunk).encode())
+                    chunk = []
+                    yield output.pop()
+
+            sheet.write((''.join(chunk) + '</sheetData></worksheet>').encode())
+
+    yield output.pop()
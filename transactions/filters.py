@@ -0,0 +1,128 @@
+import hashlib
+from dataclasses import dataclass
+from datetime import date, timedelta
+
+from django.utils import timezone
+
+from .search import apply_search
+from .models import Transaction
+
+
+@dataclass(frozen=True)
+class FilterSpec:
+    search: str = ''
+    period: str = ''
+    start_date: date = None
+    end_date: date = None
+    types: tuple = ()
+    statuses: tuple = ()
+    categories: tuple = ()
+
+
+class TransactionFilter:
+    PERIOD_DAYS = {
+        '7': 7, '15': 15, '30': 30, '45': 45, '60': 60,
+    }
+
+    def __init__(self, data, user, today=None):
+        self.user = user
+        self.today = today or timezone.now().date()
+        self.spec = self.parse(data)
+
+    @classmethod
+    def parse(cls, data):
+        period = data.get('period', '')
+        if period not in cls.PERIOD_DAYS and period != 'custom':
+            period = ''
+
+        types = []
+        if data.get('type_in'):
+            types.append(Transaction.Type.INCOME.value)
+        if data.get('type_out'):
+            types.append(Transaction.Type.EXPENSE.value)
+
+        statuses = []
+        if data.get('status_completed'):
+            statuses.append('completed')
+        if data.get('status_pending'):
+            statuses.append('pending')
+
+        categories = sorted(
+            set(data.getlist('category')) & set(Transaction.Category.values)
+        )
+
+        return FilterSpec(
+            search=data.get('search', '').strip(),
+            period=period,
+            start_date=cls._parse_date(data.get('start_date', '')),
+            end_date=cls._parse_date(data.get('end_date', '')),
+            types=tuple(types),
+            statuses=tuple(statuses),
+            categories=tuple(categories),
+        )
+
+    @staticmethod
+    def _parse_date(value):
+        try:
+            return date.fromisoformat(value)
+        except ValueError:
+            return None
+
+    def filter(self, queryset, ranked=False):
+        spec = self.spec
+
+        if spec.search:
+            queryset = apply_search(queryset, self.user.pk, spec.search, ranked=ranked)
+
+        if spec.period in self.PERIOD_DAYS:
+            start_date = self.today - timedelta(days=self.PERIOD_DAYS[spec.period])
+            queryset = queryset.filter(date__gte=start_date, date__lte=self.today)
+
+        if spec.start_date:
+            queryset = queryset.filter(date__gte=spec.start_date)
+
+        if spec.end_date:
+            queryset = queryset.filter(date__lte=spec.end_date)
+
+        if spec.types:
+            queryset = queryset.filter(type__in=spec.types)
+
+        if spec.statuses:
+            queryset = queryset.filter(
+                is_completed__in=[status == 'completed' for status in spec.statuses]
+            )
+
+        if spec.categories:
+            queryset = queryset.filter(category__in=spec.categories)
+
+        return queryset
+
+    @property
+    def active_count(self):
+        spec = self.spec
+        return sum([
+            bool(spec.search),
+            spec.period in self.PERIOD_DAYS,
+            bool(spec.start_date or spec.end_date),
+            bool(spec.types),
+            bool(spec.statuses),
+            bool(spec.categories),
+        ])
+
+    def get_context_data(self):
+        spec = self.spec
+        return {
+            'search': spec.search,
+            'current_period': spec.period,
+            'start_date': spec.start_date.isoformat() if spec.start_date else '',
+            'end_date': spec.end_date.isoformat() if spec.end_date else '',
+            'selected_types': list(spec.types),
+            'selected_status': list(spec.statuses),
+            'selected_categories': list(spec.categories),
+            'total_filtros_ativos': self.active_count,
+        }
+
+    def cache_key(self, *parts):
+        # Períodos relativos dependem do dia, então a data entra na chave
+        raw = repr((self.spec, self.today) + parts)
+        return hashlib.md5(raw.encode()).hexdigest()
@@ -0,0 +1,131 @@
+from dataclasses import dataclass
+from datetime import date, timedelta
+from decimal import Decimal
+from itertools import accumulate
+
+from django.db.models import Sum
+from django.utils import timezone
+
+from .fx import BASE_CURRENCY, consolidated_balance, convert, get_rates_version
+from .models import Transaction
+from .service import signed_amount, user_cached
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+HORIZONS = (30, 90, 365)
+
+
+@dataclass(frozen=True)
+class Forecast:
+    start: date
+    opening: Decimal
+    balances: tuple
+    first_negative: date | None
+
+    @property
+    def dates(self):
+        return [self.start + timedelta(days=offset) for offset in range(len(self.balances))]
+
+    @property
+    def labels(self):
+        return [day.strftime('%d/%m') for day in self.dates]
+
+    @property
+    def end_balance(self):
+        return self.balances[-1]
+
+    @property
+    def lowest_balance(self):
+        return min(self.balances)
+
+
+def _cents(value):
+    return int(value * 100)
+
+
+def project_balances(opening, offsets, amounts, days):
+    # Valores em centavos: soma os movimentos no dia de cada um e acumula.
+    # Devolve o saldo no fim de cada dia e o índice do primeiro dia negativo
+    if np is not None:
+        deltas = np.zeros(days, dtype=np.int64)
+        np.add.at(deltas, np.asarray(offsets, dtype=np.int64), np.asarray(amounts, dtype=np.int64))
+        balances = opening + np.cumsum(deltas)
+        negative = np.flatnonzero(balances < 0)
+        return balances.tolist(), int(negative[0]) if negative.size else None
+
+    deltas = [0] * days
+    for offset, amount in zip(offsets, amounts):
+        deltas[offset] += amount
+    balances = list(accumulate(deltas, initial=opening))[1:]
+    first_negative = next((offset for offset, balance in enumerate(balances) if balance < 0), None)
+    return balances, first_negative
+
+
+class ForecastService:
+    # Parte do saldo consolidado em BRL e soma as transações ainda não concluídas
+    # e as ocorrências das recorrências que ainda não viraram transação, com a
+    # cotação de hoje. Moedas sem cotação ficam de fora, como no saldo
+
+    def __init__(self, user, balance=None):
+        # balance: saldo consolidado de hoje, quando quem chama já calculou
+        self.user = user
+        self.today = timezone.now().date()
+        self.balance = balance
+
+    def _offset(self, day):
+        # Pendências vencidas entram hoje
+        return max((day - self.today).days, 0)
+
+    def _to_brl(self, amount, currency):
+        converted = convert(amount, currency or BASE_CURRENCY, self.today)
+        return None if converted is None else _cents(converted)
+
+    def pending_movements(self, end):
+        rows = self.user.transactions.filter(
+            is_completed=False, date__lte=end
+        ).values('date', 'account__currency').annotate(net=Sum(signed_amount())).order_by()
+        for row in rows:
+            value = self._to_brl(row['net'], row['account__currency'])
+            if value is not None:
+                yield self._offset(row['date']), value
+
+    def recurring_movements(self, end):
+        rules = self.user.recurring_rules.filter(
+            is_active=True, next_date__lte=end
+        ).select_related('account')
+        for rule in rules:
+            amount = rule.amount if rule.type == Transaction.Type.INCOME else -rule.amount
+            value = self._to_brl(amount, rule.account.currency if rule.account else None)
+            if value is None:
+                continue
+            number = rule.generated + 1
+            while not rule.is_finished(number):
+                day = rule.occurrence_date(number)
+                if day > end:
+                    break
+                yield self._offset(day), value
+                number += 1
+
+    @user_cached('forecast', extra_key=get_rates_version)
+    def get_forecast(self, days=30):
+        if days not in HORIZONS:
+            raise ValueError(f'Horizonte inválido: {days}')
+
+        end = self.today + timedelta(days=days - 1)
+        movements = [*self.pending_movements(end), *self.recurring_movements(end)]
+        offsets = [offset for offset, _ in movements]
+        amounts = [amount for _, amount in movements]
+
+        balance = self.balance if self.balance is not None else consolidated_balance(self.user, self.today)
+        balances, first_negative = project_balances(_cents(balance.total), offsets, amounts, days)
+
+        return Forecast(
+            start=self.today,
+            opening=balance.total,
+            balances=tuple(balance / 100 for balance in balances),
+            first_negative=None if first_negative is None else self.today + timedelta(days=first_negative),
+        )
@@ -1,22 +1,120 @@
 from django import forms
 from django.utils import timezone
 
-from .models import Transaction
+from .models import Account, Budget, Transaction
 
 
 class TransactionForm(forms.ModelForm):
     class Meta:
         model = Transaction
-        exclude = ['user']
+        exclude = ['user', 'recurring_rule', 'occurrence']
         widgets = {
             'date': forms.DateInput(attrs={'type': 'date', 'class': 'form-control bg-dark text-light'}),
             'title': forms.TextInput(attrs={'class': 'form-control bg-dark text-light'}),
             'amount': forms.NumberInput(attrs={'class': 'form-control bg-dark text-light', 'step': '0.01'}),
             'description': forms.Textarea(attrs={'class': 'form-control bg-dark text-light', 'rows': 3}),
+            'account': forms.Select(attrs={'class': 'form-select bg-dark text-light border-secondary'}),
         }
 
-    def __init__(self, *args, **kwargs):
+    def __init__(self, *args, user=None, **kwargs):
         super().__init__(*args, **kwargs)
         if not self.instance.pk:
             today = timezone.now().date()
             self.fields['date'].initial = today
+
+        if user is not None:
+            self.fields['account'].queryset = user.accounts.all()
+            self.fields['account'].empty_label = None
+            if not self.instance.pk:
+                self.fields['account'].initial = Account.default_for(user.pk).pk
+
+
+class BudgetForm(forms.ModelForm):
+    month = forms.DateField(
+        label='Mês',
+        input_formats=['%Y-%m'],
+        widget=forms.DateInput(format='%Y-%m', attrs={'type': 'month', 'class': 'form-control bg-dark text-light'})
+    )
+
+    class Meta:
+        model = Budget
+        fields = ['category', 'month', 'limit']
+        widgets = {
+            'category': forms.Select(attrs={'class': 'form-select bg-dark text-light'}),
+            'limit': forms.NumberInput(attrs={'class': 'form-control bg-dark text-light', 'step': '0.01', 'min': '0.01'}),
+        }
+
+    def clean_limit(self):
+        limit = self.cleaned_data['limit']
+        if limit <= 0:
+            raise forms.ValidationError('O limite deve ser maior que zero.')
+        return limit
+
+
+class AccountForm(forms.ModelForm):
+    class Meta:
+        model = Account
+        fields = ['name', 'kind', 'currency']
+        widgets = {
+            'name': forms.TextInput(attrs={'class': 'form-control bg-dark text-light'}),
+            'kind': forms.Select(attrs={'class': 'form-select bg-dark text-light'}),
+            'currency': forms.Select(attrs={'class': 'form-select bg-dark text-light'}),
+        }
+
+    def __init__(self, *args, user=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.user = user
+
+    def clean_name(self):
+        name = self.cleaned_data['name']
+        if self.user is not None and self.user.accounts.filter(name=name).exclude(pk=self.instance.pk).exists():
+            raise forms.ValidationError('Já existe uma conta com este nome.')
+        return name
+
+
+class TransactionImportForm(forms.Form):
+    FORMAT_CHOICES = [
+        ('auto', 'Detectar pela extensão'),
+        ('csv', 'CSV'),
+        ('ofx', 'OFX'),
+    ]
+
+    file = forms.FileField(
+        label='Arquivo',
+        widget=forms.ClearableFileInput(attrs={'class': 'form-control bg-dark text-light', 'accept': '.csv,.ofx'})
+    )
+    file_format = forms.ChoiceField(
+        label='Formato',
+        choices=FORMAT_CHOICES,
+        initial='auto',
+        widget=forms.Select(attrs={'class': 'form-select bg-dark text-light'})
+    )
+    account = forms.ModelChoiceField(
+        label='Conta',
+        queryset=Account.objects.none(),
+        required=False,
+        empty_label='Conta padrão',
+        widget=forms.Select(attrs={'class': 'form-select bg-dark text-light'})
+    )
+    skip_duplicates = forms.BooleanField(
+        label='Ignorar lançamentos que já existem',
+        required=False,
+        widget=forms.CheckboxInput(attrs={'class': 'form-check-input'})
+    )
+
+    def __init__(self, *args, user=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if user is not None:
+            self.fields['account'].queryset = user.accounts.all()
+
+    def clean(self):
+        cleaned_data = super().clean()
+        uploaded = cleaned_data.get('file')
+
+        if uploaded and cleaned_data.get('file_format') == 'auto':
+            extension = uploaded.name.rsplit('.', 1)[-1].lower()
+            if extension not in ('csv', 'ofx'):
+                raise forms.ValidationError('Não foi possível detectar o formato do arquivo.')
+            cleaned_data['file_format'] = extension
+
+        return cleaned_data
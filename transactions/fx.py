@@ -0,0 +1,100 @@
+import time
+from dataclasses import dataclass, field
+from decimal import ROUND_HALF_UP, Decimal
+from functools import lru_cache
+
+from django.core.cache import cache
+from django.utils import timezone
+
+from .models import Account, ExchangeRate, Transaction
+
+
+BASE_CURRENCY = Account.Currency.BRL
+
+_RATES_VERSION_KEY = 'transactions:fx:version'
+
+_RATES_MODIFIED_KEY = 'transactions:fx:modified'
+
+
+def get_rates_version():
+    version = cache.get(_RATES_VERSION_KEY)
+    if version is None:
+        cache.add(_RATES_VERSION_KEY, time.time_ns(), timeout=None)
+        version = cache.get(_RATES_VERSION_KEY)
+    return version
+
+
+def bump_rates_version():
+    try:
+        cache.incr(_RATES_VERSION_KEY)
+    except ValueError:
+        cache.set(_RATES_VERSION_KEY, time.time_ns(), timeout=None)
+    cache.set(_RATES_MODIFIED_KEY, timezone.now(), timeout=None)
+
+
+def get_rates_last_modified():
+    # Sem registro: nenhuma cotação mudou desde que o cache começou
+    return cache.get(_RATES_MODIFIED_KEY)
+
+
+@lru_cache(maxsize=4096)
+def _lookup_rate(currency, day, version):
+    # Última cotação até a data: fim de semana e feriado usam a anterior.
+    # Antes da primeira cotação cadastrada, vale a primeira. A versão na
+    # chave descarta o que foi memorizado antes de uma cotação nova
+    rates = ExchangeRate.objects.filter(currency=currency).values_list('rate', flat=True)
+    rate = rates.filter(date__lte=day).order_by('-date').first()
+    if rate is None:
+        rate = rates.filter(date__gt=day).order_by('date').first()
+    return rate
+
+
+def get_rate(currency, day=None):
+    if currency == BASE_CURRENCY:
+        return Decimal('1')
+    return _lookup_rate(currency, day or timezone.now().date(), get_rates_version())
+
+
+def convert(amount, currency, day=None):
+    rate = get_rate(currency, day)
+    if rate is None:
+        return None
+    return (amount * rate).quantize(Decimal('0.01'))
+
+
+def fill_base_amounts(transactions):
+    # Valor em BRL de cada transação pela cotação da sua data, arredondado
+    # como o ROUND do banco (service.base_amount_expression). Sem nenhuma
+    # cotação da moeda fica 0, como no saldo consolidado, até a importação
+    currencies = {
+        t.account_id: t.account.currency
+        for t in transactions if Transaction.account.is_cached(t) and t.account is not None
+    }
+    missing = {t.account_id for t in transactions} - currencies.keys() - {None}
+    if missing:
+        currencies.update(Account.objects.filter(pk__in=missing).values_list('pk', 'currency'))
+    for t in transactions:
+        rate = get_rate(currencies.get(t.account_id, BASE_CURRENCY), t.date)
+        t.base_amount = Decimal('0') if rate is None else (t.amount * rate).quantize(Decimal('0.01'), ROUND_HALF_UP)
+    return transactions
+
+
+@dataclass
+class ConsolidatedBalance:
+    total: Decimal = Decimal('0')
+    accounts: list = field(default_factory=list)
+    missing: set = field(default_factory=set)
+
+
+def consolidated_balance(user, day=None):
+    # Soma dos saldos por conta convertidos para BRL: uma conversão por conta,
+    # nunca por transação. Moedas sem cotação ficam de fora do total
+    result = ConsolidatedBalance()
+    for account in user.accounts.all():
+        converted = convert(account.balance, account.currency, day)
+        result.accounts.append((account, converted))
+        if converted is None:
+            result.missing.add(account.currency)
+        else:
+            result.total += converted
+    return result
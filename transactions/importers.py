@@ -0,0 +1,275 @@
+import csv
+import io
+import re
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+
+from django.core.exceptions import ValidationError
+from django.db import transaction as db_transaction
+
+from . import fx
+from .categorizer import Categorizer
+from .duplicates import existing_fingerprints
+from .models import Account, Transaction
+from .service import apply_bulk_insert, refresh_daily_balances, refresh_monthly_summaries
+
+
+CSV_COLUMNS = {
+    'date': ('data', 'date', 'data lançamento', 'data lancamento'),
+    'title': ('titulo', 'título', 'title', 'histórico', 'historico', 'lançamento', 'lancamento'),
+    'amount': ('valor', 'amount', 'value'),
+    'type': ('tipo', 'type'),
+    'category': ('categoria', 'category'),
+    'description': ('descrição', 'descricao', 'description', 'memo'),
+    'is_completed': ('concluida', 'concluída', 'status', 'completed'),
+}
+
+TYPE_ALIASES = {
+    'in': Transaction.Type.INCOME, 'entrada': Transaction.Type.INCOME,
+    'credito': Transaction.Type.INCOME, 'crédito': Transaction.Type.INCOME,
+    'out': Transaction.Type.EXPENSE, 'saida': Transaction.Type.EXPENSE,
+    'saída': Transaction.Type.EXPENSE, 'debito': Transaction.Type.EXPENSE,
+    'débito': Transaction.Type.EXPENSE,
+}
+
+CATEGORY_ALIASES = {
+    **{value.lower(): value for value in Transaction.Category.values},
+    **{label.lower(): value for value, label in Transaction.Category.choices},
+}
+
+FALSE_VALUES = ('0', 'false', 'nao', 'não', 'n', 'pendente')
+
+MAX_REPORTED_ERRORS = 50
+
+# Tipo, categoria e data já saem validados do parser
+VALIDATED_FIELDS = ('title', 'description', 'amount')
+
+
+@dataclass
+class ImportResult:
+    created: int = 0
+    skipped: int = 0
+    errors: list = field(default_factory=list)
+    duplicate_count: int = 0
+    duplicates: list = field(default_factory=list)
+    skip_duplicates: bool = False
+
+    def add_error(self, line, message):
+        self.skipped += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append((line, message))
+
+    def add_duplicate(self, line, transaction):
+        self.duplicate_count += 1
+        if len(self.duplicates) < MAX_REPORTED_ERRORS:
+            self.duplicates.append((line, transaction))
+
+
+def parse_amount(value):
+    value = value.strip().replace('R$', '').replace(' ', '')
+    if ',' in value:
+        # Formato brasileiro: 1.234,56
+        value = value.replace('.', '').replace(',', '.')
+    try:
+        amount = Decimal(value)
+    except InvalidOperation:
+        raise ValidationError(f'Valor inválido: {value}')
+    if not amount.is_finite():
+        raise ValidationError(f'Valor inválido: {value}')
+    return amount
+
+
+def parse_date(value):
+    value = value.strip()
+    for fmt in ('%d/%m/%Y', '%Y-%m-%d', '%d/%m/%y', '%d-%m-%Y'):
+        try:
+            return datetime.strptime(value, fmt).date()
+        except ValueError:
+            continue
+    raise ValidationError(f'Data inválida: {value}')
+
+
+def read_csv(stream):
+    # Gera (linha, dados) sem carregar o arquivo inteiro
+    first_line = stream.readline()
+    delimiter = ';' if first_line.count(';') > first_line.count(',') else ','
+    header = next(csv.reader([first_line], delimiter=delimiter))
+
+    columns = {}
+    for index, name in enumerate(header):
+        name = name.strip().lower()
+        for key, aliases in CSV_COLUMNS.items():
+            if name in aliases:
+                columns.setdefault(key, index)
+
+    missing = {'date', 'title', 'amount'} - set(columns)
+    if missing:
+        raise ValidationError(f'Colunas obrigatórias ausentes: {", ".join(sorted(missing))}')
+
+    for line, row in enumerate(csv.reader(stream, delimiter=delimiter), start=2):
+        if not any(cell.strip() for cell in row):
+            continue
+        yield line, {
+            key: row[index].strip() if index < len(row) else ''
+            for key, index in columns.items()
+        }
+
+
+OFX_TAG = re.compile(r'<(/?)([A-Z0-9.]+)>([^<]*)', re.IGNORECASE)
+
+
+def read_ofx(stream):
+    # OFX em SGML nem sempre fecha as tags folha, então lê tag a tag
+    current = None
+    line_number = 0
+    for line_number, line in enumerate(stream, start=1):
+        for closing, tag, value in OFX_TAG.findall(line):
+            tag = tag.upper()
+            if tag == 'STMTTRN':
+                if closing and current is not None:
+                    yield current.pop('_line'), current
+                    current = None
+                elif not closing:
+                    current = {'_line': line_number}
+            elif current is not None and not closing and value.strip():
+                current[tag] = value.strip()
+
+    if current is not None:
+        yield current.pop('_line', line_number), current
+
+
+def ofx_to_row(data):
+    posted = data.get('DTPOSTED', '')
+    memo = data.get('MEMO', '')
+    return {
+        'date': posted[:8],
+        'title': data.get('NAME') or memo,
+        'amount': data.get('TRNAMT', ''),
+        'description': memo if data.get('NAME') else '',
+    }
+
+
+def build_transaction(user, row, account=None, model=None):
+    if isinstance(row['date'], date):
+        day = row['date']
+    elif re.fullmatch(r'\d{8}', row['date']):
+        day = datetime.strptime(row['date'], '%Y%m%d').date()
+    else:
+        day = parse_date(row['date'])
+
+    amount = parse_amount(row['amount'])
+
+    raw_type = row.get('type', '').lower()
+    if raw_type:
+        if raw_type not in TYPE_ALIASES:
+            raise ValidationError(f'Tipo inválido: {row["type"]}')
+        transaction_type = TYPE_ALIASES[raw_type]
+    else:
+        transaction_type = Transaction.Type.INCOME if amount > 0 else Transaction.Type.EXPENSE
+
+    raw_category = row.get('category', '').lower()
+    if raw_category and raw_category not in CATEGORY_ALIASES:
+        raise ValidationError(f'Categoria inválida: {row["category"]}')
+
+    if raw_category:
+        category = CATEGORY_ALIASES[raw_category]
+    else:
+        # Sem categoria no arquivo: sugestão pelo histórico do usuário
+        category = model and model.suggest(row['title'], row.get('description', ''))
+
+    raw_completed = row.get('is_completed', '').lower()
+
+    transaction = Transaction(
+        user=user,
+        account=account,
+        title=row['title'],
+        description=row.get('description', ''),
+        amount=abs(amount),
+        type=transaction_type,
+        category=category or Transaction.Category.OUTROS,
+        is_completed=raw_completed not in FALSE_VALUES,
+        date=day,
+    )
+    for name in VALIDATED_FIELDS:
+        field = Transaction._meta.get_field(name)
+        setattr(transaction, name, field.clean(getattr(transaction, name), transaction))
+    transaction.refresh_fingerprint()
+    return transaction
+
+
+def import_transactions(user, rows, batch_size=1000, account=None, skip_duplicates=False):
+    account = account or Account.default_for(user.pk)
+    model = Categorizer.load(user.pk)
+    result = ImportResult(skip_duplicates=skip_duplicates)
+    batch = []
+    earliest_dates = []
+    # Impressões que só existem por causa desta importação: linhas repetidas
+    # no próprio arquivo não contam como duplicata do banco
+    imported = set()
+
+    try:
+        for line, row in rows:
+            try:
+                batch.append((line, build_transaction(user, row, account, model)))
+            except ValidationError as error:
+                result.add_error(line, '; '.join(error.messages))
+                continue
+
+            if len(batch) >= batch_size:
+                batch = _check_duplicates(user, batch, imported, result)
+                result.created += _save_batch(user, batch, earliest_dates)
+                batch = []
+
+        if batch:
+            batch = _check_duplicates(user, batch, imported, result)
+            result.created += _save_batch(user, batch, earliest_dates)
+    finally:
+        # Saldos diários e resumos recalculados uma vez por importação, mesmo se falhar no meio
+        if earliest_dates:
+            with db_transaction.atomic():
+                refresh_daily_balances(user.pk, min(earliest_dates))
+                refresh_monthly_summaries(user.pk, min(earliest_dates))
+
+    return result
+
+
+def _check_duplicates(user, batch, imported, result):
+    # Uma consulta pelo índice por lote, com as impressões do lote inteiro
+    existing = existing_fingerprints(user.pk, {t.fingerprint for _, t in batch}) - imported
+    kept = []
+    for line, t in batch:
+        if t.fingerprint in existing:
+            result.add_duplicate(line, t)
+            if result.skip_duplicates:
+                result.skipped += 1
+                continue
+        else:
+            imported.add(t.fingerprint)
+        kept.append(t)
+    return kept
+
+
+@db_transaction.atomic
+def _save_batch(user, batch, earliest_dates):
+    if not batch:
+        return 0
+    created = Transaction.objects.bulk_create(fx.fill_base_amounts(batch))
+    earliest = apply_bulk_insert(user.pk, created, refresh_ledger=False)
+    if earliest:
+        earliest_dates.append(earliest)
+    return len(created)
+
+
+def import_file(user, file, file_format, encoding='utf-8-sig', batch_size=1000, account=None,
+                skip_duplicates=False):
+    stream = io.TextIOWrapper(file, encoding=encoding, errors='replace', newline='')
+
+    if file_format == 'ofx':
+        rows = ((line, ofx_to_row(data)) for line, data in read_ofx(stream))
+    else:
+        rows = read_csv(stream)
+
+    return import_transactions(
+        user, rows, batch_size=batch_size, account=account, skip_duplicates=skip_duplicates
+    )
@@ -0,0 +1,87 @@
+import json
+import platform
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from transactions.benchmark import SCENARIOS, compare, prepare_user, run_scenarios
+from transactions.synthetic import clear_synthetic_data, is_scratch_database
+
+
+class Command(BaseCommand):
+    help = (
+        'Mede tempo e número de consultas das páginas e fluxos principais em vários '
+        'tamanhos de base. Usa usuários sintéticos, removidos no fim'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='1000,100000',
+                            help='Transações do usuário medido, separadas por vírgula (ex.: 1000,100000,1000000)')
+        parser.add_argument('--scenarios', help=f'Padrão: todos ({", ".join(SCENARIOS)})')
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--output', help='Grava o resultado em JSON neste arquivo')
+        parser.add_argument('--baseline', help='JSON de uma execução anterior para comparar')
+        parser.add_argument('--tolerance', type=float, default=0.25,
+                            help='Aumento relativo da mediana aceito antes de acusar regressão')
+        parser.add_argument('--allow-writes', action='store_true',
+                            help='Permite rodar com DEBUG=False: grava e apaga dados no banco configurado')
+
+    def handle(self, *args, **options):
+        if not options['allow_writes'] and not is_scratch_database():
+            raise CommandError('Este comando grava no banco configurado. Use --allow-writes fora do DEBUG.')
+        try:
+            sizes = [int(size) for size in options['sizes'].split(',')]
+        except ValueError:
+            raise CommandError('--sizes deve ser uma lista de inteiros.')
+
+        names = options['scenarios'].split(',') if options['scenarios'] else list(SCENARIOS)
+        unknown = set(names) - set(SCENARIOS)
+        if unknown:
+            raise CommandError(f'Cenários desconhecidos: {", ".join(sorted(unknown))}')
+
+        results = []
+        try:
+            for size in sizes:
+                self.stdout.write(f'Gerando {size} transações...')
+                user = prepare_user(size, seed=options['seed'])
+                for row in run_scenarios(user, size, names, repeat=options['repeat']):
+                    results.append(row)
+                    self.stdout.write(
+                        f"  {row['scenario']:<20} {row['median_ms']:>9.2f} ms  {row['queries']:>4} consultas"
+                    )
+        finally:
+            clear_synthetic_data()
+
+        report = {
+            'meta': {
+                'created_at': timezone.now().isoformat(),
+                'database': connection.vendor,
+                'django': django.get_version(),
+                'python': platform.python_version(),
+                'repeat': options['repeat'],
+            },
+            'results': results,
+        }
+
+        if options['output']:
+            with open(options['output'], 'w') as file:
+                json.dump(report, file, indent=2)
+            self.stdout.write(self.style.SUCCESS(f'Resultado gravado em {options["output"]}.'))
+        else:
+            self.stdout.write(json.dumps(report, indent=2))
+
+        if options['baseline']:
+            with open(options['baseline']) as file:
+                regressions = compare(results, json.load(file), tolerance=options['tolerance'])
+            for row, old in regressions:
+                self.stderr.write(
+                    f"Regressão em {row['scenario']} ({row['size']}): "
+                    f"{old['median_ms']} -> {row['median_ms']} ms, "
+                    f"{old['queries']} -> {row['queries']} consultas"
+                )
+            if regressions:
+                raise CommandError(f'{len(regressions)} regressões em relação a {options["baseline"]}.')
+            self.stdout.write(self.style.SUCCESS('Nenhuma regressão em relação à base.'))
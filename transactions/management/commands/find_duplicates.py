@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand
+
+from transactions.duplicates import duplicate_groups
+from transactions.models import Transaction
+
+
+class Command(BaseCommand):
+    help = 'Procura transações duplicadas (mesma data, valor e título) de todos os usuários'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, action='append', dest='user_ids',
+                            help='ID do usuário (pode ser repetido). Padrão: todos')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        groups = 0
+        extra = 0
+        batch = []
+        for group in duplicate_groups(options['user_ids']).iterator(chunk_size=options['batch_size']):
+            batch.append(group)
+            if len(batch) >= options['batch_size']:
+                self._report(batch)
+                batch = []
+            groups += 1
+            extra += group[2] - 1
+        self._report(batch)
+
+        if not groups:
+            self.stdout.write(self.style.SUCCESS('Nenhuma duplicata encontrada.'))
+        else:
+            self.stdout.write(self.style.WARNING(
+                f'{groups} grupos de duplicatas, {extra} lançamentos a mais.'
+            ))
+
+    def _report(self, batch):
+        # Um exemplo por grupo, buscado de uma vez pelo lote
+        examples = Transaction.objects.in_bulk([first for *_, first in batch])
+        for user_id, _, total, first in batch:
+            t = examples[first]
+            self.stdout.write(
+                f'Usuário {user_id}: {total}x {t.date:%d/%m/%Y} {t.title} '
+                f'{t.get_type_display()} R$ {t.amount}'
+            )
@@ -0,0 +1,51 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from transactions.synthetic import (
+    SYNTHETIC_DOMAIN, clear_synthetic_data, create_users, generate_transactions, is_scratch_database,
+    synthetic_users
+)
+
+
+class Command(BaseCommand):
+    help = f'Gera usuários e transações sintéticos (emails @{SYNTHETIC_DOMAIN})'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10)
+        parser.add_argument('--transactions', type=int, default=1000,
+                            help='Transações por usuário')
+        parser.add_argument('--days', type=int, default=730,
+                            help='Distribui as datas pelos últimos N dias')
+        parser.add_argument('--pending-ratio', type=float, default=0.1)
+        parser.add_argument('--seed', type=int)
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--clear', action='store_true',
+                            help='Remove os dados sintéticos existentes antes de gerar')
+        parser.add_argument('--allow-writes', action='store_true',
+                            help='Permite rodar com DEBUG=False: grava e apaga dados no banco configurado')
+
+    def handle(self, *args, **options):
+        if not options['allow_writes'] and not is_scratch_database():
+            raise CommandError('Este comando grava no banco configurado. Use --allow-writes fora do DEBUG.')
+        started = time.perf_counter()
+
+        if options['clear']:
+            deleted = clear_synthetic_data()
+            self.stdout.write(f'{deleted} transações sintéticas removidas.')
+
+        start = synthetic_users().count()
+        users = create_users(options['users'], start=start)
+        created = generate_transactions(
+            [user.pk for user in users],
+            options['transactions'],
+            days=options['days'],
+            pending_ratio=options['pending_ratio'],
+            seed=options['seed'],
+            batch_size=options['batch_size'],
+        )
+
+        self.stdout.write(self.style.SUCCESS(
+            f'{len(users)} usuários e {created} transações gerados em '
+            f'{time.perf_counter() - started:.1f}s.'
+        ))
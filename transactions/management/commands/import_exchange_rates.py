@@ -0,0 +1,55 @@
+import csv
+from datetime import date
+from decimal import Decimal, InvalidOperation
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction as db_transaction
+
+from transactions.fx import BASE_CURRENCY, bump_rates_version
+from transactions.models import Account, ExchangeRate
+from transactions.service import rebase_transactions
+
+
+class Command(BaseCommand):
+    help = (
+        'Importa cotações para BRL de um CSV com as colunas date,currency,rate '
+        '(ex.: 2026-10-16,USD,5.4321). Datas já cadastradas são atualizadas'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Caminho do arquivo CSV')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        currencies = set(Account.Currency.values) - {BASE_CURRENCY}
+        rates = {}
+
+        with open(options['path'], newline='') as file:
+            for line, row in enumerate(csv.DictReader(file), start=2):
+                try:
+                    day = date.fromisoformat(row['date'].strip())
+                    currency = row['currency'].strip().upper()
+                    rate = Decimal(row['rate'].strip())
+                except (KeyError, AttributeError, ValueError, InvalidOperation):
+                    raise CommandError(f'Linha {line} inválida: {row}')
+                if currency not in currencies:
+                    raise CommandError(f'Linha {line}: moeda {currency} não suportada.')
+                if not rate.is_finite() or rate <= 0:
+                    raise CommandError(f'Linha {line}: cotação deve ser positiva.')
+                rates[(currency, day)] = rate
+
+        # Cotações e valores em BRL das transações mudam juntos
+        with db_transaction.atomic():
+            ExchangeRate.objects.bulk_create(
+                [ExchangeRate(currency=currency, date=day, rate=rate) for (currency, day), rate in rates.items()],
+                batch_size=options['batch_size'],
+                update_conflicts=True,
+                unique_fields=['currency', 'date'],
+                update_fields=['rate'],
+            )
+            users = rebase_transactions({currency for currency, _ in rates})
+        bump_rates_version()
+
+        self.stdout.write(self.style.SUCCESS(
+            f'{len(rates)} cotações importadas; saldos de {users} usuários recalculados.'
+        ))
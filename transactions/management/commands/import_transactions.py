@@ -0,0 +1,65 @@
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+
+from transactions.importers import import_file
+from transactions.models import Account
+
+
+class Command(BaseCommand):
+    help = 'Importa um extrato CSV ou OFX para um usuário'
+
+    def add_arguments(self, parser):
+        parser.add_argument('email', help='Email do usuário')
+        parser.add_argument('path', help='Caminho do arquivo')
+        parser.add_argument('--format', choices=['csv', 'ofx'], dest='file_format',
+                            help='Padrão: detectado pela extensão')
+        parser.add_argument('--account', help='Nome da conta de destino. Padrão: conta principal')
+        parser.add_argument('--skip-duplicates', action='store_true',
+                            help='Não importa lançamentos com mesma data, valor e título de um já existente')
+        parser.add_argument('--encoding', default='utf-8-sig')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+        try:
+            user = User.objects.get(email=options['email'])
+        except User.DoesNotExist:
+            raise CommandError(f'Usuário {options["email"]} não encontrado.')
+
+        account = None
+        if options['account']:
+            try:
+                account = user.accounts.get(name=options['account'])
+            except Account.DoesNotExist:
+                raise CommandError(f'Conta {options["account"]} não encontrada.')
+
+        file_format = options['file_format'] or options['path'].rsplit('.', 1)[-1].lower()
+        if file_format not in ('csv', 'ofx'):
+            raise CommandError('Informe o formato com --format.')
+
+        with open(options['path'], 'rb') as file:
+            try:
+                result = import_file(
+                    user, file, file_format,
+                    encoding=options['encoding'],
+                    batch_size=options['batch_size'],
+                    account=account,
+                    skip_duplicates=options['skip_duplicates']
+                )
+            except ValidationError as error:
+                raise CommandError('; '.join(error.messages))
+
+        for line, message in result.errors:
+            self.stderr.write(f'Linha {line}: {message}')
+        for line, t in result.duplicates:
+            self.stderr.write(f'Linha {line}: possível duplicata de {t.date:%d/%m/%Y} {t.title} R$ {t.amount}')
+        if result.duplicate_count:
+            self.stdout.write(self.style.WARNING(
+                f'{result.duplicate_count} possíveis duplicatas '
+                f'{"ignoradas" if result.skip_duplicates else "importadas"}.'
+            ))
+
+        self.stdout.write(self.style.SUCCESS(
+            f'{result.created} transações importadas, {result.skipped} linhas ignoradas.'
+        ))
@@ -0,0 +1,118 @@
+import random
+import threading
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection
+from django.db.models import Sum
+from django.utils import timezone
+
+from transactions.models import Transaction
+from transactions.synthetic import is_scratch_database
+
+
+LOAD_TEST_EMAIL = 'loadtest@cashcare.local'
+
+
+class Command(BaseCommand):
+    help = (
+        'Mede a vazão com escritores e leitores concorrentes no banco configurado. '
+        'Para comparar perfis: SQLITE_TUNING=False python manage.py load_test'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--writers', type=int, default=8)
+        parser.add_argument('--readers', type=int, default=4)
+        parser.add_argument('--operations', type=int, default=100,
+                            help='Transações criadas por escritor')
+        parser.add_argument('--read-interval', type=float, default=0.01,
+                            help='Pausa entre leituras, em segundos')
+        parser.add_argument('--allow-writes', action='store_true',
+                            help='Permite rodar com DEBUG=False: grava e apaga dados no banco configurado')
+
+    def handle(self, *args, **options):
+        if not options['allow_writes'] and not is_scratch_database():
+            raise CommandError('Este comando grava no banco configurado. Use --allow-writes fora do DEBUG.')
+        User = get_user_model()
+        User.objects.filter(email=LOAD_TEST_EMAIL).delete()
+        user = User.objects.create_user(LOAD_TEST_EMAIL, None, first_name='Load', last_name='Test')
+
+        stats = {'writes': 0, 'write_errors': 0, 'reads': 0, 'read_errors': 0}
+        lock = threading.Lock()
+        writers_done = threading.Event()
+        today = timezone.now().date()
+
+        def count(key):
+            with lock:
+                stats[key] += 1
+
+        def writer(seed):
+            rng = random.Random(seed)
+            try:
+                for _ in range(options['operations']):
+                    try:
+                        Transaction.objects.create(
+                            user=user,
+                            title='Carga',
+                            amount=Decimal(rng.randint(100, 50000)) / 100,
+                            type=rng.choice(Transaction.Type.values),
+                            category=rng.choice(Transaction.Category.values),
+                            is_completed=True,
+                            date=today - timedelta(days=rng.randint(0, 90)),
+                        )
+                        count('writes')
+                    except OperationalError:
+                        count('write_errors')
+            finally:
+                connection.close()
+
+        def reader():
+            try:
+                while not writers_done.is_set():
+                    try:
+                        Transaction.objects.filter(user=user, is_completed=True).aggregate(
+                            total=Sum('amount')
+                        )
+                        count('reads')
+                    except OperationalError:
+                        count('read_errors')
+                    time.sleep(options['read_interval'])
+            finally:
+                connection.close()
+
+        writer_threads = [threading.Thread(target=writer, args=(seed,)) for seed in range(options['writers'])]
+        reader_threads = [threading.Thread(target=reader) for _ in range(options['readers'])]
+
+        started = time.perf_counter()
+        for thread in writer_threads + reader_threads:
+            thread.start()
+        for thread in writer_threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+        writers_done.set()
+        for thread in reader_threads:
+            thread.join()
+
+        user.refresh_from_db()
+        expected = sum(
+            t.signed_amount for t in Transaction.objects.filter(user=user).only('amount', 'type')
+        )
+        User.objects.filter(pk=user.pk).delete()
+
+        options_summary = connection.settings_dict.get('OPTIONS') or {}
+        self.stdout.write(f'Banco: {connection.vendor} {options_summary.get("transaction_mode", "")}'.rstrip())
+        self.stdout.write(
+            f'Escritas: {stats["writes"]} em {elapsed:.2f}s ({stats["writes"] / elapsed:.0f}/s), '
+            f'{stats["write_errors"]} falhas'
+        )
+        self.stdout.write(
+            f'Leituras: {stats["reads"]} ({stats["reads"] / elapsed:.0f}/s), {stats["read_errors"]} falhas'
+        )
+
+        if user.balance == expected:
+            self.stdout.write(self.style.SUCCESS('Saldo consistente com as transações gravadas.'))
+        else:
+            self.stdout.write(self.style.ERROR(f'Saldo divergente: {user.balance} (esperado {expected}).'))
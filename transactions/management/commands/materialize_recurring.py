@@ -0,0 +1,25 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from transactions.recurring import materialize_recurring
+
+
+class Command(BaseCommand):
+    help = 'Gera os lançamentos das recorrências e parcelamentos até a data informada'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=30,
+                            help='Gera lançamentos até hoje + N dias. Padrão: 30')
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Quantidade de regras processadas por transação')
+
+    def handle(self, *args, **options):
+        until = timezone.now().date() + timedelta(days=options['days'])
+        result = materialize_recurring(until=until, batch_size=options['batch_size'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f'{result.created} lançamentos gerados a partir de {result.rules} recorrências '
+            f'({result.finished} encerradas) até {until:%d/%m/%Y}.'
+        ))
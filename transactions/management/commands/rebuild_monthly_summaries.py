@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from transactions.service import rebuild_monthly_summaries
+
+
+class Command(BaseCommand):
+    help = 'Recalcula os resumos mensais por categoria a partir das transações concluídas'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, action='append', dest='user_ids',
+                            help='ID do usuário (pode ser repetido). Padrão: todos')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        total = rebuild_monthly_summaries(
+            user_ids=options['user_ids'],
+            batch_size=options['batch_size']
+        )
+        self.stdout.write(self.style.SUCCESS(f'{total} resumos mensais recalculados.'))
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from transactions import search
+
+
+class Command(BaseCommand):
+    help = 'Recria o índice de busca textual das transações'
+
+    def handle(self, *args, **options):
+        if not search.is_available():
+            self.stdout.write(self.style.WARNING('Busca textual indisponível neste banco de dados.'))
+            return
+
+        total = search.rebuild_index()
+        self.stdout.write(self.style.SUCCESS(f'{total} transações indexadas.'))
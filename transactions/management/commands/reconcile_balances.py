@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand
+
+from transactions.service import reconcile_account_balances, reconcile_balances
+
+
+class Command(BaseCommand):
+    help = 'Recalcula o saldo de todos os usuários e contas e informa divergências'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, action='append', dest='user_ids',
+                            help='ID do usuário (pode ser repetido). Padrão: todos')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Apenas informa as divergências, sem corrigir')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        drift = reconcile_balances(
+            user_ids=options['user_ids'],
+            dry_run=options['dry_run'],
+            batch_size=options['batch_size']
+        )
+
+        account_drift = reconcile_account_balances(
+            user_ids=options['user_ids'],
+            dry_run=options['dry_run'],
+            batch_size=options['batch_size']
+        )
+
+        for user_id, balance, expected_balance in drift:
+            self.stdout.write(
+                f'Usuário {user_id}: saldo {balance:.2f}, esperado {expected_balance:.2f} '
+                f'(diferença {expected_balance - balance:.2f})'
+            )
+        for account_id, balance, expected_balance in account_drift:
+            self.stdout.write(
+                f'Conta {account_id}: saldo {balance:.2f}, esperado {expected_balance:.2f} '
+                f'(diferença {expected_balance - balance:.2f})'
+            )
+        drift += account_drift
+
+        if not drift:
+            self.stdout.write(self.style.SUCCESS('Nenhuma divergência encontrada.'))
+        elif options['dry_run']:
+            self.stdout.write(self.style.WARNING(f'{len(drift)} saldos divergentes.'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'{len(drift)} saldos corrigidos.'))
@@ -0,0 +1,56 @@
+# Generated by Django 6.0.2 on 2026-10-18 07:29
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Case, F, Sum, When
+
+
+def populate_daily_balances(apps, schema_editor):
+    Transaction = apps.get_model('transactions', 'Transaction')
+    DailyBalance = apps.get_model('transactions', 'DailyBalance')
+
+    rows = Transaction.objects.filter(is_completed=True).values('user_id', 'date').annotate(
+        net=Sum(Case(When(type='IN', then=F('amount')), default=-F('amount')))
+    ).order_by('user_id', 'date')
+
+    balances = []
+    current_user, running_balance = None, 0
+    for row in rows.iterator():
+        if row['user_id'] != current_user:
+            current_user, running_balance = row['user_id'], 0
+        running_balance += row['net']
+        balances.append(DailyBalance(
+            user_id=row['user_id'], date=row['date'],
+            net=row['net'], running_balance=running_balance
+        ))
+
+    DailyBalance.objects.bulk_create(balances, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyBalance',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='Data')),
+                ('net', models.DecimalField(decimal_places=2, default=0, max_digits=12, verbose_name='Movimento do dia')),
+                ('running_balance', models.DecimalField(decimal_places=2, default=0, max_digits=12, verbose_name='Saldo acumulado')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_balances', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Saldo diário',
+                'verbose_name_plural': 'Saldos diários',
+                'ordering': ['date'],
+                'constraints': [models.UniqueConstraint(fields=('user', 'date'), name='unique_daily_balance_per_user')],
+            },
+        ),
+        migrations.RunPython(populate_daily_balances, migrations.RunPython.noop),
+    ]
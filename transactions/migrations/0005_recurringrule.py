@@ -0,0 +1,60 @@
+# Generated by Django 6.0.2 on 2026-10-18 10:20
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0004_transaction_search'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='transaction',
+            name='occurrence',
+            field=models.PositiveIntegerField(blank=True, null=True, verbose_name='Ocorrência'),
+        ),
+        migrations.CreateModel(
+            name='RecurringRule',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('title', models.CharField(max_length=110, verbose_name='Título')),
+                ('description', models.TextField(blank=True, max_length=255, verbose_name='Descrição')),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=10, verbose_name='Valor')),
+                ('type', models.CharField(choices=[('IN', 'Entrada'), ('OUT', 'Saída')], default='OUT', max_length=3, verbose_name='Tipo')),
+                ('category', models.CharField(choices=[('ALM', 'Alimentação'), ('TRP', 'Transporte'), ('MOR', 'Moradia'), ('SAU', 'Saúde'), ('EDU', 'Educação'), ('LAZ', 'Lazer'), ('COM', 'Compras'), ('SAL', 'Salário'), ('INV', 'Investimento'), ('OUT', 'Outros')], default='OUT', max_length=3, verbose_name='Categoria')),
+                ('frequency', models.CharField(choices=[('DAY', 'Diária'), ('WEEK', 'Semanal'), ('MONTH', 'Mensal'), ('YEAR', 'Anual')], default='MONTH', max_length=5, verbose_name='Frequência')),
+                ('start_date', models.DateField(verbose_name='Início')),
+                ('end_date', models.DateField(blank=True, null=True, verbose_name='Fim')),
+                ('count', models.PositiveIntegerField(blank=True, null=True, verbose_name='Quantidade de ocorrências')),
+                ('is_installment', models.BooleanField(default=False, verbose_name='Parcelado')),
+                ('is_active', models.BooleanField(default=True, verbose_name='Ativa')),
+                ('generated', models.PositiveIntegerField(default=0, verbose_name='Ocorrências geradas')),
+                ('next_date', models.DateField(blank=True, null=True, verbose_name='Próxima ocorrência')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Criado em')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='recurring_rules', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Recorrência',
+                'verbose_name_plural': 'Recorrências',
+                'ordering': ['next_date'],
+            },
+        ),
+        migrations.AddField(
+            model_name='transaction',
+            name='recurring_rule',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='transactions', to='transactions.recurringrule', verbose_name='Recorrência'),
+        ),
+        migrations.AddConstraint(
+            model_name='transaction',
+            constraint=models.UniqueConstraint(fields=('recurring_rule', 'occurrence'), name='unique_rule_occurrence'),
+        ),
+        migrations.AddIndex(
+            model_name='recurringrule',
+            index=models.Index(fields=['is_active', 'next_date'], name='rule_active_next_date_idx'),
+        ),
+    ]
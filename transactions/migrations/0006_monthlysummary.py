@@ -0,0 +1,52 @@
+# Generated by Django 6.0.2 on 2026-10-18 11:05
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncMonth
+
+
+def populate_monthly_summaries(apps, schema_editor):
+    Transaction = apps.get_model('transactions', 'Transaction')
+    MonthlySummary = apps.get_model('transactions', 'MonthlySummary')
+
+    rows = Transaction.objects.filter(is_completed=True).annotate(
+        month=TruncMonth('date')
+    ).values('user_id', 'month', 'category', 'type').annotate(
+        total=Sum('amount'), count=Count('id')
+    ).order_by('user_id', 'month')
+
+    MonthlySummary.objects.bulk_create(
+        (MonthlySummary(**row) for row in rows.iterator()), batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0005_recurringrule'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MonthlySummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(verbose_name='Mês')),
+                ('category', models.CharField(choices=[('ALM', 'Alimentação'), ('TRP', 'Transporte'), ('MOR', 'Moradia'), ('SAU', 'Saúde'), ('EDU', 'Educação'), ('LAZ', 'Lazer'), ('COM', 'Compras'), ('SAL', 'Salário'), ('INV', 'Investimento'), ('OUT', 'Outros')], max_length=3, verbose_name='Categoria')),
+                ('type', models.CharField(choices=[('IN', 'Entrada'), ('OUT', 'Saída')], max_length=3, verbose_name='Tipo')),
+                ('total', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Total')),
+                ('count', models.IntegerField(default=0, verbose_name='Quantidade')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='monthly_summaries', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Resumo mensal',
+                'verbose_name_plural': 'Resumos mensais',
+                'ordering': ['month', 'type', 'category'],
+                'constraints': [models.UniqueConstraint(fields=('user', 'month', 'category', 'type'), name='unique_monthly_summary')],
+            },
+        ),
+        migrations.RunPython(populate_monthly_summaries, migrations.RunPython.noop),
+    ]
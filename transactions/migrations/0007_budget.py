@@ -0,0 +1,34 @@
+# Generated by Django 6.0.2 on 2026-10-18 11:40
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0006_monthlysummary'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Budget',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('category', models.CharField(choices=[('ALM', 'Alimentação'), ('TRP', 'Transporte'), ('MOR', 'Moradia'), ('SAU', 'Saúde'), ('EDU', 'Educação'), ('LAZ', 'Lazer'), ('COM', 'Compras'), ('SAL', 'Salário'), ('INV', 'Investimento'), ('OUT', 'Outros')], max_length=3, verbose_name='Categoria')),
+                ('month', models.DateField(verbose_name='Mês')),
+                ('limit', models.DecimalField(decimal_places=2, max_digits=10, verbose_name='Limite')),
+                ('spent', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Gasto')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Criado em')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='budgets', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Orçamento',
+                'verbose_name_plural': 'Orçamentos',
+                'ordering': ['month', 'category'],
+                'constraints': [models.UniqueConstraint(fields=('user', 'month', 'category'), name='unique_budget_per_month')],
+            },
+        ),
+    ]
@@ -0,0 +1,92 @@
+# Generated by Django 6.0.2 on 2026-10-18 12:20
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def create_default_accounts(apps, schema_editor):
+    # Uma conta principal em BRL por usuário, com o saldo atual, e todas as
+    # transações e recorrências existentes apontando para ela
+    User = apps.get_model(settings.AUTH_USER_MODEL)
+    Account = apps.get_model('transactions', 'Account')
+    Transaction = apps.get_model('transactions', 'Transaction')
+    RecurringRule = apps.get_model('transactions', 'RecurringRule')
+
+    Account.objects.bulk_create(
+        (
+            Account(user_id=user_id, name='Conta principal', currency='BRL', balance=balance, is_default=True)
+            for user_id, balance in User.objects.values_list('pk', 'balance').iterator()
+        ),
+        batch_size=1000
+    )
+
+    default_account = Account.objects.filter(
+        user_id=OuterRef('user_id'), is_default=True
+    ).values('pk')[:1]
+    Transaction.objects.filter(account__isnull=True).update(account_id=Subquery(default_account))
+    RecurringRule.objects.filter(account__isnull=True).update(account_id=Subquery(default_account))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0007_budget'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Account',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=60, verbose_name='Nome')),
+                ('kind', models.CharField(choices=[('CHK', 'Conta corrente'), ('SAV', 'Poupança'), ('CRD', 'Cartão de crédito'), ('INV', 'Investimentos'), ('CSH', 'Dinheiro')], default='CHK', max_length=3, verbose_name='Tipo')),
+                ('currency', models.CharField(choices=[('BRL', 'Real'), ('USD', 'Dólar americano'), ('EUR', 'Euro'), ('GBP', 'Libra esterlina')], default='BRL', max_length=3, verbose_name='Moeda')),
+                ('balance', models.DecimalField(decimal_places=2, default=0, max_digits=12, verbose_name='Saldo')),
+                ('is_default', models.BooleanField(default=False, verbose_name='Conta padrão')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Criado em')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='accounts', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Conta',
+                'verbose_name_plural': 'Contas',
+                'ordering': ['-is_default', 'name'],
+            },
+        ),
+        migrations.AddField(
+            model_name='recurringrule',
+            name='account',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.RESTRICT, related_name='recurring_rules', to='transactions.account', verbose_name='Conta'),
+        ),
+        migrations.AddField(
+            model_name='transaction',
+            name='account',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.RESTRICT, related_name='transactions', to='transactions.account', verbose_name='Conta'),
+        ),
+        migrations.CreateModel(
+            name='ExchangeRate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('currency', models.CharField(choices=[('BRL', 'Real'), ('USD', 'Dólar americano'), ('EUR', 'Euro'), ('GBP', 'Libra esterlina')], max_length=3, verbose_name='Moeda')),
+                ('date', models.DateField(verbose_name='Data')),
+                ('rate', models.DecimalField(decimal_places=8, max_digits=18, verbose_name='Cotação em BRL')),
+            ],
+            options={
+                'verbose_name': 'Cotação',
+                'verbose_name_plural': 'Cotações',
+                'ordering': ['-date', 'currency'],
+                'constraints': [models.UniqueConstraint(fields=('currency', 'date'), name='unique_exchange_rate')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='account',
+            constraint=models.UniqueConstraint(fields=('user', 'name'), name='unique_account_name'),
+        ),
+        migrations.AddConstraint(
+            model_name='account',
+            constraint=models.UniqueConstraint(condition=models.Q(('is_default', True)), fields=('user',), name='unique_default_account'),
+        ),
+        migrations.RunPython(create_default_accounts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 6.0.2 on 2026-10-18 13:05
+
+import hashlib
+import re
+import unicodedata
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def make_fingerprint(day, signed_amount, title):
+    # Cópia de transactions.models.make_fingerprint como era nesta migração
+    title = unicodedata.normalize('NFKD', (title or '').lower()).encode('ascii', 'ignore').decode()
+    title = ' '.join(re.findall(r'[a-z0-9]+', title))
+    key = f'{day.isoformat()}|{signed_amount:.2f}|{title}'
+    return hashlib.sha1(key.encode()).hexdigest()
+
+
+def fill_fingerprints(apps, schema_editor):
+    Transaction = apps.get_model('transactions', 'Transaction')
+
+    batch = []
+    rows = Transaction.objects.only('pk', 'date', 'amount', 'type', 'title')
+    for t in rows.iterator(chunk_size=2000):
+        t.fingerprint = make_fingerprint(t.date, t.amount if t.type == 'IN' else -t.amount, t.title)
+        batch.append(t)
+        if len(batch) >= 2000:
+            Transaction.objects.bulk_update(batch, ['fingerprint'])
+            batch = []
+    Transaction.objects.bulk_update(batch, ['fingerprint'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0008_account'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='transaction',
+            name='fingerprint',
+            field=models.CharField(blank=True, editable=False, max_length=40, verbose_name='Impressão digital'),
+        ),
+        migrations.RunPython(fill_fingerprints, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['user', 'fingerprint'], name='txn_user_fingerprint_idx'),
+        ),
+    ]
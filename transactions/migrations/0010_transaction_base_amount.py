@@ -0,0 +1,103 @@
+# Generated by Django 6.0.2 on 2026-10-18 13:40
+
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Case, Count, DecimalField, F, OuterRef, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce, Round, TruncMonth
+
+
+def fill_base_amounts(apps, schema_editor):
+    # Cópia de service.base_amount_expression e dos recálculos como eram
+    # nesta migração. Até aqui os agregados somavam o valor na moeda da conta:
+    # só os usuários com transações em outra moeda precisam ser refeitos
+    Transaction = apps.get_model('transactions', 'Transaction')
+    ExchangeRate = apps.get_model('transactions', 'ExchangeRate')
+
+    Transaction.objects.update(base_amount=F('amount'))
+
+    foreign = Transaction.objects.exclude(account__currency='BRL').exclude(account__isnull=True)
+    user_ids = sorted(set(foreign.order_by().values_list('user_id', flat=True).distinct()))
+    for currency in set(foreign.order_by().values_list('account__currency', flat=True).distinct()):
+        rates = ExchangeRate.objects.filter(currency=currency).values('rate')
+        rate = Coalesce(
+            Subquery(rates.filter(date__lte=OuterRef('date')).order_by('-date')[:1]),
+            Subquery(rates.filter(date__gt=OuterRef('date')).order_by('date')[:1]),
+            Value(Decimal('0')),
+            output_field=DecimalField(max_digits=18, decimal_places=8)
+        )
+        Transaction.objects.filter(account__currency=currency).update(
+            base_amount=Round(F('amount') * rate, 2, output_field=DecimalField(max_digits=12, decimal_places=2))
+        )
+
+    if user_ids:
+        rebuild_aggregates(apps, user_ids)
+
+
+def rebuild_aggregates(apps, user_ids):
+    User = apps.get_model(settings.AUTH_USER_MODEL)
+    Transaction = apps.get_model('transactions', 'Transaction')
+    DailyBalance = apps.get_model('transactions', 'DailyBalance')
+    MonthlySummary = apps.get_model('transactions', 'MonthlySummary')
+    Budget = apps.get_model('transactions', 'Budget')
+
+    completed = Transaction.objects.filter(user_id__in=user_ids, is_completed=True)
+    signed = Case(
+        When(type='IN', then=F('base_amount')), default=-F('base_amount'),
+        output_field=DecimalField(max_digits=12, decimal_places=2)
+    )
+
+    balances = dict(completed.values('user_id').annotate(total=Sum(signed)).order_by().values_list(
+        'user_id', 'total'
+    ))
+    for user_id in user_ids:
+        User.objects.filter(pk=user_id).update(balance=balances.get(user_id) or Decimal('0'))
+
+    DailyBalance.objects.filter(user_id__in=user_ids).delete()
+    rows = completed.values('user_id', 'date').annotate(net=Sum(signed)).order_by('user_id', 'date')
+    ledger = []
+    current_user, running_balance = None, 0
+    for row in rows.iterator():
+        if row['user_id'] != current_user:
+            current_user, running_balance = row['user_id'], 0
+        running_balance += row['net']
+        ledger.append(DailyBalance(
+            user_id=row['user_id'], date=row['date'],
+            net=row['net'], running_balance=running_balance
+        ))
+    DailyBalance.objects.bulk_create(ledger, batch_size=1000)
+
+    MonthlySummary.objects.filter(user_id__in=user_ids).delete()
+    rows = completed.annotate(
+        month=TruncMonth('date')
+    ).values('user_id', 'month', 'category', 'type').annotate(
+        total=Sum('base_amount'), count=Count('id')
+    ).order_by('user_id', 'month')
+    MonthlySummary.objects.bulk_create(
+        (MonthlySummary(**row) for row in rows.iterator()), batch_size=1000
+    )
+
+    spent = MonthlySummary.objects.filter(
+        user_id=OuterRef('user_id'), month=OuterRef('month'), category=OuterRef('category'), type='OUT'
+    ).values('total')[:1]
+    Budget.objects.filter(user_id__in=user_ids).update(spent=Coalesce(
+        Subquery(spent), Value(Decimal('0')), output_field=DecimalField()
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0009_transaction_fingerprint'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='transaction',
+            name='base_amount',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=12, verbose_name='Valor em BRL'),
+        ),
+        migrations.RunPython(fill_base_amounts, migrations.RunPython.noop),
+    ]
@@ -1,4 +1,10 @@
-from django.db import models
+import calendar
+import hashlib
+import re
+import unicodedata
+from datetime import date, timedelta
+
+from django.db import models, transaction as db_transaction
 from django.contrib.auth import get_user_model
 from django.utils import timezone
 
@@ -6,6 +12,80 @@ from django.utils import timezone
 User = get_user_model()
 
 
+def normalize_title(title):
+    # Minúsculas, sem acento e sem pontuação: "Padaria  São João!" -> "padaria sao joao"
+    title = unicodedata.normalize('NFKD', (title or '').lower()).encode('ascii', 'ignore').decode()
+    return ' '.join(re.findall(r'[a-z0-9]+', title))
+
+
+def make_fingerprint(day, signed_amount, title):
+    key = f'{day.isoformat()}|{signed_amount:.2f}|{normalize_title(title)}'
+    return hashlib.sha1(key.encode()).hexdigest()
+
+
+class Account(models.Model):
+    class Kind(models.TextChoices):
+        CHECKING = 'CHK', 'Conta corrente'
+        SAVINGS = 'SAV', 'Poupança'
+        CREDIT_CARD = 'CRD', 'Cartão de crédito'
+        INVESTMENT = 'INV', 'Investimentos'
+        CASH = 'CSH', 'Dinheiro'
+
+    class Currency(models.TextChoices):
+        BRL = 'BRL', 'Real'
+        USD = 'USD', 'Dólar americano'
+        EUR = 'EUR', 'Euro'
+        GBP = 'GBP', 'Libra esterlina'
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='accounts')
+    name = models.CharField('Nome', max_length=60)
+    kind = models.CharField('Tipo', max_length=3, choices=Kind.choices, default=Kind.CHECKING)
+    currency = models.CharField('Moeda', max_length=3, choices=Currency.choices, default=Currency.BRL)
+    balance = models.DecimalField('Saldo', max_digits=12, decimal_places=2, default=0)
+    is_default = models.BooleanField('Conta padrão', default=False)
+    created_at = models.DateTimeField('Criado em', auto_now_add=True)
+
+    class Meta:
+        ordering = ['-is_default', 'name']
+        verbose_name = 'Conta'
+        verbose_name_plural = 'Contas'
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'name'], name='unique_account_name'),
+            models.UniqueConstraint(
+                fields=['user'], condition=models.Q(is_default=True), name='unique_default_account'
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.name} ({self.currency})"
+
+    @classmethod
+    def default_for(cls, user_id):
+        # Conta onde caem as transações sem conta informada
+        account, _ = cls.objects.get_or_create(
+            user_id=user_id, is_default=True,
+            defaults={'name': 'Conta principal', 'currency': cls.Currency.BRL}
+        )
+        return account
+
+
+class ExchangeRate(models.Model):
+    currency = models.CharField('Moeda', max_length=3, choices=Account.Currency.choices)
+    date = models.DateField('Data')
+    rate = models.DecimalField('Cotação em BRL', max_digits=18, decimal_places=8)
+
+    class Meta:
+        ordering = ['-date', 'currency']
+        verbose_name = 'Cotação'
+        verbose_name_plural = 'Cotações'
+        constraints = [
+            models.UniqueConstraint(fields=['currency', 'date'], name='unique_exchange_rate'),
+        ]
+
+    def __str__(self):
+        return f"{self.currency} {self.date} R$ {self.rate}"
+
+
 class Transaction(models.Model):
     class Category(models.TextChoices):
         ALIMENTACAO = 'ALM', 'Alimentação'
@@ -24,24 +104,114 @@ class Transaction(models.Model):
         EXPENSE = 'OUT', 'Saída'
 
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='transactions')
+    account = models.ForeignKey(
+        Account, on_delete=models.RESTRICT, null=True, blank=True,
+        related_name='transactions', verbose_name='Conta'
+    )
     title = models.CharField('Título', max_length=120)
     description = models.TextField('Descrição', max_length=255, blank=True)
     amount = models.DecimalField('Valor', max_digits=10, decimal_places=2)
+    # Valor em BRL pela cotação da data (fx.fill_base_amounts): saldo do
+    # usuário, saldos diários, resumos e orçamentos somam este campo
+    base_amount = models.DecimalField('Valor em BRL', max_digits=12, decimal_places=2, default=0, editable=False)
     type = models.CharField('Tipo', max_length=3, choices=Type.choices, default=Type.EXPENSE)
     category = models.CharField('Categoria', max_length=3, choices=Category.choices, default=Category.OUTROS)
     is_completed = models.BooleanField('Concluída', default=False)
     date = models.DateField('Data')
     created_at = models.DateTimeField('Criado em', auto_now_add=True)
     updated_at = models.DateTimeField('Atualizado em', auto_now=True)
+    recurring_rule = models.ForeignKey(
+        'RecurringRule', on_delete=models.SET_NULL, null=True, blank=True,
+        related_name='transactions', verbose_name='Recorrência'
+    )
+    occurrence = models.PositiveIntegerField('Ocorrência', null=True, blank=True)
+    fingerprint = models.CharField('Impressão digital', max_length=40, editable=False, blank=True)
+
+    BALANCE_FIELDS = ('amount', 'base_amount', 'type', 'is_completed', 'date', 'category', 'account_id')
+    CATEGORY_FIELDS = ('title', 'description', 'category')
 
     class Meta:
         ordering = ['-date', '-created_at']
         verbose_name = 'Transação'
         verbose_name_plural = 'Transações'
+        indexes = [
+            models.Index(fields=['user', 'is_completed', 'date'], name='txn_user_completed_date_idx'),
+            models.Index(fields=['user', 'type', 'date'], name='txn_user_type_date_idx'),
+            models.Index(fields=['user', '-date', '-created_at'], name='txn_user_date_created_idx'),
+            models.Index(fields=['user', 'fingerprint'], name='txn_user_fingerprint_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['recurring_rule', 'occurrence'], name='unique_rule_occurrence'),
+        ]
 
     def __str__(self):
         return f"{self.title} - {self.get_type_display()} R$ {self.amount}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if all(field in field_names for field in cls.BALANCE_FIELDS):
+            instance.remember_balance_state()
+        if all(field in field_names for field in cls.CATEGORY_FIELDS):
+            instance.remember_category_state()
+        return instance
+
+    def save(self, *args, **kwargs):
+        # Saldo e saldos diários são ajustados pelos signals na mesma transação.
+        # Os deltas partem do que está gravado agora, não do que a instância
+        # leu antes: duas conclusões da mesma transação contam uma vez só
+        with db_transaction.atomic():
+            if self.account_id is None:
+                self.account = Account.default_for(self.user_id)
+            if not self._state.adding and self.previous_balance_state is not None:
+                current = self._lock_current()
+                self._balance_state = current and current.previous_balance_state
+                self._category_state = current and current.previous_category_state
+            self.refresh_fingerprint()
+            super().save(*args, **kwargs)
+        self.remember_balance_state()
+        self.remember_category_state()
+
+    def delete(self, *args, **kwargs):
+        with db_transaction.atomic():
+            current = self._lock_current() if self.pk is not None else self
+            if current is None:
+                # Já excluída por outra requisição: os signals não descontam de novo
+                return 0, {}
+            for field in (*self.BALANCE_FIELDS, *self.CATEGORY_FIELDS):
+                setattr(self, field, getattr(current, field))
+            return super().delete(*args, **kwargs)
+
+    def _lock_current(self):
+        # Linha travada até o fim da transação: quem escreve nela em paralelo espera
+        return type(self)._base_manager.select_for_update().filter(pk=self.pk).first()
+
+    def refresh_fingerprint(self):
+        # Data, valor com sinal e título normalizado; bulk_create não passa
+        # pelo save, então quem monta lotes chama isto antes. Valor e data
+        # podem chegar como texto (objects.create(amount='10.00')): convertidos
+        # aqui, os signals também recebem Decimal e date
+        self.amount = self._meta.get_field('amount').to_python(self.amount)
+        self.date = self._meta.get_field('date').to_python(self.date)
+        self.fingerprint = make_fingerprint(self.date, self.signed_amount, self.title)
+
+    def remember_balance_state(self):
+        self._balance_state = (
+            self.date, self.signed_amount, self.is_completed, self.category, self.type, self.account_id,
+            self.signed_base_amount
+        )
+
+    @property
+    def previous_balance_state(self):
+        return getattr(self, '_balance_state', None)
+
+    def remember_category_state(self):
+        self._category_state = (self.title, self.description, self.category)
+
+    @property
+    def previous_category_state(self):
+        return getattr(self, '_category_state', None)
+
     @property
     def status(self):
         if self.is_completed:
@@ -54,3 +224,152 @@ class Transaction(models.Model):
     @property
     def signed_amount(self):
         return self.amount if self.type == self.Type.INCOME else -self.amount
+
+    @property
+    def signed_base_amount(self):
+        return self.base_amount if self.type == self.Type.INCOME else -self.base_amount
+
+
+class RecurringRule(models.Model):
+    class Frequency(models.TextChoices):
+        DAILY = 'DAY', 'Diária'
+        WEEKLY = 'WEEK', 'Semanal'
+        MONTHLY = 'MONTH', 'Mensal'
+        YEARLY = 'YEAR', 'Anual'
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='recurring_rules')
+    account = models.ForeignKey(
+        Account, on_delete=models.RESTRICT, null=True, blank=True,
+        related_name='recurring_rules', verbose_name='Conta'
+    )
+    title = models.CharField('Título', max_length=110)
+    description = models.TextField('Descrição', max_length=255, blank=True)
+    amount = models.DecimalField('Valor', max_digits=10, decimal_places=2)
+    type = models.CharField('Tipo', max_length=3, choices=Transaction.Type.choices, default=Transaction.Type.EXPENSE)
+    category = models.CharField(
+        'Categoria', max_length=3, choices=Transaction.Category.choices, default=Transaction.Category.OUTROS
+    )
+    frequency = models.CharField('Frequência', max_length=5, choices=Frequency.choices, default=Frequency.MONTHLY)
+    start_date = models.DateField('Início')
+    end_date = models.DateField('Fim', null=True, blank=True)
+    count = models.PositiveIntegerField('Quantidade de ocorrências', null=True, blank=True)
+    is_installment = models.BooleanField('Parcelado', default=False)
+    is_active = models.BooleanField('Ativa', default=True)
+    generated = models.PositiveIntegerField('Ocorrências geradas', default=0)
+    next_date = models.DateField('Próxima ocorrência', null=True, blank=True)
+    created_at = models.DateTimeField('Criado em', auto_now_add=True)
+
+    class Meta:
+        ordering = ['next_date']
+        verbose_name = 'Recorrência'
+        verbose_name_plural = 'Recorrências'
+        indexes = [
+            models.Index(fields=['is_active', 'next_date'], name='rule_active_next_date_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.title} - {self.get_frequency_display()} R$ {self.amount}"
+
+    def save(self, *args, **kwargs):
+        if self.next_date is None and not self.generated:
+            self.next_date = self.start_date
+        super().save(*args, **kwargs)
+
+    def occurrence_date(self, number):
+        # Sempre a partir do início, para o dia 31 não "escorregar" depois de fevereiro
+        if self.frequency == self.Frequency.DAILY:
+            return self.start_date + timedelta(days=number - 1)
+        if self.frequency == self.Frequency.WEEKLY:
+            return self.start_date + timedelta(weeks=number - 1)
+
+        months = number - 1 if self.frequency == self.Frequency.MONTHLY else 12 * (number - 1)
+        month_index = self.start_date.month - 1 + months
+        year, month = self.start_date.year + month_index // 12, month_index % 12 + 1
+        day = min(self.start_date.day, calendar.monthrange(year, month)[1])
+        return date(year, month, day)
+
+    def is_finished(self, number):
+        if self.count is not None and number > self.count:
+            return True
+        return self.end_date is not None and self.occurrence_date(number) > self.end_date
+
+    def title_for(self, number):
+        if self.is_installment and self.count:
+            return f'{self.title} ({number}/{self.count})'
+        return self.title
+
+
+class MonthlySummary(models.Model):
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='monthly_summaries')
+    month = models.DateField('Mês')
+    category = models.CharField('Categoria', max_length=3, choices=Transaction.Category.choices)
+    type = models.CharField('Tipo', max_length=3, choices=Transaction.Type.choices)
+    total = models.DecimalField('Total', max_digits=14, decimal_places=2, default=0)
+    count = models.IntegerField('Quantidade', default=0)
+
+    class Meta:
+        ordering = ['month', 'type', 'category']
+        verbose_name = 'Resumo mensal'
+        verbose_name_plural = 'Resumos mensais'
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'month', 'category', 'type'], name='unique_monthly_summary'),
+        ]
+
+    def __str__(self):
+        return f"{self.user} - {self.month:%m/%Y} {self.get_category_display()} R$ {self.total}"
+
+
+class Budget(models.Model):
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='budgets')
+    category = models.CharField('Categoria', max_length=3, choices=Transaction.Category.choices)
+    month = models.DateField('Mês')
+    limit = models.DecimalField('Limite', max_digits=10, decimal_places=2)
+    spent = models.DecimalField('Gasto', max_digits=14, decimal_places=2, default=0)
+    created_at = models.DateTimeField('Criado em', auto_now_add=True)
+
+    class Meta:
+        ordering = ['month', 'category']
+        verbose_name = 'Orçamento'
+        verbose_name_plural = 'Orçamentos'
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'month', 'category'], name='unique_budget_per_month'),
+        ]
+
+    def __str__(self):
+        return f"{self.user} - {self.month:%m/%Y} {self.get_category_display()} R$ {self.limit}"
+
+    @property
+    def remaining(self):
+        return self.limit - self.spent
+
+    @property
+    def percent(self):
+        if not self.limit:
+            return 100
+        return int(self.spent * 100 / self.limit)
+
+    @property
+    def is_over(self):
+        return self.spent > self.limit
+
+    @property
+    def is_near(self):
+        return not self.is_over and self.percent >= 80
+
+
+class DailyBalance(models.Model):
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='daily_balances')
+    date = models.DateField('Data')
+    net = models.DecimalField('Movimento do dia', max_digits=12, decimal_places=2, default=0)
+    running_balance = models.DecimalField('Saldo acumulado', max_digits=12, decimal_places=2, default=0)
+
+    class Meta:
+        ordering = ['date']
+        verbose_name = 'Saldo diário'
+        verbose_name_plural = 'Saldos diários'
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'date'], name='unique_daily_balance_per_user'),
+        ]
+
+    def __str__(self):
+        return f"{self.user} - {self.date} R$ {self.running_balance}"
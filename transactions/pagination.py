@@ -0,0 +1,114 @@
+import base64
+import json
+
+from django.db.models import Q
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+class CursorPage:
+    cursor_based = True
+
+    def __init__(self, object_list, next_cursor, previous_cursor):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+# Paginação por chave (keyset): sem OFFSET nem COUNT(*), a página N custa o mesmo que a 1
+class CursorPaginator:
+    def __init__(self, queryset, per_page, ordering=('-date', '-created_at', '-id')):
+        self.queryset = queryset
+        self.per_page = int(per_page)
+        self.ordering = ordering
+        self.fields = [
+            (name.lstrip('-'), name.startswith('-')) for name in ordering
+        ]
+
+    def page(self, cursor=None):
+        if not cursor:
+            rows = list(self._slice(self.queryset.order_by(*self.ordering)))
+            return self._build_page(rows, has_previous=False, has_next=False)
+
+        values, backwards = self.decode_cursor(cursor)
+        queryset = self.queryset.filter(self._after(values, backwards))
+
+        if backwards:
+            reversed_ordering = [
+                name[1:] if name.startswith('-') else f'-{name}' for name in self.ordering
+            ]
+            rows = list(self._slice(queryset.order_by(*reversed_ordering)))
+            has_more = len(rows) > self.per_page
+            rows = rows[:self.per_page][::-1]
+            return self._build_page(rows, has_previous=has_more, has_next=True)
+
+        rows = list(self._slice(queryset.order_by(*self.ordering)))
+        return self._build_page(rows, has_previous=True, has_next=False)
+
+    def encode_cursor(self, obj, backwards=False):
+        # Aceita instâncias ou dicionários de .values()
+        if isinstance(obj, dict):
+            values = [obj[name] for name, _ in self.fields]
+        else:
+            values = [getattr(obj, name) for name, _ in self.fields]
+        payload = {
+            'v': [value.isoformat() if hasattr(value, 'isoformat') else value for value in values],
+            'b': backwards,
+        }
+        raw = json.dumps(payload, separators=(',', ':')).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+    def decode_cursor(self, cursor):
+        try:
+            padding = '=' * (-len(cursor) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(cursor + padding))
+            raw_values = payload['v']
+            if len(raw_values) != len(self.fields):
+                raise ValueError
+            model = self.queryset.model
+            values = [
+                model._meta.get_field(name).to_python(value)
+                for (name, _), value in zip(self.fields, raw_values)
+            ]
+            return values, bool(payload.get('b'))
+        except Exception as exc:
+            raise InvalidCursor(cursor) from exc
+
+    def _slice(self, queryset):
+        return queryset[:self.per_page + 1]
+
+    def _after(self, values, backwards):
+        # (a, b, c) > (x, y, z) expandido em OR de prefixos iguais
+        condition = Q()
+        equal = {}
+        for (name, descending), value in zip(self.fields, values):
+            lookup = 'lt' if descending != backwards else 'gt'
+            condition |= Q(**equal, **{f'{name}__{lookup}': value})
+            equal[name] = value
+        return condition
+
+    def _build_page(self, rows, has_previous, has_next):
+        if len(rows) > self.per_page:
+            rows = rows[:self.per_page]
+            has_next = True
+
+        next_cursor = self.encode_cursor(rows[-1]) if rows and has_next else None
+        previous_cursor = self.encode_cursor(rows[0], backwards=True) if rows and has_previous else None
+        return CursorPage(rows, next_cursor, previous_cursor)
@@ -0,0 +1,107 @@
+from collections import defaultdict
+from dataclasses import dataclass
+
+from django.db import transaction as db_transaction
+from django.utils import timezone
+
+from . import fx
+from .models import Account, RecurringRule, Transaction
+from .service import apply_bulk_insert
+
+
+@dataclass
+class MaterializeResult:
+    rules: int = 0
+    created: int = 0
+    finished: int = 0
+
+
+def pending_occurrences(rule, until):
+    # Ocorrências ainda não geradas até a data limite, a partir do contador da regra
+    number = rule.generated + 1
+    while not rule.is_finished(number):
+        day = rule.occurrence_date(number)
+        if day > until:
+            break
+        yield number, day
+        number += 1
+
+
+def build_occurrence(rule, number, day):
+    occurrence = Transaction(
+        user_id=rule.user_id,
+        account_id=rule.account_id,
+        title=rule.title_for(number),
+        description=rule.description,
+        amount=rule.amount,
+        type=rule.type,
+        category=rule.category,
+        is_completed=False,
+        date=day,
+        recurring_rule=rule,
+        occurrence=number,
+    )
+    occurrence.refresh_fingerprint()
+    return occurrence
+
+
+def materialize_recurring(until=None, batch_size=1000):
+    # Uma passada em lotes de regras ordenadas por pk (keyset, sem OFFSET).
+    # Cada lote roda numa transação: as regras ficam travadas até o contador
+    # avançar, então rodar de novo (ou em paralelo) não duplica lançamentos
+    until = until or timezone.now().date()
+    result = MaterializeResult()
+    last_pk = 0
+
+    while True:
+        rule_ids = list(
+            RecurringRule.objects.filter(is_active=True, next_date__lte=until, pk__gt=last_pk)
+            .order_by('pk').values_list('pk', flat=True)[:batch_size]
+        )
+        if not rule_ids:
+            break
+        last_pk = rule_ids[-1]
+        _materialize_batch(rule_ids, until, result)
+
+    return result
+
+
+@db_transaction.atomic
+def _materialize_batch(rule_ids, until, result):
+    rules = RecurringRule.objects.select_for_update().filter(
+        pk__in=rule_ids, is_active=True, next_date__lte=until
+    )
+
+    occurrences = []
+    updated_rules = []
+    default_accounts = {}
+    for rule in rules:
+        if rule.account_id is None:
+            if rule.user_id not in default_accounts:
+                default_accounts[rule.user_id] = Account.default_for(rule.user_id)
+            rule.account = default_accounts[rule.user_id]
+
+        for number, day in pending_occurrences(rule, until):
+            occurrences.append(build_occurrence(rule, number, day))
+            rule.generated = number
+
+        rule.next_date = rule.occurrence_date(rule.generated + 1)
+        if rule.is_finished(rule.generated + 1):
+            rule.is_active = False
+            rule.next_date = None
+            result.finished += 1
+        updated_rules.append(rule)
+
+    created = Transaction.objects.bulk_create(fx.fill_base_amounts(occurrences), batch_size=1000)
+    RecurringRule.objects.bulk_update(
+        updated_rules, ['account', 'generated', 'next_date', 'is_active'], batch_size=1000
+    )
+
+    by_user = defaultdict(list)
+    for t in created:
+        by_user[t.user_id].append(t)
+    for user_id, transactions in by_user.items():
+        apply_bulk_insert(user_id, transactions)
+
+    result.rules += len(updated_rules)
+    result.created += len(created)
@@ -0,0 +1,117 @@
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import date
+from decimal import Decimal
+
+from django.utils import timezone
+
+from .models import Transaction
+from .service import user_cached
+
+
+MESES_ABREV = ['Jan', 'Fev', 'Mar', 'Abr', 'Mai', 'Jun', 'Jul', 'Ago', 'Set', 'Out', 'Nov', 'Dez']
+
+
+@dataclass(frozen=True)
+class MonthReport:
+    month: date
+    income: Decimal
+    expense: Decimal
+
+    @property
+    def savings(self):
+        return self.income - self.expense
+
+    @property
+    def label(self):
+        return MESES_ABREV[self.month.month - 1]
+
+
+@dataclass(frozen=True)
+class YearReport:
+    year: int
+    months: tuple
+    expenses_by_category: tuple
+
+    @property
+    def income(self):
+        return sum((month.income for month in self.months), Decimal('0'))
+
+    @property
+    def expense(self):
+        return sum((month.expense for month in self.months), Decimal('0'))
+
+    @property
+    def savings(self):
+        return self.income - self.expense
+
+    def top_expense_categories(self, limit=5):
+        return self.expenses_by_category[:limit]
+
+
+class ReportService:
+    # Lê apenas a tabela MonthlySummary: no máximo um registro por
+    # (mês, categoria, tipo), independente do número de transações
+
+    def __init__(self, user):
+        self.user = user
+        self.today = timezone.now().date()
+
+    def _summaries(self, start_year, end_year):
+        return self.user.monthly_summaries.filter(
+            month__gte=date(start_year, 1, 1),
+            month__lte=date(end_year, 12, 1),
+            count__gt=0
+        )
+
+    @user_cached('report-year')
+    def get_year(self, year):
+        income = defaultdict(Decimal)
+        expense = defaultdict(Decimal)
+        by_category = defaultdict(Decimal)
+
+        rows = self._summaries(year, year).values_list('month', 'category', 'type', 'total')
+        for month, category, type, total in rows:
+            if type == Transaction.Type.INCOME:
+                income[month.month] += total
+            else:
+                expense[month.month] += total
+                by_category[category] += total
+
+        labels = dict(Transaction.Category.choices)
+        return YearReport(
+            year=year,
+            months=tuple(
+                MonthReport(date(year, number, 1), income[number], expense[number])
+                for number in range(1, 13)
+            ),
+            expenses_by_category=tuple(sorted(
+                ((labels.get(category, category), total) for category, total in by_category.items()),
+                key=lambda item: item[1],
+                reverse=True
+            )),
+        )
+
+    @user_cached('report-trends')
+    def get_category_trends(self, start_year, end_year):
+        # Saídas por categoria mês a mês; meses sem movimento entram com zero
+        months = [
+            date(year, number, 1)
+            for year in range(start_year, end_year + 1)
+            for number in range(1, 13)
+        ]
+        index = {month: position for position, month in enumerate(months)}
+
+        series = {}
+        rows = self._summaries(start_year, end_year).filter(
+            type=Transaction.Type.EXPENSE
+        ).values_list('month', 'category', 'total')
+        for month, category, total in rows:
+            values = series.setdefault(category, [0.0] * len(months))
+            values[index[month]] += float(total)
+
+        labels = dict(Transaction.Category.choices)
+        return (
+            [f'{MESES_ABREV[month.month - 1]}/{month:%y}' for month in months],
+            {labels.get(category, category): values for category, values in series.items()},
+        )
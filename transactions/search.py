@@ -0,0 +1,98 @@
+import re
+
+from django.db import connection
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+from .models import Transaction
+
+
+# Tabela FTS5 criada na migração 0004; o tokenizer remove acentos no índice
+# e na consulta, então "alimentacao" encontra "Alimentação"
+SEARCH_TABLE = 'transactions_search'
+
+# Peso do título maior que o da descrição; a coluna do dono não pontua
+RANK_EXPRESSION = f'bm25({SEARCH_TABLE}, 10.0, 1.0, 0.0)'
+
+
+def is_available():
+    return connection.vendor == 'sqlite'
+
+
+def _owner(user_id):
+    return f'u{user_id}'
+
+
+def build_match_query(user_id, text):
+    terms = re.findall(r'\w+', text)
+    if not terms:
+        return None
+
+    prefixes = ' '.join(f'"{term}"*' for term in terms)
+    return f'owner:"{_owner(user_id)}" AND {{title description}}: ({prefixes})'
+
+
+def index_transactions(transactions):
+    if not is_available():
+        return
+
+    rows = [
+        (t.pk, t.title, t.description, _owner(t.user_id)) for t in transactions
+    ]
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f'INSERT OR REPLACE INTO {SEARCH_TABLE} (rowid, title, description, owner) '
+            'VALUES (%s, %s, %s, %s)',
+            rows
+        )
+
+
+def remove_transactions(pks):
+    if not is_available():
+        return
+
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f'DELETE FROM {SEARCH_TABLE} WHERE rowid = %s', [(pk,) for pk in pks]
+        )
+
+
+def rebuild_index():
+    if not is_available():
+        return 0
+
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {SEARCH_TABLE}')
+        cursor.execute(
+            f"INSERT INTO {SEARCH_TABLE} (rowid, title, description, owner) "
+            f"SELECT id, title, description, 'u' || user_id FROM {Transaction._meta.db_table}"
+        )
+        return cursor.rowcount
+
+
+def apply_search(queryset, user_id, text, ranked=False):
+    match = build_match_query(user_id, text) if is_available() else None
+    if match is None:
+        return queryset.filter(
+            Q(title__icontains=text) | Q(description__icontains=text)
+        )
+
+    queryset = queryset.filter(
+        id__in=RawSQL(f'SELECT rowid FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s', [match])
+    )
+
+    if ranked:
+        # O LIMIT -1 impede o SQLite de achatar a subconsulta: o MATCH roda uma
+        # vez, materializado com índice automático, em vez de uma vez por linha
+        rank = RawSQL(
+            f'SELECT ranked.rank FROM ('
+            f'SELECT rowid AS id, {RANK_EXPRESSION} AS rank FROM {SEARCH_TABLE} '
+            f'WHERE {SEARCH_TABLE} MATCH %s LIMIT -1'
+            f') ranked WHERE ranked.id = {Transaction._meta.db_table}.id',
+            [match]
+        )
+        queryset = queryset.annotate(search_rank=rank).order_by(
+            'search_rank', *Transaction._meta.ordering
+        )
+
+    return queryset
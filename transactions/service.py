@@ -1,84 +1,666 @@
 # transactions/services.py
-from django.db.models import Sum
+import asyncio
+import calendar
+import contextvars
+import hashlib
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import wraps
+from decimal import Decimal
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import IntegrityError, close_old_connections, transaction as db_transaction
+from django.db.models import Case, Count, DecimalField, F, OuterRef, Q, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce, Round, TruncMonth, TruncWeek
 from django.utils import timezone
-from datetime import timedelta
-from .models import Transaction
+from datetime import date, timedelta
+from . import categorizer, search
+from .models import Account, Budget, DailyBalance, ExchangeRate, MonthlySummary, Transaction
+
+
+User = get_user_model()
+
+
+def signed_amount(field='amount'):
+    # 'amount' na moeda da conta (saldo das contas) ou 'base_amount' em BRL
+    # (saldo do usuário, saldos diários)
+    return Case(
+        When(type=Transaction.Type.INCOME, then=F(field)),
+        default=-F(field),
+        output_field=DecimalField(max_digits=12, decimal_places=2)
+    )
+
+
+def base_amount_expression(currency):
+    # Mesma regra de fx.fill_base_amounts, em SQL: cotação mais recente até a
+    # data da transação, senão a primeira depois dela, senão 0
+    rates = ExchangeRate.objects.filter(currency=currency).values('rate')
+    rate = Coalesce(
+        Subquery(rates.filter(date__lte=OuterRef('date')).order_by('-date')[:1]),
+        Subquery(rates.filter(date__gt=OuterRef('date')).order_by('date')[:1]),
+        Value(Decimal('0')),
+        output_field=DecimalField(max_digits=18, decimal_places=8)
+    )
+    return Round(F('amount') * rate, 2, output_field=DecimalField(max_digits=12, decimal_places=2))
+
+
+def _next_period(day, granularity):
+    if granularity == 'day':
+        return day + timedelta(days=1)
+    if granularity == 'week':
+        return day + timedelta(weeks=1)
+    if day.month == 12:
+        return day.replace(year=day.year + 1, month=1)
+    return day.replace(month=day.month + 1)
+
+
+@dataclass(frozen=True)
+class DashboardSnapshot:
+    monthly_income: Decimal
+    monthly_expense: Decimal
+    monthly_savings: Decimal
+    expenses_by_category: tuple
+
+    @property
+    def category_labels(self):
+        return [category for category, _ in self.expenses_by_category]
+
+    @property
+    def category_totals(self):
+        return [float(total) for _, total in self.expenses_by_category]
+
+
+def _data_version_key(user_id):
+    return f'transactions:version:{user_id}'
+
+
+def _last_modified_key(user_id):
+    return f'transactions:modified:{user_id}'
+
+
+def get_data_version(user_id):
+    # Versão inicial baseada no relógio: se a chave for descartada do cache,
+    # a nova versão nunca coincide com uma antiga
+    key = _data_version_key(user_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def bump_data_version(user_id):
+    key = _data_version_key(user_id)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, time.time_ns(), timeout=None)
+    cache.set(_last_modified_key(user_id), timezone.now(), timeout=None)
+
+
+def get_last_modified(user_id):
+    # Sem registro no cache, assume "agora": nunca informa uma data antiga demais
+    key = _last_modified_key(user_id)
+    modified = cache.get(key)
+    if modified is None:
+        cache.add(key, timezone.now(), timeout=None)
+        modified = cache.get(key)
+    return modified
+
+
+def cached_for_user(user_id, name, builder, timeout=None):
+    # A chave inclui a versão dos dados do usuário: qualquer escrita invalida tudo
+    key = f'transactions:{name}:{user_id}:{get_data_version(user_id)}'
+    value = cache.get(key)
+    if value is None:
+        value = builder()
+        cache.set(key, value, timeout or settings.TRANSACTIONS_CACHE_TIMEOUT)
+    return value
+
+
+def user_cached(name, extra_key=None):
+    # extra_key: função com o que mais o resultado depende além dos dados do
+    # usuário (ex.: a versão das cotações)
+    def decorator(method):
+        @wraps(method)
+        def wrapper(self, *args, **kwargs):
+            parts = repr((
+                getattr(self, 'today', None), args, sorted(kwargs.items()), extra_key and extra_key()
+            ))
+            digest = hashlib.md5(parts.encode()).hexdigest()
+            return cached_for_user(
+                self.user.pk, f'{name}:{digest}', lambda: method(self, *args, **kwargs)
+            )
+        return wrapper
+    return decorator
+
+
+def lock_ledger(user_id):
+    # Trava a linha do usuário até o fim da transação: quem mexe nos saldos
+    # diários do mesmo usuário espera. Sem isso, em READ COMMITTED, o dia novo
+    # nasce com o saldo anterior lido antes do delta de outro worker
+    list(User.objects.select_for_update().filter(pk=user_id).values_list('pk', flat=True))
+
+
+@db_transaction.atomic
+def apply_daily_delta(user_id, day, delta):
+    # Ajusta o movimento do dia e propaga o delta para os saldos seguintes
+    if not delta:
+        return
+
+    lock_ledger(user_id)
+    ledger = DailyBalance.objects.filter(user_id=user_id)
+    if not ledger.filter(date=day).update(net=F('net') + delta):
+        previous_balance = ledger.filter(
+            date__lt=day
+        ).order_by('-date').values_list('running_balance', flat=True).first() or 0
+        try:
+            with db_transaction.atomic():
+                DailyBalance.objects.create(
+                    user_id=user_id, date=day, net=delta, running_balance=previous_balance
+                )
+        except IntegrityError:
+            # Outro worker criou o dia primeiro
+            ledger.filter(date=day).update(net=F('net') + delta)
+
+    ledger.filter(date__gte=day).update(running_balance=F('running_balance') + delta)
+
+
+def apply_balance_delta(user_id, delta):
+    # UPDATE ... SET balance = balance + delta, sem ler o usuário antes
+    if delta:
+        User.objects.filter(pk=user_id).update(balance=F('balance') + delta)
+
+
+def apply_account_delta(account_id, delta):
+    if delta and account_id is not None:
+        Account.objects.filter(pk=account_id).update(balance=F('balance') + delta)
+
+
+def apply_summary_delta(user_id, day, category, type, amount, count):
+    # Mesmo esquema do apply_daily_delta, no resumo (mês, categoria, tipo)
+    if not amount and not count:
+        return
+
+    month = day.replace(day=1)
+    summaries = MonthlySummary.objects.filter(
+        user_id=user_id, month=month, category=category, type=type
+    )
+    changes = {'total': F('total') + amount, 'count': F('count') + count}
+    if summaries.update(**changes):
+        return
+
+    try:
+        with db_transaction.atomic():
+            MonthlySummary.objects.create(
+                user_id=user_id, month=month, category=category, type=type,
+                total=amount, count=count
+            )
+    except IntegrityError:
+        summaries.update(**changes)
+
+
+def apply_budget_delta(user_id, day, category, amount):
+    # Sem orçamento para o mês e a categoria, o UPDATE não altera nada
+    if not amount:
+        return
+
+    Budget.objects.filter(
+        user_id=user_id, month=day.replace(day=1), category=category
+    ).update(spent=F('spent') + amount)
+
+
+def set_budget(user_id, month, category, limit):
+    # O gasto inicial sai do resumo do mês, sem percorrer as transações
+    month = month.replace(day=1)
+    with db_transaction.atomic():
+        budget, _ = Budget.objects.update_or_create(
+            user_id=user_id, month=month, category=category, defaults={'limit': limit}
+        )
+        refresh_budgets(user_ids=[user_id], since=month)
+    db_transaction.on_commit(lambda: bump_data_version(user_id))
+    budget.refresh_from_db(fields=['spent'])
+    return budget
+
+
+def refresh_budgets(user_ids=None, since=None):
+    # Gasto dos orçamentos copiado dos resumos mensais, para escritas em lote
+    budgets = Budget.objects.all()
+    if user_ids is not None:
+        budgets = budgets.filter(user_id__in=user_ids)
+    if since is not None:
+        budgets = budgets.filter(month__gte=since.replace(day=1))
+
+    spent = MonthlySummary.objects.filter(
+        user_id=OuterRef('user_id'),
+        month=OuterRef('month'),
+        category=OuterRef('category'),
+        type=Transaction.Type.EXPENSE
+    ).values('total')[:1]
+
+    return budgets.update(spent=Coalesce(
+        Subquery(spent), Value(Decimal('0')), output_field=DecimalField()
+    ))
+
+
+def _summary_rows(transactions, *group_by):
+    return transactions.filter(is_completed=True).annotate(
+        month=TruncMonth('date')
+    ).values(*group_by, 'month', 'category', 'type').annotate(
+        total=Sum('base_amount'), count=Count('id')
+    )
+
+
+def refresh_monthly_summaries(user_id, since):
+    # Recalcula os resumos a partir do mês de uma data, para escritas em lote
+    month = since.replace(day=1)
+    MonthlySummary.objects.filter(user_id=user_id, month__gte=month).delete()
+
+    rows = _summary_rows(
+        Transaction.objects.filter(user_id=user_id, date__gte=month)
+    ).order_by()
+    MonthlySummary.objects.bulk_create(
+        [MonthlySummary(user_id=user_id, **row) for row in rows], batch_size=1000
+    )
+    refresh_budgets(user_ids=[user_id], since=month)
+
+
+@db_transaction.atomic
+def rebuild_monthly_summaries(user_ids=None, batch_size=1000):
+    transactions = Transaction.objects.all()
+    summaries = MonthlySummary.objects.all()
+    if user_ids is not None:
+        transactions = transactions.filter(user_id__in=user_ids)
+        summaries = summaries.filter(user_id__in=user_ids)
+
+    summaries.delete()
+
+    rows = _summary_rows(transactions, 'user_id').order_by('user_id', 'month')
+
+    created = 0
+    batch = []
+    for row in rows.iterator(chunk_size=batch_size):
+        batch.append(MonthlySummary(**row))
+        if len(batch) >= batch_size:
+            MonthlySummary.objects.bulk_create(batch)
+            created += len(batch)
+            batch = []
+
+    MonthlySummary.objects.bulk_create(batch)
+    refresh_budgets(user_ids=user_ids)
+    return created + len(batch)
+
+
+@db_transaction.atomic
+def reconcile_balances(user_ids=None, dry_run=False, batch_size=1000):
+    transactions = Transaction.objects.filter(is_completed=True)
+    users = User.objects.all()
+    if user_ids is not None:
+        transactions = transactions.filter(user_id__in=user_ids)
+        users = users.filter(pk__in=user_ids)
+
+    expected = dict(
+        transactions.values('user_id').annotate(
+            total=Sum(signed_amount('base_amount'))
+        ).order_by().values_list('user_id', 'total')
+    )
+
+    drift = []
+    for user_id, balance in users.order_by().values_list('pk', 'balance').iterator(chunk_size=batch_size):
+        expected_balance = (expected.get(user_id) or Decimal('0')).quantize(Decimal('0.01'))
+        if balance != expected_balance:
+            drift.append((user_id, balance, expected_balance))
+
+    if drift and not dry_run:
+        User.objects.bulk_update(
+            [User(pk=user_id, balance=expected_balance) for user_id, _, expected_balance in drift],
+            ['balance'],
+            batch_size=batch_size
+        )
+
+    return drift
+
+
+@db_transaction.atomic
+def reconcile_account_balances(user_ids=None, dry_run=False, batch_size=1000):
+    transactions = Transaction.objects.filter(is_completed=True, account__isnull=False)
+    accounts = Account.objects.all()
+    if user_ids is not None:
+        transactions = transactions.filter(user_id__in=user_ids)
+        accounts = accounts.filter(user_id__in=user_ids)
+
+    expected = dict(
+        transactions.values('account_id').annotate(
+            total=Sum(signed_amount())
+        ).order_by().values_list('account_id', 'total')
+    )
+
+    drift = []
+    for account_id, balance in accounts.order_by().values_list('pk', 'balance').iterator(chunk_size=batch_size):
+        expected_balance = (expected.get(account_id) or Decimal('0')).quantize(Decimal('0.01'))
+        if balance != expected_balance:
+            drift.append((account_id, balance, expected_balance))
+
+    if drift and not dry_run:
+        Account.objects.bulk_update(
+            [Account(pk=account_id, balance=expected_balance) for account_id, _, expected_balance in drift],
+            ['balance'],
+            batch_size=batch_size
+        )
+
+    return drift
+
+
+@db_transaction.atomic
+def refresh_daily_balances(user_id, since):
+    # Recalcula os saldos diários a partir de uma data, para escritas em lote
+    lock_ledger(user_id)
+    ledger = DailyBalance.objects.filter(user_id=user_id)
+    opening_balance = ledger.filter(
+        date__lt=since
+    ).order_by('-date').values_list('running_balance', flat=True).first() or 0
+
+    rows = Transaction.objects.filter(
+        user_id=user_id, is_completed=True, date__gte=since
+    ).values('date').annotate(net=Sum(signed_amount('base_amount'))).order_by('date')
+
+    ledger.filter(date__gte=since).delete()
+
+    balances = []
+    running_balance = opening_balance
+    for row in rows:
+        running_balance += row['net']
+        balances.append(DailyBalance(
+            user_id=user_id, date=row['date'],
+            net=row['net'], running_balance=running_balance
+        ))
+    DailyBalance.objects.bulk_create(balances, batch_size=1000)
+
+
+def delete_rows(queryset):
+    # DELETE direto, sem carregar as linhas nem disparar os signals: quem chama
+    # ajusta saldos, resumos e índice de busca. Só é seguro enquanto nenhum
+    # modelo apontar para o de queryset, senão a cascata ficaria pela metade
+    related = [rel.related_model.__name__ for rel in queryset.model._meta.related_objects]
+    if related:
+        raise TypeError(f'{queryset.model.__name__} tem dependentes em cascata: {", ".join(related)}')
+    return queryset._raw_delete(queryset.db)
+
+
+def apply_bulk_insert(user_id, transactions, refresh_ledger=True):
+    # Mesmo efeito dos signals de post_save, uma vez por lote de bulk_create.
+    # Com refresh_ledger=False quem chama recalcula saldos diários e resumos no fim,
+    # a partir da data retornada
+    daily_deltas = defaultdict(Decimal)
+    account_deltas = defaultdict(Decimal)
+    for t in transactions:
+        if t.is_completed:
+            daily_deltas[t.date] += t.signed_base_amount
+            account_deltas[t.account_id] += t.signed_amount
+
+    earliest = min(daily_deltas, default=None)
+    if daily_deltas:
+        apply_balance_delta(user_id, sum(daily_deltas.values()))
+        for account_id, delta in account_deltas.items():
+            apply_account_delta(account_id, delta)
+        if refresh_ledger:
+            refresh_daily_balances(user_id, earliest)
+            refresh_monthly_summaries(user_id, earliest)
+
+    search.index_transactions(transactions)
+    learned = [(t.title, t.description, t.category) for t in transactions]
+    db_transaction.on_commit(lambda: categorizer.update_model(user_id, learn=learned))
+    db_transaction.on_commit(lambda: bump_data_version(user_id))
+    return earliest
+
+
+@db_transaction.atomic
+def rebuild_daily_balances(user_ids=None, batch_size=1000):
+    transactions = Transaction.objects.filter(is_completed=True)
+    ledger = DailyBalance.objects.all()
+    if user_ids is not None:
+        transactions = transactions.filter(user_id__in=user_ids)
+        ledger = ledger.filter(user_id__in=user_ids)
+
+    rows = transactions.values('user_id', 'date').annotate(
+        net=Sum(signed_amount('base_amount'))
+    ).order_by('user_id', 'date')
+
+    ledger.delete()
+
+    balances = []
+    created = 0
+    current_user, running_balance = None, 0
+    for row in rows.iterator(chunk_size=batch_size):
+        if row['user_id'] != current_user:
+            current_user, running_balance = row['user_id'], 0
+        running_balance += row['net']
+        balances.append(DailyBalance(
+            user_id=row['user_id'], date=row['date'],
+            net=row['net'], running_balance=running_balance
+        ))
+        if len(balances) >= batch_size:
+            DailyBalance.objects.bulk_create(balances)
+            created += len(balances)
+            balances = []
+
+    DailyBalance.objects.bulk_create(balances)
+    return created + len(balances)
+
+
+@db_transaction.atomic
+def rebase_transactions(currencies, account_ids=None):
+    # Cotação nova ou corrigida (ou conta que trocou de moeda): recalcula o
+    # valor em BRL das transações nessas moedas e, para os usuários afetados,
+    # tudo o que soma esse valor
+    user_ids = set()
+    for currency in set(currencies):
+        transactions = Transaction.objects.filter(account__currency=currency)
+        if account_ids is not None:
+            transactions = transactions.filter(account_id__in=account_ids)
+        user_ids.update(transactions.order_by().values_list('user_id', flat=True).distinct())
+        if currency == Account.Currency.BRL:
+            transactions.update(base_amount=F('amount'))
+        else:
+            transactions.update(base_amount=base_amount_expression(currency))
+
+    if user_ids:
+        user_ids = sorted(user_ids)
+        reconcile_balances(user_ids=user_ids)
+        rebuild_daily_balances(user_ids=user_ids)
+        rebuild_monthly_summaries(user_ids=user_ids)
+        for user_id in user_ids:
+            db_transaction.on_commit(lambda user_id=user_id: bump_data_version(user_id))
+    return len(user_ids)
 
 
 class DashboardService:
+    SERIES_GRANULARITIES = {
+        'day': (F, '%d/%m'),
+        'week': (TruncWeek, '%d/%m'),
+        'month': (TruncMonth, '%m/%Y'),
+    }
+
     def __init__(self, user):
         self.user = user
         self.today = timezone.now().date()
         self.first_day_month = self.today.replace(day=1)
+        self.first_day_next_month = _next_period(self.first_day_month, 'month')
 
-    def get_monthly_income(self):
-        return self.user.transactions.filter(
-            type=Transaction.Type.INCOME,
-            is_completed=True,
-            date__month=self.today.month,
-            date__year=self.today.year
-        ).aggregate(total=Sum('amount'))['total'] or 0
+    @user_cached('dashboard-snapshot')
+    def get_monthly_snapshot(self):
+        # Entradas, saídas e saídas por categoria numa única consulta
+        expense = Q(type=Transaction.Type.EXPENSE)
+        aggregates = {
+            'income': Sum('base_amount', filter=Q(type=Transaction.Type.INCOME)),
+            'expense': Sum('base_amount', filter=expense),
+        }
+        for category in Transaction.Category.values:
+            aggregates[f'category_{category}'] = Sum(
+                'base_amount', filter=expense & Q(category=category)
+            )
 
-    def get_monthly_expense(self):
-        return self.user.transactions.filter(
-            type=Transaction.Type.EXPENSE,
+        totals = self.user.transactions.filter(
             is_completed=True,
-            date__month=self.today.month,
-            date__year=self.today.year
-        ).aggregate(total=Sum('amount'))['total'] or 0
+            date__gte=self.first_day_month,
+            date__lt=self.first_day_next_month
+        ).aggregate(**aggregates)
 
-    def get_monthly_savings(self):
-        return self.get_monthly_income() - self.get_monthly_expense()
+        income = totals.pop('income') or Decimal('0')
+        expense_total = totals.pop('expense') or Decimal('0')
 
-    def get_last_30_days_labels(self):
-        return [(self.today - timedelta(days=i)).strftime('%d/%m')
-                for i in range(29, -1, -1)]
+        by_category = sorted(
+            ((key.removeprefix('category_'), total)
+             for key, total in totals.items() if total),
+            key=lambda item: item[1],
+            reverse=True
+        )
 
-    def get_last_30_days_balance(self):
-        start_date = self.today - timedelta(days=29)
+        return DashboardSnapshot(
+            monthly_income=income,
+            monthly_expense=expense_total,
+            monthly_savings=income - expense_total,
+            expenses_by_category=tuple(by_category),
+        )
 
-        transactions = self.user.transactions.filter(
-            is_completed=True,
-            date__gte=start_date,
-            date__lte=self.today
-        ).order_by('date')
+    @user_cached('dashboard-series')
+    def get_balance_series(self, days=30, granularity='day'):
+        if granularity not in self.SERIES_GRANULARITIES:
+            raise ValueError(f'Granularidade inválida: {granularity}')
 
-        daily_balance = []
-        current_balance = 0
+        period, label_format = self.SERIES_GRANULARITIES[granularity]
+        start_date = self.today - timedelta(days=days - 1)
+        if granularity == 'week':
+            start_date -= timedelta(days=start_date.weekday())
+        elif granularity == 'month':
+            start_date = start_date.replace(day=1)
 
-        balance_before = self.user.transactions.filter(
-            is_completed=True,
+        ledger = self.user.daily_balances.all()
+
+        balance_before = ledger.filter(
             date__lt=start_date
-        ).aggregate(
-            total=Sum('amount', field='CASE WHEN type="IN" THEN amount ELSE -amount END')
-        )['total'] or 0
+        ).order_by('-date').values_list('running_balance', flat=True).first() or 0
 
-        for i in range(30):
-            day = start_date + timedelta(days=i)
-            # Transações deste dia
-            day_transactions = [t for t in transactions if t.date == day]
-            day_total = sum(t.signed_amount for t in day_transactions)
+        net_by_period = dict(
+            ledger.filter(
+                date__gte=start_date,
+                date__lte=self.today
+            ).annotate(
+                period=period('date')
+            ).values('period').annotate(
+                total=Sum('net')
+            ).order_by().values_list('period', 'total')
+        )
 
-            if i == 0:
-                current_balance = balance_before + day_total
-            else:
-                current_balance += day_total
+        labels = []
+        balances = []
+        current_balance = balance_before
+        day = start_date
 
-            daily_balance.append(float(current_balance))
+        while day <= self.today:
+            current_balance += net_by_period.get(day, 0)
+            labels.append(day.strftime(label_format))
+            balances.append(float(current_balance))
+            day = _next_period(day, granularity)
 
-        return daily_balance
+        return labels, balances
 
-    def get_expenses_by_category(self):
-        return self.user.transactions.filter(
-            type=Transaction.Type.EXPENSE,
-            is_completed=True,
-            date__month=self.today.month,
-            date__year=self.today.year
-        ).values('category').annotate(
-            total=Sum('amount')
-        ).order_by('-total')
+    def get_budgets(self):
+        # Uma linha por categoria orçada; o gasto já vem mantido pelos signals
+        budgets = self.user.budgets.filter(month=self.first_day_month)
+        return sorted(budgets, key=lambda budget: budget.percent, reverse=True)
 
+    @user_cached('dashboard-recent')
     def get_recent_transactions(self, limit=5):
-        return self.user.transactions.filter(
+        return list(self.user.transactions.filter(
             is_completed=True
-        ).select_related('user').order_by('-date', '-created_at')[:limit]
+        ).order_by('-date', '-created_at')[:limit])
+
+
+_executor = None
+
+
+def _get_executor():
+    # Poucas threads fixas para todo o processo: cada uma mantém a própria
+    # conexão (CONN_MAX_AGE) ou a devolve ao pool, em vez de abrir e fechar
+    # uma conexão por bloco do dashboard
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.TRANSACTIONS_ASYNC_WORKERS, thread_name_prefix='dashboard'
+        )
+    return _executor
+
+
+class AsyncDashboardService(DashboardService):
+    # O ORM assíncrono do Django ainda executa as consultas numa única thread
+    # (sync_to_async com thread_sensitive), então um gather de aaggregate()
+    # sairia em série. Cada bloco roda no executor do dashboard, e o tempo
+    # total fica no da consulta mais lenta. O contexto da requisição vai junto
+    # (medição de consultas do middleware)
+
+    async def _in_thread(self, method, *args, **kwargs):
+        def run():
+            # Como o Django faz no início e no fim de cada requisição: fecha
+            # só conexões vencidas ou quebradas
+            close_old_connections()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                close_old_connections()
+        context = contextvars.copy_context()
+        return await asyncio.get_running_loop().run_in_executor(_get_executor(), context.run, run)
+
+    async def aget_monthly_snapshot(self):
+        return await self._in_thread(self.get_monthly_snapshot)
+
+    async def aget_balance_series(self, days=30, granularity='day'):
+        return await self._in_thread(self.get_balance_series, days=days, granularity=granularity)
+
+    async def aget_recent_transactions(self, limit=5):
+        return await self._in_thread(self.get_recent_transactions, limit)
+
+    async def aget_budgets(self):
+        return await self._in_thread(self.get_budgets)
+
+    async def aget_dashboard(self, days=30, recent=5):
+        return await asyncio.gather(
+            self.aget_monthly_snapshot(),
+            self.aget_balance_series(days=days),
+            self.aget_recent_transactions(recent),
+            self.aget_budgets(),
+        )
+
+
+class CalendarService:
+    def __init__(self, user):
+        self.user = user
+
+    @user_cached('calendar-month')
+    def get_month(self, year, month):
+        # Contagens e totais por dia agrupados no banco, numa única consulta
+        # Intervalo fechado até o último dia: dezembro de 9999 não tem mês seguinte
+        first_day = date(year, month, 1)
+        last_day = first_day.replace(day=calendar.monthrange(year, month)[1])
+
+        rows = self.user.transactions.filter(
+            date__range=(first_day, last_day)
+        ).values('date').annotate(
+            completed=Count('id', filter=Q(is_completed=True)),
+            pending=Count('id', filter=Q(is_completed=False)),
+            income=Sum('base_amount', filter=Q(type=Transaction.Type.INCOME)),
+            expense=Sum('base_amount', filter=Q(type=Transaction.Type.EXPENSE)),
+        ).order_by()
+
+        return {
+            row['date'].day: {
+                'completed': row['completed'],
+                'pending': row['pending'],
+                'income': float(row['income'] or 0),
+                'expense': float(row['expense'] or 0),
+            }
+            for row in rows
+        }
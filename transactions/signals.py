@@ -1,62 +1,221 @@
 # accounts/signals.py
-from django.db.models.signals import pre_save, post_save, post_delete
+from collections import defaultdict
+
+from django.db import transaction as db_transaction
+from django.db.models import QuerySet
+from django.db.models.signals import post_save, post_delete, pre_save
 from django.dispatch import receiver
 from django.contrib.auth import get_user_model
-from transactions.models import Transaction
+from transactions import categorizer, fx, search
+from transactions.models import ExchangeRate, RecurringRule, Transaction
+from transactions.service import (
+    apply_account_delta, apply_balance_delta, apply_budget_delta, apply_daily_delta, apply_summary_delta,
+    bump_data_version, rebase_transactions, rebuild_daily_balances, rebuild_monthly_summaries,
+    reconcile_account_balances, reconcile_balances, refresh_budgets
+)
 
 
 User = get_user_model()
 
 
+def _deleted_with_user(origin):
+    # Exclusão em cascata a partir do usuário: saldo e resumos somem junto
+    model = origin.model if isinstance(origin, QuerySet) else type(origin)
+    return model is User
+
+
+@receiver(post_save, sender=Transaction)
+@receiver(post_delete, sender=Transaction)
+@receiver(post_save, sender=RecurringRule)
+@receiver(post_delete, sender=RecurringRule)
+def invalidate_user_cache(sender, instance, **kwargs):
+    # Só depois do commit, para nenhum leitor guardar dados antigos na versão nova
+    db_transaction.on_commit(lambda: bump_data_version(instance.user_id))
+
+
 @receiver(pre_save, sender=Transaction)
-def capture_old_state(sender, instance, **kwargs):
-    if instance.pk:
-        try:
-            old = Transaction.objects.get(pk=instance.pk)
-            instance._old_signed_amount = old.signed_amount
-            instance._old_is_completed = old.is_completed
-            print(f"PRE-SAVE: Old value = {instance._old_signed_amount}, Old completed = {instance._old_is_completed}")
-        except Transaction.DoesNotExist:
-            pass
+def update_base_amount(sender, instance, **kwargs):
+    # Saldo, saldos diários, resumos e orçamentos somam o valor em BRL; só o
+    # saldo da conta fica na moeda dela
+    fx.fill_base_amounts([instance])
 
 
 @receiver(post_save, sender=Transaction)
-def update_balance_on_save(sender, instance, created, **kwargs):
-    user = instance.user
+def update_search_index_on_save(sender, instance, **kwargs):
+    search.index_transactions([instance])
 
-    if created:
-        if instance.is_completed:
-            user.balance += instance.signed_amount
 
+@receiver(post_delete, sender=Transaction)
+def update_search_index_on_delete(sender, instance, **kwargs):
+    search.remove_transactions([instance.pk])
+
+
+@receiver(post_save, sender=Transaction)
+def update_balance_on_save(sender, instance, created, **kwargs):
+    if created:
+        old_state = None
     else:
-        if hasattr(instance, '_old_signed_amount') and hasattr(instance, '_old_is_completed'):
-            old_value = instance._old_signed_amount
-            old_completed = instance._old_is_completed
-            new_value = instance.signed_amount
-            new_completed = instance.is_completed
+        old_state = instance.previous_balance_state
+        if old_state is None:
+            # Instância não veio do banco: recalcula o usuário inteiro
+            reconcile_balances(user_ids=[instance.user_id])
+            rebuild_daily_balances(user_ids=[instance.user_id])
+            return
 
-            if not old_completed and new_completed:
-                user.balance += new_value
+    daily_deltas = defaultdict(int)
 
-            elif old_completed and not new_completed:
-                user.balance -= old_value
+    if old_state is not None:
+        old_date, _, old_completed, _, _, _, old_base = old_state
+        if old_completed:
+            daily_deltas[old_date] -= old_base
 
-            elif old_completed and new_completed and old_value != new_value:
-                user.balance -= old_value
-                user.balance += new_value
+    if instance.is_completed:
+        daily_deltas[instance.date] += instance.signed_base_amount
 
-        else:
-            user.balance = sum(
-                t.signed_amount
-                for t in user.transactions.filter(is_completed=True)
-            )
+    for day, delta in daily_deltas.items():
+        apply_daily_delta(instance.user_id, day, delta)
 
-    user.save()
+    apply_balance_delta(instance.user_id, sum(daily_deltas.values()))
 
 
 @receiver(post_delete, sender=Transaction)
-def update_balance_on_delete(sender, instance, **kwargs):
-    user = instance.user
+def update_balance_on_delete(sender, instance, origin=None, **kwargs):
+    if _deleted_with_user(origin):
+        return
+
     if instance.is_completed:
-        user.balance -= instance.signed_amount
-        user.save()
+        apply_balance_delta(instance.user_id, -instance.signed_base_amount)
+        apply_daily_delta(instance.user_id, instance.date, -instance.signed_base_amount)
+
+
+@receiver(post_save, sender=Transaction)
+def update_account_balance_on_save(sender, instance, created, **kwargs):
+    old_state = None if created else instance.previous_balance_state
+    if not created and old_state is None:
+        reconcile_account_balances(user_ids=[instance.user_id])
+        return
+
+    # Troca de conta: sai de uma e entra na outra
+    deltas = defaultdict(int)
+
+    if old_state is not None:
+        _, old_value, old_completed, _, _, old_account_id, _ = old_state
+        if old_completed:
+            deltas[old_account_id] -= old_value
+
+    if instance.is_completed:
+        deltas[instance.account_id] += instance.signed_amount
+
+    for account_id, delta in deltas.items():
+        apply_account_delta(account_id, delta)
+
+
+@receiver(post_delete, sender=Transaction)
+def update_account_balance_on_delete(sender, instance, origin=None, **kwargs):
+    if _deleted_with_user(origin):
+        return
+
+    if instance.is_completed:
+        apply_account_delta(instance.account_id, -instance.signed_amount)
+
+
+@receiver(post_save, sender=Transaction)
+def update_monthly_summary_on_save(sender, instance, created, **kwargs):
+    old_state = None if created else instance.previous_balance_state
+    if not created and old_state is None:
+        rebuild_monthly_summaries(user_ids=[instance.user_id])
+        return
+
+    # (mês, categoria, tipo) -> [valor, quantidade]; edição sem efeito se anula
+    deltas = defaultdict(lambda: [0, 0])
+
+    if old_state is not None:
+        old_date, _, old_completed, old_category, old_type, _, old_base = old_state
+        if old_completed:
+            bucket = deltas[(old_date.replace(day=1), old_category, old_type)]
+            bucket[0] -= abs(old_base)
+            bucket[1] -= 1
+
+    if instance.is_completed:
+        bucket = deltas[(instance.date.replace(day=1), instance.category, instance.type)]
+        bucket[0] += instance.base_amount
+        bucket[1] += 1
+
+    for (month, category, type), (amount, count) in deltas.items():
+        apply_summary_delta(instance.user_id, month, category, type, amount, count)
+
+
+@receiver(post_delete, sender=Transaction)
+def update_monthly_summary_on_delete(sender, instance, origin=None, **kwargs):
+    if _deleted_with_user(origin):
+        return
+
+    if instance.is_completed:
+        apply_summary_delta(
+            instance.user_id, instance.date, instance.category, instance.type, -instance.base_amount, -1
+        )
+
+
+@receiver(post_save, sender=Transaction)
+def update_budget_on_save(sender, instance, created, **kwargs):
+    old_state = None if created else instance.previous_balance_state
+    if not created and old_state is None:
+        refresh_budgets(user_ids=[instance.user_id])
+        return
+
+    # Só saídas concluídas contam no gasto; (mês, categoria) -> valor
+    deltas = defaultdict(int)
+
+    if old_state is not None:
+        old_date, _, old_completed, old_category, old_type, _, old_base = old_state
+        if old_completed and old_type == Transaction.Type.EXPENSE:
+            deltas[(old_date.replace(day=1), old_category)] -= abs(old_base)
+
+    if instance.is_completed and instance.type == Transaction.Type.EXPENSE:
+        deltas[(instance.date.replace(day=1), instance.category)] += instance.base_amount
+
+    for (month, category), amount in deltas.items():
+        apply_budget_delta(instance.user_id, month, category, amount)
+
+
+@receiver(post_delete, sender=Transaction)
+def update_budget_on_delete(sender, instance, origin=None, **kwargs):
+    if _deleted_with_user(origin):
+        return
+
+    if instance.is_completed and instance.type == Transaction.Type.EXPENSE:
+        apply_budget_delta(instance.user_id, instance.date, instance.category, -instance.base_amount)
+
+
+@receiver(post_save, sender=Transaction)
+def update_categorizer_on_save(sender, instance, created, **kwargs):
+    # O modelo fica no cache, fora do banco: só muda depois do commit
+    user_id = instance.user_id
+    old_state = None if created else instance.previous_category_state
+    if not created and old_state is None:
+        db_transaction.on_commit(lambda: categorizer.discard_model(user_id))
+        return
+
+    new_state = (instance.title, instance.description, instance.category)
+    if old_state == new_state:
+        return
+
+    forget = [old_state] if old_state else []
+    db_transaction.on_commit(lambda: categorizer.update_model(user_id, forget=forget, learn=[new_state]))
+
+
+@receiver(post_delete, sender=Transaction)
+def update_categorizer_on_delete(sender, instance, origin=None, **kwargs):
+    if _deleted_with_user(origin):
+        return
+
+    user_id = instance.user_id
+    old_state = (instance.title, instance.description, instance.category)
+    db_transaction.on_commit(lambda: categorizer.update_model(user_id, forget=[old_state]))
+
+
+@receiver(post_save, sender=ExchangeRate)
+@receiver(post_delete, sender=ExchangeRate)
+def invalidate_exchange_rates(sender, instance, **kwargs):
+    rebase_transactions([instance.currency])
+    db_transaction.on_commit(fx.bump_rates_version)
@@ -0,0 +1,128 @@
+import random
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import transaction as db_transaction
+from django.utils import timezone
+
+from . import fx, search
+from .models import Account, Transaction
+from .service import (
+    delete_rows, rebuild_daily_balances, rebuild_monthly_summaries, reconcile_account_balances, reconcile_balances
+)
+
+
+SYNTHETIC_DOMAIN = 'synthetic.cashcare.local'
+
+# (título, categoria, tipo, faixa de valor em reais, peso)
+TEMPLATES = [
+    ('Supermercado', 'ALM', 'OUT', (40, 600), 20),
+    ('Restaurante', 'ALM', 'OUT', (25, 250), 12),
+    ('Padaria', 'ALM', 'OUT', (8, 60), 10),
+    ('Uber', 'TRP', 'OUT', (12, 80), 10),
+    ('Combustível', 'TRP', 'OUT', (100, 350), 6),
+    ('Aluguel', 'MOR', 'OUT', (900, 3500), 2),
+    ('Conta de luz', 'MOR', 'OUT', (80, 400), 2),
+    ('Internet', 'MOR', 'OUT', (90, 200), 2),
+    ('Farmácia', 'SAU', 'OUT', (15, 300), 5),
+    ('Plano de saúde', 'SAU', 'OUT', (250, 900), 2),
+    ('Curso online', 'EDU', 'OUT', (30, 500), 2),
+    ('Cinema', 'LAZ', 'OUT', (20, 90), 5),
+    ('Streaming', 'LAZ', 'OUT', (20, 60), 3),
+    ('Loja de roupas', 'COM', 'OUT', (60, 700), 5),
+    ('Marketplace', 'COM', 'OUT', (20, 1200), 6),
+    ('Salário', 'SAL', 'IN', (2500, 15000), 3),
+    ('Freelance', 'OUT', 'IN', (200, 4000), 2),
+    ('Rendimento', 'INV', 'IN', (5, 800), 2),
+    ('Aporte', 'INV', 'OUT', (100, 3000), 1),
+]
+
+
+def is_scratch_database():
+    # Só o ambiente de desenvolvimento conta como base descartável: fora dele
+    # os comandos que geram e apagam dados exigem --allow-writes
+    return settings.DEBUG
+
+
+def synthetic_users():
+    return get_user_model().objects.filter(email__endswith=f'@{SYNTHETIC_DOMAIN}')
+
+
+@db_transaction.atomic
+def clear_synthetic_data():
+    # DELETE direto das transações: o delete() em cascata carregaria cada
+    # linha na memória para disparar os signals. Saldos, resumos e contas
+    # somem junto com os usuários
+    users = synthetic_users()
+    transactions = Transaction.objects.filter(user__in=users)
+    search.remove_transactions(transactions.values_list('pk', flat=True).iterator())
+    deleted = delete_rows(transactions)
+    users.delete()
+    return deleted
+
+
+def create_users(count, prefix='user', start=0):
+    User = get_user_model()
+    password = make_password(None)
+    users = [
+        User(
+            email=f'{prefix}{number}@{SYNTHETIC_DOMAIN}',
+            password=password,
+            first_name='Usuário',
+            last_name=str(number),
+        )
+        for number in range(start, start + count)
+    ]
+    return User.objects.bulk_create(users, batch_size=1000)
+
+
+def generate_transactions(user_ids, per_user, days=730, pending_ratio=0.1, seed=None, batch_size=5000):
+    # Lançamentos gerados em lotes com bulk_create; saldos e resumos são
+    # recalculados uma vez no fim
+    rng = random.Random(seed)
+    weights = [template[-1] for template in TEMPLATES]
+    today = timezone.now().date()
+
+    created = 0
+    batch = []
+    for user_id in user_ids:
+        account = Account.default_for(user_id)
+        for _ in range(per_user):
+            title, category, type, (low, high), _ = rng.choices(TEMPLATES, weights)[0]
+            day = today - timedelta(days=rng.randint(-30, days))
+            transaction = Transaction(
+                user_id=user_id,
+                account=account,
+                title=title,
+                description='',
+                amount=Decimal(rng.randint(low * 100, high * 100)) / 100,
+                type=type,
+                category=category,
+                is_completed=day <= today and rng.random() >= pending_ratio,
+                date=day,
+            )
+            transaction.refresh_fingerprint()
+            batch.append(transaction)
+            if len(batch) >= batch_size:
+                created += _flush(batch)
+                batch = []
+
+    created += _flush(batch)
+
+    user_ids = list(user_ids)
+    reconcile_balances(user_ids=user_ids)
+    reconcile_account_balances(user_ids=user_ids)
+    rebuild_daily_balances(user_ids=user_ids)
+    rebuild_monthly_summaries(user_ids=user_ids)
+    return created
+
+
+def _flush(batch):
+    if not batch:
+        return 0
+    created = Transaction.objects.bulk_create(fx.fill_base_amounts(batch))
+    search.index_transactions(created)
+    return len(created)
@@ -16,3 +16,12 @@ def url_replace(context, **kwargs):
             del query[key]
 
     return query.urlencode()
+
+
+@register.simple_tag(takes_context=True)
+def cursor_url(context, cursor):
+    query = context['request'].GET.copy()
+    query.pop('page', None)
+    query['cursor'] = cursor
+
+    return query.urlencode()
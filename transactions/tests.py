@@ -0,0 +1,883 @@
+import csv
+import io
+import json
+import os
+import re
+import tempfile
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest import mock, skipUnless
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.http import QueryDict
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import include, path, reverse
+from django.utils import timezone
+
+from . import categorizer, search
+from .benchmark import prepare_user, run_scenarios
+from .bulk import bulk_complete, bulk_delete
+from .exporters import stream_csv
+from .filters import TransactionFilter
+from .importers import import_transactions
+from .models import Account, Budget, DailyBalance, ExchangeRate, MonthlySummary, RecurringRule, Transaction
+from .synthetic import clear_synthetic_data, create_users, generate_transactions, synthetic_users
+from . import views
+from .service import (
+    DashboardService, bump_data_version, cached_for_user, get_data_version, rebuild_daily_balances,
+    rebuild_monthly_summaries, reconcile_account_balances, reconcile_balances, refresh_budgets, set_budget
+)
+
+
+User = get_user_model()
+
+
+class DashboardQueriesTest(TestCase):
+    # Sessão e usuário (2), contas, resumo do mês, saldo inicial e série,
+    # últimas transações, orçamentos, pendências e recorrências da previsão
+    COLD_QUERIES = 10
+    # Sessão, usuário, contas (saldo consolidado) e orçamentos: o resto vem do cache
+    WARM_QUERIES = 4
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('dashboard@example.com', 'senha-forte-123', first_name='Ana')
+        today = timezone.now().date()
+        for amount, type, category in (
+            ('3000.00', Transaction.Type.INCOME, Transaction.Category.SALARIO),
+            ('120.50', Transaction.Type.EXPENSE, Transaction.Category.ALIMENTACAO),
+            ('80.00', Transaction.Type.EXPENSE, Transaction.Category.TRANSPORTE),
+        ):
+            Transaction.objects.create(
+                user=self.user, title='Lançamento', amount=Decimal(amount), type=type,
+                category=category, is_completed=True, date=today
+            )
+        self.client.force_login(self.user)
+        cache.clear()
+
+    def test_dashboard_query_count(self):
+        with self.assertNumQueries(self.COLD_QUERIES):
+            response = self.client.get(reverse('dashboard'))
+        self.assertEqual(response.status_code, 200)
+
+        with self.assertNumQueries(self.WARM_QUERIES):
+            self.client.get(reverse('dashboard'))
+
+    def test_dashboard_query_count_does_not_grow_with_data(self):
+        for _ in range(20):
+            Transaction.objects.create(
+                user=self.user, title='Mercado', amount=Decimal('10.00'),
+                category=Transaction.Category.ALIMENTACAO, is_completed=False,
+                date=timezone.now().date()
+            )
+        cache.clear()
+
+        with self.assertNumQueries(self.COLD_QUERIES):
+            self.client.get(reverse('dashboard'))
+
+
+class ImportTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('import@example.com', 'senha-forte-123')
+
+    def test_non_finite_amounts_are_reported_not_raised(self):
+        rows = enumerate([
+            {'date': '05/01/2026', 'title': 'Mercado', 'amount': 'NaN'},
+            {'date': '05/01/2026', 'title': 'Mercado', 'amount': 'Infinity'},
+            {'date': '05/01/2026', 'title': 'Padaria', 'amount': '-12,50'},
+        ], start=2)
+
+        result = import_transactions(self.user, rows)
+
+        self.assertEqual(result.created, 1)
+        self.assertEqual([line for line, _ in result.errors], [2, 3])
+
+
+class FingerprintTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('fingerprint@example.com', 'senha-forte-123')
+
+    def test_create_accepts_text_amount_and_date(self):
+        transaction = Transaction.objects.create(
+            user=self.user, title='Padaria São João', amount='10.00', date='2026-01-05', is_completed=True
+        )
+        same = Transaction(user=self.user, title='padaria sao joao!', amount=Decimal('10'), date=date(2026, 1, 5))
+        same.refresh_fingerprint()
+
+        self.assertEqual(transaction.fingerprint, same.fingerprint)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.balance, Decimal('-10.00'))
+
+
+class DailyBalanceTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('ledger@example.com', 'senha-forte-123')
+
+    def create(self, amount, day, **kwargs):
+        return Transaction.objects.create(
+            user=self.user, title='Lançamento', amount=Decimal(amount), date=date(2026, 1, day), **kwargs
+        )
+
+    def ledger(self):
+        return list(DailyBalance.objects.filter(user=self.user).exclude(net=0).values_list(
+            'date__day', 'net', 'running_balance'
+        ))
+
+    def test_signals_keep_running_balances(self):
+        self.create('1000', 1, type=Transaction.Type.INCOME, is_completed=True)
+        rent = self.create('300', 5, is_completed=True)
+        market = self.create('50', 3)
+        self.assertEqual(self.ledger(), [(1, 1000, 1000), (5, -300, 700)])
+
+        market.is_completed = True
+        market.save()
+        rent.date = date(2026, 1, 2)
+        rent.save()
+        self.assertEqual(self.ledger(), [(1, 1000, 1000), (2, -300, 700), (3, -50, 650)])
+
+        rent.delete()
+        self.assertEqual(self.ledger(), [(1, 1000, 1000), (3, -50, 950)])
+
+    def test_rebuild_restores_ledger(self):
+        self.create('1000', 1, type=Transaction.Type.INCOME, is_completed=True)
+        self.create('300', 5, is_completed=True)
+        self.create('50', 3)
+        expected = self.ledger()
+
+        DailyBalance.objects.filter(user=self.user).update(net=1, running_balance=1)
+        call_command('rebuild_daily_balances', stdout=io.StringIO())
+
+        self.assertEqual(self.ledger(), expected)
+
+
+@mock.patch.object(views.TransactionListView, 'cursor_pagination', True)
+class CursorPaginationTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('cursor@example.com', 'senha-forte-123')
+        # Várias transações no mesmo dia: a ordem depende do desempate por created_at e id
+        for index in range(20):
+            Transaction.objects.create(
+                user=self.user, title=f'Lançamento {index}', amount=Decimal('10'),
+                date=date(2026, 1, 1) + timedelta(days=index // 3)
+            )
+        self.expected = list(Transaction.objects.filter(user=self.user).order_by(
+            '-date', '-created_at', '-id'
+        ).values_list('pk', flat=True))
+        self.client.force_login(self.user)
+
+    def page(self, cursor=None):
+        response = self.client.get(reverse('transaction_list'), {'cursor': cursor} if cursor else {})
+        self.assertEqual(response.status_code, 200)
+        return response.context['page_obj']
+
+    def test_walk_forward_and_back(self):
+        pages = [self.page()]
+        while pages[-1].has_next():
+            pages.append(self.page(pages[-1].next_cursor))
+        self.assertEqual([t.pk for page in pages for t in page], self.expected)
+        self.assertFalse(pages[0].has_previous())
+
+        page = pages[-1]
+        for expected in reversed(pages[:-1]):
+            page = self.page(page.previous_cursor)
+            self.assertEqual([t.pk for t in page], [t.pk for t in expected])
+        self.assertFalse(page.has_previous())
+
+    def test_invalid_cursor_is_not_found(self):
+        for cursor in ('nao-e-cursor', 'eyJ2IjpbXX0'):
+            with self.subTest(cursor=cursor):
+                response = self.client.get(reverse('transaction_list'), {'cursor': cursor})
+                self.assertEqual(response.status_code, 404)
+
+
+class TransactionFilterTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('filter@example.com', 'senha-forte-123')
+
+    def test_parse_ignores_invalid_values(self):
+        spec = TransactionFilter.parse(QueryDict(
+            'search=+mercado+&period=999&start_date=2026-02-30&end_date=2026-01-31'
+            '&type_out=OUT&status_pending=pending&category=TRP&category=XYZ&category=ALM'
+        ))
+
+        self.assertEqual(spec.search, 'mercado')
+        self.assertEqual(spec.period, '')
+        self.assertIsNone(spec.start_date)
+        self.assertEqual(spec.end_date, date(2026, 1, 31))
+        self.assertEqual(spec.types, (Transaction.Type.EXPENSE,))
+        self.assertEqual(spec.statuses, ('pending',))
+        self.assertEqual(spec.categories, (Transaction.Category.ALIMENTACAO, Transaction.Category.TRANSPORTE))
+
+    def test_equivalent_queries_share_cache_key(self):
+        today = date(2026, 1, 31)
+        first = TransactionFilter(QueryDict('category=TRP&category=ALM&period=30'), self.user, today)
+        second = TransactionFilter(QueryDict('period=30&category=ALM&category=TRP'), self.user, today)
+        tomorrow = TransactionFilter(QueryDict('period=30'), self.user, today + timedelta(days=1))
+
+        self.assertEqual(first.cache_key(8), second.cache_key(8))
+        self.assertNotEqual(first.cache_key(8), first.cache_key(8, 2))
+        self.assertNotEqual(TransactionFilter(QueryDict('period=30'), self.user, today).cache_key(), tomorrow.cache_key())
+        self.assertEqual(first.active_count, 2)
+
+    def test_filter_applies_spec(self):
+        today = date(2026, 1, 31)
+        for day, category, is_completed in (
+            (30, Transaction.Category.ALIMENTACAO, False),
+            (30, Transaction.Category.ALIMENTACAO, True),
+            (20, Transaction.Category.TRANSPORTE, False),
+            (1, Transaction.Category.ALIMENTACAO, False),
+        ):
+            Transaction.objects.create(
+                user=self.user, title='Lançamento', amount=Decimal('10'), category=category,
+                is_completed=is_completed, date=date(2026, 1, day)
+            )
+
+        transaction_filter = TransactionFilter(
+            QueryDict('period=15&status_pending=pending&category=ALM'), self.user, today
+        )
+        queryset = transaction_filter.filter(Transaction.objects.filter(user=self.user))
+
+        self.assertEqual(list(queryset.values_list('date__day', 'category', 'is_completed')), [
+            (30, Transaction.Category.ALIMENTACAO, False)
+        ])
+
+
+@skipUnless(search.is_available(), 'Busca FTS5 só existe no SQLite')
+class SearchIndexTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('search@example.com', 'senha-forte-123')
+        self.other = User.objects.create_user('search-other@example.com', 'senha-forte-123')
+        self.transaction = self.create(self.user, 'Pão de Açúcar')
+        self.create(self.other, 'Pão de Açúcar')
+
+    def create(self, user, title, description=''):
+        return Transaction.objects.create(
+            user=user, title=title, description=description, amount=Decimal('10'), date=date(2026, 1, 5)
+        )
+
+    def found(self, text, ranked=False):
+        queryset = Transaction.objects.filter(user=self.user)
+        return list(search.apply_search(queryset, self.user.pk, text, ranked=ranked).values_list('pk', flat=True))
+
+    def test_edit_and_delete_update_results(self):
+        self.assertEqual(self.found('acucar'), [self.transaction.pk])
+
+        self.transaction.title = 'Feira livre'
+        self.transaction.save()
+        self.assertEqual(self.found('acucar'), [])
+        self.assertEqual(self.found('fei'), [self.transaction.pk])
+
+        self.transaction.delete()
+        self.assertEqual(self.found('feira'), [])
+
+    def test_title_matches_rank_first(self):
+        # Criada antes: na ordem padrão (mais recentes primeiro) viria depois
+        in_title = self.create(self.user, 'Feira', '')
+        in_description = self.create(self.user, 'Compras', 'feira do mês')
+
+        self.assertEqual(self.found('feira', ranked=True), [in_title.pk, in_description.pk])
+
+
+class DataVersionCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('version@example.com', 'senha-forte-123')
+        self.client.force_login(self.user)
+
+    def test_bump_invalidates_cached_values(self):
+        builder = mock.Mock(side_effect=['antigo', 'novo'])
+
+        self.assertEqual(cached_for_user(self.user.pk, 'teste', builder), 'antigo')
+        self.assertEqual(cached_for_user(self.user.pk, 'teste', builder), 'antigo')
+        bump_data_version(self.user.pk)
+        self.assertEqual(cached_for_user(self.user.pk, 'teste', builder), 'novo')
+        self.assertEqual(builder.call_count, 2)
+
+    def test_evicted_version_is_never_reused(self):
+        version = get_data_version(self.user.pk)
+        cache.clear()
+        self.assertNotEqual(get_data_version(self.user.pk), version)
+
+    def test_write_bumps_version_after_commit(self):
+        version = get_data_version(self.user.pk)
+        with self.captureOnCommitCallbacks() as callbacks:
+            Transaction.objects.create(
+                user=self.user, title='Mercado', amount=Decimal('10'), date=date(2026, 1, 5), is_completed=True
+            )
+            self.assertEqual(get_data_version(self.user.pk), version)
+        for callback in callbacks:
+            callback()
+        self.assertNotEqual(get_data_version(self.user.pk), version)
+
+    def test_calendar_reflects_new_transaction(self):
+        url = reverse('calendar_json', args=[2026, 1])
+        response = self.client.get(url)
+        self.assertNotIn('5', response.json()['days'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Transaction.objects.create(
+                user=self.user, title='Mercado', amount=Decimal('10'), date=date(2026, 1, 5), is_completed=True
+            )
+        new = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(new.status_code, 200)
+        self.assertEqual(new.json()['days']['5']['completed'], 1)
+
+
+class BudgetSpentTest(TestCase):
+    JANUARY, FEBRUARY = date(2026, 1, 1), date(2026, 2, 1)
+    FOOD, TRANSPORT = Transaction.Category.ALIMENTACAO, Transaction.Category.TRANSPORTE
+
+    def setUp(self):
+        self.user = User.objects.create_user('budget@example.com', 'senha-forte-123')
+        self.transaction = Transaction.objects.create(
+            user=self.user, title='Mercado', amount=Decimal('100'), category=self.FOOD,
+            date=date(2026, 1, 10), is_completed=True
+        )
+        for month in (self.JANUARY, self.FEBRUARY):
+            for category in (self.FOOD, self.TRANSPORT):
+                set_budget(self.user.pk, month, category, Decimal('500'))
+
+    def spent(self):
+        return {
+            (month.month, category): spent for month, category, spent in
+            Budget.objects.filter(user=self.user).values_list('month', 'category', 'spent')
+            if spent
+        }
+
+    def test_set_budget_starts_from_existing_spending(self):
+        self.assertEqual(self.spent(), {(1, self.FOOD): 100})
+
+    def test_moving_between_categories_and_months(self):
+        self.transaction.category = self.TRANSPORT
+        self.transaction.save()
+        self.assertEqual(self.spent(), {(1, self.TRANSPORT): 100})
+
+        self.transaction.date = date(2026, 2, 28)
+        self.transaction.category = self.FOOD
+        self.transaction.amount = Decimal('80')
+        self.transaction.save()
+        self.assertEqual(self.spent(), {(2, self.FOOD): 80})
+
+        self.transaction.date = date(2026, 3, 1)
+        self.transaction.save()
+        self.assertEqual(self.spent(), {})
+
+    def test_only_completed_expenses_count(self):
+        self.transaction.is_completed = False
+        self.transaction.save()
+        self.assertEqual(self.spent(), {})
+
+        self.transaction.is_completed = True
+        self.transaction.type = Transaction.Type.INCOME
+        self.transaction.save()
+        self.assertEqual(self.spent(), {})
+
+        self.transaction.type = Transaction.Type.EXPENSE
+        self.transaction.save()
+        self.assertEqual(self.spent(), {(1, self.FOOD): 100})
+        self.transaction.delete()
+        self.assertEqual(self.spent(), {})
+
+
+class ExchangeRateInvalidationTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('fx@example.com', 'senha-forte-123')
+        Account.objects.create(user=self.user, name='Conta EUA', currency=Account.Currency.USD, balance=Decimal('100'))
+        self.client.force_login(self.user)
+
+    def import_rate(self, rate):
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False) as file:
+            file.write(f'date,currency,rate\n{timezone.now().date()},USD,{rate}\n')
+        self.addCleanup(os.remove, file.name)
+        call_command('import_exchange_rates', file.name, stdout=io.StringIO())
+
+    def test_new_rate_changes_api_etag_and_forecast(self):
+        self.import_rate('5.00')
+        response = self.client.get(reverse('api_dashboard'))
+        forecast = self.client.get(reverse('api_forecast')).json()
+        self.assertEqual(Decimal(response.json()['balance']), Decimal('500.00'))
+
+        self.import_rate('6.00')
+        response = self.client.get(reverse('api_dashboard'), HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Decimal(response.json()['balance']), Decimal('600.00'))
+        self.assertNotEqual(self.client.get(reverse('api_forecast')).json()['balances'], forecast['balances'])
+
+    def test_forecast_starts_from_consolidated_balance(self):
+        self.import_rate('5.00')
+        data = self.client.get(reverse('api_forecast')).json()
+
+        self.assertEqual(Decimal(data['balance']), Decimal('500.00'))
+        self.assertEqual(data['balances'][0], 500.0)
+
+
+class ApiConditionalTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('api@example.com', 'senha-forte-123')
+        self.client.force_login(self.user)
+
+    def test_day_change_invalidates_validators(self):
+        response = self.client.get(reverse('api_dashboard'))
+        etag, modified = response['ETag'], response['Last-Modified']
+        self.assertEqual(self.client.get(reverse('api_dashboard'), HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.assertEqual(self.client.get(reverse('api_dashboard'), HTTP_IF_MODIFIED_SINCE=modified).status_code, 304)
+
+        tomorrow = timezone.now() + timedelta(days=1)
+        with mock.patch('django.utils.timezone.now', return_value=tomorrow):
+            self.assertEqual(self.client.get(reverse('api_dashboard'), HTTP_IF_NONE_MATCH=etag).status_code, 200)
+            self.assertEqual(
+                self.client.get(reverse('api_dashboard'), HTTP_IF_MODIFIED_SINCE=modified).status_code, 200
+            )
+
+
+class RecurringRuleInvalidationTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('recurring@example.com', 'senha-forte-123')
+        self.client.force_login(self.user)
+
+    def test_rule_changes_refresh_cached_forecast(self):
+        today = timezone.now().date()
+        self.assertEqual(self.client.get(reverse('api_forecast')).json()['balances'][-1], 0.0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            rule = RecurringRule.objects.create(
+                user=self.user, title='Aluguel', amount=Decimal('100'), start_date=today, next_date=today
+            )
+        self.assertEqual(self.client.get(reverse('api_forecast')).json()['balances'][-1], -100.0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            rule.delete()
+        self.assertEqual(self.client.get(reverse('api_forecast')).json()['balances'][-1], 0.0)
+
+
+class DerivedStateTestMixin:
+    # Saldos, resumos, orçamentos e índice de busca mantidos incrementalmente
+    # têm de bater com uma reconstrução completa. Os deltas podem deixar
+    # linhas zeradas, que a reconstrução não cria
+    def derived_state(self, user):
+        return (
+            list(DailyBalance.objects.filter(user=user).exclude(net=0).values_list(
+                'date', 'net', 'running_balance'
+            )),
+            list(MonthlySummary.objects.filter(user=user).exclude(count=0).order_by(
+                'month', 'category', 'type'
+            ).values_list(
+                'month', 'category', 'type', 'total', 'count'
+            )),
+            list(Budget.objects.filter(user=user).order_by('month', 'category').values_list(
+                'month', 'category', 'spent'
+            )),
+        )
+
+    def assertDerivedStateConsistent(self, user):
+        self.assertEqual(reconcile_balances(user_ids=[user.pk], dry_run=True), [])
+        self.assertEqual(reconcile_account_balances(user_ids=[user.pk], dry_run=True), [])
+
+        state = self.derived_state(user)
+        rebuild_daily_balances(user_ids=[user.pk])
+        rebuild_monthly_summaries(user_ids=[user.pk])
+        refresh_budgets(user_ids=[user.pk])
+        self.assertEqual(state, self.derived_state(user))
+
+        if search.is_available():
+            with connection.cursor() as cursor:
+                cursor.execute(f'SELECT rowid FROM {search.SEARCH_TABLE} WHERE owner = %s', [f'u{user.pk}'])
+                indexed = {pk for pk, in cursor.fetchall()}
+            self.assertEqual(indexed, set(Transaction.objects.filter(user=user).values_list('pk', flat=True)))
+
+
+class BulkConsistencyTest(DerivedStateTestMixin, TestCase):
+    def setUp(self):
+        self.user = create_users(1, prefix='bulk')[0]
+        account = Account.default_for(self.user.pk)
+        generate_transactions([self.user.pk], 200, days=90, pending_ratio=0.3, seed=7)
+        Transaction.objects.filter(user=self.user).update(account=account)
+        reconcile_account_balances(user_ids=[self.user.pk])
+        today = timezone.now().date()
+        for month in (today, today - timedelta(days=31), today - timedelta(days=62)):
+            for category in Transaction.Category.values:
+                set_budget(self.user.pk, month, category, Decimal('500'))
+
+    def test_bulk_delete(self):
+        queryset = Transaction.objects.filter(user=self.user).order_by('pk')
+        bulk_delete(self.user.pk, queryset.filter(pk__in=list(queryset.values_list('pk', flat=True))[::3]))
+
+        self.assertEqual(queryset.count(), 200 - len(range(0, 200, 3)))
+        self.assertDerivedStateConsistent(self.user)
+
+    def test_bulk_complete(self):
+        bulk_complete(self.user.pk, Transaction.objects.filter(user=self.user))
+
+        self.assertFalse(Transaction.objects.filter(user=self.user, is_completed=False).exists())
+        self.assertDerivedStateConsistent(self.user)
+
+    def test_clear_synthetic_data(self):
+        clear_synthetic_data()
+
+        self.assertFalse(synthetic_users().exists())
+        self.assertFalse(Transaction.objects.exists())
+        self.assertFalse(DailyBalance.objects.exists())
+
+
+class BaseCurrencyTest(DerivedStateTestMixin, TestCase):
+    # Saldo, saldos diários, resumos e orçamentos em BRL pela cotação da data
+    def setUp(self):
+        cache.clear()
+        self.today = timezone.now().date()
+        ExchangeRate.objects.create(currency=Account.Currency.USD, date=self.today, rate=Decimal('5'))
+        self.user = User.objects.create_user('usd@example.com', 'senha-forte-123')
+        self.account = Account.objects.create(user=self.user, name='Conta EUA', currency=Account.Currency.USD)
+        set_budget(self.user.pk, self.today, Transaction.Category.ALIMENTACAO, Decimal('1000'))
+
+    def create(self, amount='100', **kwargs):
+        return Transaction.objects.create(
+            user=self.user, account=self.account, title='Mercado', amount=Decimal(amount),
+            category=Transaction.Category.ALIMENTACAO, is_completed=True, date=self.today, **kwargs
+        )
+
+    def assertAggregates(self, spent):
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.balance, -spent)
+        self.assertEqual(DailyBalance.objects.get(user=self.user, date=self.today).running_balance, -spent)
+        self.assertEqual(MonthlySummary.objects.get(user=self.user).total, spent)
+        self.assertEqual(Budget.objects.get(user=self.user).spent, spent)
+        self.assertEqual(DashboardService(self.user).get_monthly_snapshot().monthly_expense, spent)
+        self.assertDerivedStateConsistent(self.user)
+
+    def test_usd_transaction_is_converted_at_its_date_rate(self):
+        transaction = self.create()
+
+        self.assertEqual(transaction.base_amount, Decimal('500.00'))
+        self.assertAggregates(Decimal('500.00'))
+        self.account.refresh_from_db()
+        self.assertEqual(self.account.balance, Decimal('-100.00'))
+
+    def test_edit_and_delete_use_converted_values(self):
+        transaction = self.create()
+        transaction.amount = Decimal('40')
+        transaction.save()
+        self.assertAggregates(Decimal('200.00'))
+
+        transaction.delete()
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.balance, Decimal('0.00'))
+        self.assertEqual(Budget.objects.get(user=self.user).spent, Decimal('0.00'))
+
+    def test_bulk_import_is_converted(self):
+        rows = enumerate([{'date': self.today.strftime('%d/%m/%Y'), 'title': 'Mercado', 'amount': '-100'}], start=2)
+        import_transactions(self.user, rows, account=self.account)
+
+        self.assertEqual(Transaction.objects.get(user=self.user).base_amount, Decimal('500.00'))
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.balance, Decimal('-500.00'))
+        self.assertDerivedStateConsistent(self.user)
+
+    def test_rate_change_rebases_transactions(self):
+        self.create()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            ExchangeRate.objects.filter(currency=Account.Currency.USD).get().delete()
+            ExchangeRate.objects.create(currency=Account.Currency.USD, date=self.today, rate=Decimal('6'))
+
+        self.assertEqual(Transaction.objects.get(user=self.user).base_amount, Decimal('600.00'))
+        self.assertAggregates(Decimal('600.00'))
+
+    def test_rate_import_rebases_transactions(self):
+        self.create()
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False) as file:
+            file.write(f'date,currency,rate\n{self.today},USD,7.00\n')
+        self.addCleanup(os.remove, file.name)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('import_exchange_rates', file.name, stdout=io.StringIO())
+
+        self.assertAggregates(Decimal('700.00'))
+
+
+class ConcurrentWriteTest(DerivedStateTestMixin, TestCase):
+    # Duas requisições que leram a mesma transação antes de qualquer escrita
+    def setUp(self):
+        self.user = User.objects.create_user('race@example.com', 'senha-forte-123')
+        self.transaction = Transaction.objects.create(
+            user=self.user, title='Mercado', amount=Decimal('50'), category=Transaction.Category.ALIMENTACAO,
+            date=timezone.now().date()
+        )
+        set_budget(self.user.pk, timezone.now().date(), Transaction.Category.ALIMENTACAO, Decimal('100'))
+
+    def stale_copies(self):
+        return Transaction.objects.get(pk=self.transaction.pk), Transaction.objects.get(pk=self.transaction.pk)
+
+    def test_second_complete_is_not_counted_again(self):
+        first, second = self.stale_copies()
+        first.is_completed = second.is_completed = True
+        first.save()
+        second.save()
+
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.balance, Decimal('-50.00'))
+        self.assertDerivedStateConsistent(self.user)
+
+    def test_edit_after_complete_uses_stored_state(self):
+        first, second = self.stale_copies()
+        first.is_completed = True
+        first.save()
+        second.amount = Decimal('80')
+        second.save()
+
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.balance, Decimal('0.00'))
+        self.assertDerivedStateConsistent(self.user)
+
+    def test_second_delete_is_ignored(self):
+        self.transaction.is_completed = True
+        self.transaction.save()
+        first, second = self.stale_copies()
+        first.delete()
+
+        self.assertEqual(second.delete(), (0, {}))
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.balance, Decimal('0.00'))
+        self.assertDerivedStateConsistent(self.user)
+
+    def test_bulk_complete_after_single_complete(self):
+        self.client.force_login(self.user)
+        self.client.post(reverse('transaction_complete', args=[self.transaction.pk]))
+        self.client.post(reverse('transaction_bulk'), {'action': 'complete', 'ids': [self.transaction.pk]})
+        self.client.post(reverse('transaction_complete', args=[self.transaction.pk]))
+
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.balance, Decimal('-50.00'))
+        self.assertDerivedStateConsistent(self.user)
+
+
+class CategorizerTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('categorizer@example.com', 'senha-forte-123')
+        for title, category in (
+            ('Supermercado Extra', Transaction.Category.ALIMENTACAO),
+            ('Uber viagem', Transaction.Category.TRANSPORTE),
+        ):
+            Transaction.objects.create(
+                user=self.user, title=title, amount=Decimal('10'), category=category, date=date(2026, 1, 5)
+            )
+
+    def state(self, model):
+        return dict(model.documents), {c: dict(+counts) for c, counts in model.tokens.items() if +counts}
+
+    def test_incremental_updates_match_full_training(self):
+        categorizer.Categorizer.load(self.user.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            Transaction.objects.create(
+                user=self.user, title='Padaria do bairro', amount=Decimal('5'),
+                category=Transaction.Category.ALIMENTACAO, date=date(2026, 1, 6)
+            )
+
+        self.assertEqual(
+            self.state(categorizer.Categorizer.load(self.user.pk)),
+            self.state(categorizer.Categorizer.train(self.user.pk)),
+        )
+
+    def test_concurrent_update_discards_cached_model(self):
+        stale = categorizer.Categorizer.load(self.user.pk)
+        # Outro processo no meio de um ajuste: este não pode gravar por cima
+        cache.add(categorizer._lock_key(self.user.pk), 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            Transaction.objects.create(
+                user=self.user, title='Padaria do bairro', amount=Decimal('5'),
+                category=Transaction.Category.ALIMENTACAO, date=date(2026, 1, 6)
+            )
+        stale.save()
+        cache.delete(categorizer._lock_key(self.user.pk))
+
+        model = categorizer.Categorizer.load(self.user.pk)
+        self.assertEqual(model.documents[Transaction.Category.ALIMENTACAO], 2)
+
+
+class CalendarBoundsTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('calendar@example.com', 'senha-forte-123')
+        self.client.force_login(self.user)
+
+    def test_years_outside_date_range_are_not_found(self):
+        for year in (0, 10000):
+            self.assertEqual(self.client.get(reverse('calendar', args=[year, 1])).status_code, 404)
+            self.assertEqual(self.client.get(reverse('calendar_json', args=[year, 1])).status_code, 404)
+            self.assertEqual(self.client.get(reverse('api_calendar', args=[year, 1])).status_code, 404)
+
+    def test_last_supported_month(self):
+        Transaction.objects.create(
+            user=self.user, title='Fim', amount=Decimal('1'), date=date(9999, 12, 31), is_completed=True
+        )
+        response = self.client.get(reverse('calendar_json', args=[9999, 12]))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['days']['31']['completed'], 1)
+
+
+class ReportBoundsTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('reports@example.com', 'senha-forte-123')
+        self.client.force_login(self.user)
+
+    def test_trend_start_is_clamped_to_year_one(self):
+        response = self.client.get(reverse('reports', args=[5]), {'years': '10'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(json.loads(response.context['tendencia_labels'])), 5 * 12)
+
+    def test_years_outside_date_range_are_not_found(self):
+        self.assertEqual(self.client.get(reverse('reports', args=[0])).status_code, 404)
+        self.assertEqual(self.client.get(reverse('reports', args=[10000])).status_code, 404)
+
+    def test_first_and_last_supported_years(self):
+        for year in (1, 9999):
+            with self.subTest(year=year):
+                self.assertEqual(self.client.get(reverse('reports', args=[year])).status_code, 200)
+
+    def test_budget_first_and_last_supported_months(self):
+        for month in ('0001-01', '9999-12'):
+            with self.subTest(month=month):
+                self.assertEqual(self.client.get(reverse('budgets'), {'month': month}).status_code, 200)
+        self.assertEqual(self.client.get(reverse('budgets'), {'month': '0000-12'}).status_code, 404)
+
+
+@skipUnless(connection.vendor == 'sqlite', 'Plano de consulta no formato do SQLite')
+class QueryPlanTest(TestCase):
+    # Cada consulta quente tem de usar um dos índices compostos de Transaction
+    # (prefixo txn_): o índice simples do user_id também é "USING INDEX", mas
+    # obriga a ler todas as linhas do usuário
+    INDEX_PATTERN = re.compile(r'USING (COVERING )?INDEX txn_')
+
+    def setUp(self):
+        self.user = User.objects.create_user('plans@example.com', 'senha-forte-123')
+
+    def assertUsesIndex(self, queryset, ordered=False):
+        plan = queryset.explain()
+        self.assertRegex(plan, self.INDEX_PATTERN)
+        self.assertNotIn('SCAN transactions_transaction', plan)
+        if ordered:
+            self.assertNotIn('TEMP B-TREE', plan)
+
+    def test_dashboard_month_query(self):
+        service = DashboardService(self.user)
+        self.assertUsesIndex(self.user.transactions.filter(
+            is_completed=True, date__gte=service.first_day_month, date__lt=service.first_day_next_month
+        ).values('amount'))
+
+    def test_list_queries(self):
+        base = Transaction.objects.filter(user=self.user)
+        for query in ('', 'period=30', 'type_out=OUT', 'status_pending=pending'):
+            with self.subTest(query=query):
+                queryset = TransactionFilter(QueryDict(query), self.user).filter(base)
+                self.assertUsesIndex(queryset.order_by('-date', '-created_at')[:8], ordered=True)
+
+    def test_duplicate_lookup(self):
+        self.assertUsesIndex(
+            Transaction.objects.filter(user=self.user, fingerprint__in=['a', 'b']).values('fingerprint')
+        )
+
+
+class ExportTest(TestCase):
+    def test_csv_neutralizes_formulas_but_not_amounts(self):
+        rows = [(date(2026, 1, 5), '=HYPERLINK("http://x")', '@SUM(A1)', 'Saída', 'Outros', Decimal('-10.50'), 'Pendente')]
+        header, line = ''.join(stream_csv(rows)).splitlines()
+
+        self.assertEqual(next(csv.reader([line], delimiter=';')), [
+            '05/01/2026', "'=HYPERLINK(\"http://x\")", "'@SUM(A1)", 'Saída', 'Outros', '-10,50', 'Pendente'
+        ])
+
+
+class SyntheticCommandsTest(TestCase):
+    def test_write_commands_require_flag_outside_debug(self):
+        for command in ('generate_data', 'benchmark', 'load_test'):
+            with self.subTest(command=command), self.assertRaises(CommandError):
+                call_command(command, stdout=io.StringIO())
+        self.assertFalse(synthetic_users().exists())
+
+        call_command('generate_data', '--users=1', '--transactions=5', '--allow-writes', stdout=io.StringIO())
+        self.assertEqual(Transaction.objects.filter(user__in=synthetic_users()).count(), 5)
+
+    def test_benchmark_keeps_other_cache_entries(self):
+        cache.set('outro:app', 1)
+        user = prepare_user(20, seed=1)
+
+        run_scenarios(user, 20, ['dashboard', 'list'], repeat=2)
+
+        self.assertEqual(cache.get('outro:app'), 1)
+
+
+# Dashboard assíncrono com nome próprio, independente de TRANSACTIONS_ASYNC_DASHBOARD
+urlpatterns = [
+    path('async/', views.dashboard_async, name='dashboard_async'),
+    path('', include('core.urls')),
+]
+
+
+# As threads de apoio usam conexões próprias: os dados precisam estar gravados
+@override_settings(ROOT_URLCONF=__name__)
+class AsyncDashboardTest(TransactionTestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('async@example.com', 'senha-forte-123', first_name='Ana')
+        today = timezone.now().date()
+        for amount, category, is_completed in (
+            ('3000', Transaction.Category.SALARIO, True),
+            ('120', Transaction.Category.ALIMENTACAO, True),
+            ('80', Transaction.Category.TRANSPORTE, False),
+        ):
+            Transaction.objects.create(
+                user=self.user, title='Lançamento', amount=Decimal(amount), category=category,
+                type=Transaction.Type.INCOME if category == Transaction.Category.SALARIO else Transaction.Type.EXPENSE,
+                is_completed=is_completed, date=today
+            )
+        set_budget(self.user.pk, today, Transaction.Category.ALIMENTACAO, Decimal('100'))
+        self.client.force_login(self.user)
+
+    def test_same_context_as_sync_dashboard(self):
+        cache.clear()
+        expected = self.client.get(reverse('dashboard')).context
+        cache.clear()
+        response = self.client.get(reverse('dashboard_async'))
+
+        self.assertEqual(response.status_code, 200)
+        keys = ('current_balance', 'monthly_incomes', 'monthly_expenses', 'grafico_linha_data', 'categorias_data',
+                'ultimas_transacoes', 'orcamentos_estourados', 'previsao_data')
+        self.assertEqual({key: response.context[key] for key in keys}, {key: expected[key] for key in keys})
+
+
+@override_settings(REQUEST_TIMING_ENABLED=True, ROOT_URLCONF=__name__)
+class RequestTimingTest(TransactionTestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('timing@example.com', 'senha-forte-123')
+        Transaction.objects.create(
+            user=self.user, title='Mercado', amount=Decimal('10'), date=timezone.now().date(), is_completed=True
+        )
+
+    def logged_queries(self, client, name):
+        cache.clear()
+        with self.assertLogs('cashcare.requests', 'INFO') as logs:
+            response = client.get(reverse(name))
+        self.assertIn('db;dur=', response['Server-Timing'])
+        return json.loads(logs.records[0].getMessage())['queries']
+
+    def test_sync_and_async_dashboards_log_every_query(self):
+        self.client.force_login(self.user)
+        with CaptureQueriesContext(connection) as captured:
+            sync_queries = self.logged_queries(self.client, 'dashboard')
+        self.assertEqual(sync_queries, len(captured))
+
+        # As consultas das threads de apoio também contam
+        self.assertGreaterEqual(self.logged_queries(self.client, 'dashboard_async'), sync_queries)
+
+    async def test_async_handler(self):
+        await self.async_client.aforce_login(self.user)
+        with self.assertLogs('cashcare.requests', 'INFO') as logs:
+            response = await self.async_client.get(reverse('dashboard_async'))
+        self.assertEqual(response.status_code, 200)
+        self.assertGreater(json.loads(logs.records[0].getMessage())['queries'], 0)
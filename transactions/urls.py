@@ -1,17 +1,37 @@
+from django.conf import settings
 from django.urls import path
 
-from . import views
+from . import api, views
 
 
 urlpatterns = [
 
-    path('', views.DashboardView.as_view(), name='dashboard'),
+    path(
+        '',
+        views.dashboard_async if settings.TRANSACTIONS_ASYNC_DASHBOARD else views.DashboardView.as_view(),
+        name='dashboard'
+    ),
     path('add/', views.TransactionCreateView.as_view(), name='transaction_create'),
     path('transactions/', views.TransactionListView.as_view(), name='transaction_list'),
+    path('transactions/export/', views.TransactionExportView.as_view(), name='transaction_export'),
+    path('transactions/bulk/', views.TransactionBulkView.as_view(), name='transaction_bulk'),
+    path('transactions/suggest-category/', views.suggest_category, name='suggest_category'),
+    path('transactions/import/', views.TransactionImportView.as_view(), name='transaction_import'),
     path('transactions/<int:pk>/update', views.TransactionUpdateView.as_view(), name='transaction_update'),
     path('transactions/<int:pk>/complete', views.TransctionCompleteView.as_view(), name='transaction_complete'),
     path('transactions/<int:pk>/delete', views.TransactionDeleteView.as_view(), name='transaction_delete'),
+    path('accounts/', views.AccountView.as_view(), name='accounts'),
+    path('budgets/', views.BudgetView.as_view(), name='budgets'),
+    path('budgets/<int:pk>/delete', views.BudgetDeleteView.as_view(), name='budget_delete'),
+    path('reports/', views.ReportView.as_view(), name='reports'),
+    path('reports/<int:year>/', views.ReportView.as_view(), name='reports'),
     path('calendar/', views.calendar_view, name='calendar'),
     path('calendar/<int:year>/<int:month>/', views.calendar_view, name='calendar'),
+    path('calendar/<int:year>/<int:month>.json', views.calendar_month_json, name='calendar_json'),
+
+    path('api/v1/transactions/', api.transaction_list, name='api_transaction_list'),
+    path('api/v1/dashboard/', api.dashboard, name='api_dashboard'),
+    path('api/v1/forecast/', api.forecast, name='api_forecast'),
+    path('api/v1/calendar/<int:year>/<int:month>/', api.calendar_month, name='api_calendar'),
 
 ]
@@ -1,16 +1,67 @@
+import asyncio
 import json
-from datetime import timedelta
-
-from django.views.generic import TemplateView, CreateView, ListView, UpdateView, View
-from django.urls import reverse_lazy
+from datetime import date, timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.http import Http404, HttpResponseBadRequest, JsonResponse, StreamingHttpResponse
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition
+from django.core.exceptions import ValidationError
+from django.views.generic import TemplateView, CreateView, FormView, ListView, UpdateView, View
+from django.urls import reverse, reverse_lazy
 from django.utils import timezone
 from django.shortcuts import get_object_or_404, redirect, render
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.contrib.auth.decorators import login_required
 
-from .service import DashboardService
-from .models import Transaction
-from .forms import TransactionForm
+from .service import (
+    AsyncDashboardService, CalendarService, DashboardService, bump_data_version, get_data_version,
+    get_last_modified, set_budget
+)
+from .models import Account, Budget, Transaction
+from .bulk import bulk_autocategorize, bulk_complete, bulk_delete, bulk_recategorize
+from .categorizer import MIN_CONFIDENCE, Categorizer
+from .duplicates import duplicates_of
+from .exporters import export_rows, stream_csv, stream_xlsx
+from .filters import TransactionFilter
+from .forecast import HORIZONS, ForecastService
+from .forms import AccountForm, BudgetForm, TransactionForm, TransactionImportForm
+from .fx import consolidated_balance
+from .importers import import_file
+from .pagination import CursorPaginator, InvalidCursor
+from .reports import ReportService
+
+
+def _forecast_days(request):
+    days = request.GET.get('previsao', '')
+    return int(days) if days.isdigit() and int(days) in HORIZONS else HORIZONS[0]
+
+
+def _dashboard_context(user, snapshot, series, recent_transactions, budgets, forecast, balance):
+    labels, balances = series
+    return {
+        'name': f'{user.first_name} {user.last_name}',
+        'current_balance': balance.total,
+        'contas': balance.accounts,
+        'moedas_sem_cotacao': sorted(balance.missing),
+        'monthly_incomes': snapshot.monthly_income,
+        'monthly_expenses': snapshot.monthly_expense,
+        'monthly_savings': snapshot.monthly_savings,
+        'grafico_linha_labels': json.dumps(labels),
+        'grafico_linha_data': json.dumps(balances),
+        'categorias_labels': json.dumps(snapshot.category_labels),
+        'categorias_data': json.dumps(snapshot.category_totals),
+        'ultimas_transacoes': recent_transactions,
+        'orcamentos': budgets,
+        'orcamentos_estourados': [budget for budget in budgets if budget.is_over],
+        'previsao': forecast,
+        'previsao_dias': len(forecast.balances),
+        'previsao_opcoes': HORIZONS,
+        'previsao_labels': json.dumps(forecast.labels),
+        'previsao_data': json.dumps(forecast.balances),
+    }
 
 
 class DashboardView(LoginRequiredMixin, TemplateView):
@@ -21,26 +72,38 @@ class DashboardView(LoginRequiredMixin, TemplateView):
         user = self.request.user
 
         service = DashboardService(user)
+        balance = consolidated_balance(user)
+        context.update(_dashboard_context(
+            user,
+            service.get_monthly_snapshot(),
+            service.get_balance_series(days=30),
+            service.get_recent_transactions(5),
+            service.get_budgets(),
+            ForecastService(user, balance).get_forecast(_forecast_days(self.request)),
+            balance,
+        ))
 
-        context.update({
-            'name': f'{user.first_name} {user.last_name}',
-            'current_balance': user.balance,
-            'monthly_incomes': service.get_monthly_income(),
-            'monthly_expenses': service.get_monthly_expense(),
-            'monthly_savings': service.get_monthly_savings(),
-        })
-
-        context['grafico_linha_labels'] = json.dumps(service.get_last_30_days_labels())
-        context['grafico_linha_data'] = json.dumps(service.get_last_30_days_balance())
-
-        category = service.get_expenses_by_category()
+        return context
 
-        context['categorias_labels'] = json.dumps([c['category'] for c in category])
-        context['categorias_data'] = json.dumps([float(c['total']) for c in category])
 
-        context['ultimas_transacoes'] = service.get_recent_transactions(5)
+@login_required
+async def dashboard_async(request):
+    # Mesma página do DashboardView, com as consultas em paralelo
+    user = await request.auser()
+    days = _forecast_days(request)
+
+    def balance_and_forecast():
+        # A previsão parte do saldo consolidado: calculado uma vez para os dois
+        balance = consolidated_balance(user)
+        return balance, ForecastService(user, balance).get_forecast(days)
+
+    (snapshot, series, recent_transactions, budgets), (balance, forecast) = await asyncio.gather(
+        AsyncDashboardService(user).aget_dashboard(days=30),
+        sync_to_async(balance_and_forecast)(),
+    )
 
-        return context
+    context = _dashboard_context(user, snapshot, series, recent_transactions, budgets, forecast, balance)
+    return await sync_to_async(render)(request, 'transactions/dashboard.html', context)
 
 
 class TransactionCreateView(LoginRequiredMixin, CreateView):
@@ -49,169 +112,350 @@ class TransactionCreateView(LoginRequiredMixin, CreateView):
     template_name = 'transactions/transaction_create.html'
     success_url = reverse_lazy('transaction_list')
 
+    def get_form_kwargs(self):
+        kwargs = super().get_form_kwargs()
+        kwargs['user'] = self.request.user
+        return kwargs
+
     def form_valid(self, form):
         form.instance.user = self.request.user
+        form.instance.refresh_fingerprint()
+
+        # Mesma data, valor e título já lançados: pede confirmação antes de salvar
+        if not self.request.POST.get('confirmar_duplicata'):
+            duplicates = list(duplicates_of(form.instance).select_related('account')[:5])
+            if duplicates:
+                return self.render_to_response(self.get_context_data(form=form, duplicatas=duplicates))
+
         return super().form_valid(form)
 
 
+@login_required
+def suggest_category(request):
+    title = request.GET.get('title', '')[:120]
+    description = request.GET.get('description', '')[:255]
+    category, confidence = Categorizer.load(request.user.pk).predict(title, description)
+    if confidence < MIN_CONFIDENCE:
+        category = None
+
+    return JsonResponse({
+        'category': category,
+        'label': Transaction.Category(category).label if category else None,
+        'confidence': round(confidence, 3),
+    })
+
+
+class TransactionImportView(LoginRequiredMixin, FormView):
+    form_class = TransactionImportForm
+    template_name = 'transactions/transaction_import.html'
+
+    def get_form_kwargs(self):
+        kwargs = super().get_form_kwargs()
+        kwargs['user'] = self.request.user
+        return kwargs
+
+    def form_valid(self, form):
+        try:
+            result = import_file(
+                self.request.user,
+                form.cleaned_data['file'],
+                form.cleaned_data['file_format'],
+                account=form.cleaned_data['account'],
+                skip_duplicates=form.cleaned_data['skip_duplicates']
+            )
+        except ValidationError as error:
+            form.add_error('file', error)
+            return self.form_invalid(form)
+
+        return self.render_to_response(
+            self.get_context_data(form=self.form_class(user=self.request.user), result=result)
+        )
+
+
 class TransactionListView(LoginRequiredMixin, ListView):
     model = Transaction
     template_name = 'transactions/transaction_list.html'
     context_object_name = 'transactions'
     paginate_by = 8
+    cursor_pagination = settings.TRANSACTIONS_CURSOR_PAGINATION
+    cache_timeout = 300
+
+    def setup(self, request, *args, **kwargs):
+        super().setup(request, *args, **kwargs)
+        self.filter = TransactionFilter(request.GET, request.user)
 
     def get_queryset(self):
         queryset = super().get_queryset().filter(user=self.request.user)
+        # Ordem por relevância quebraria a paginação por cursor
+        return self.filter.filter(queryset, ranked=not self.cursor_pagination)
+
+    def paginate_queryset(self, queryset, page_size):
+        cache_key = 'transactions:list:{}:{}:{}'.format(
+            self.request.user.pk,
+            get_data_version(self.request.user.pk),
+            self.filter.cache_key(
+                page_size,
+                self.cursor_pagination,
+                self.request.GET.get('cursor') or self.request.GET.get(self.page_kwarg)
+            )
+        )
+
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return self._paginate_from_cache(queryset, page_size, cached)
+
+        if self.cursor_pagination:
+            paginator = CursorPaginator(queryset, page_size)
+            try:
+                page = paginator.page(self.request.GET.get('cursor'))
+            except InvalidCursor:
+                raise Http404('Cursor inválido')
+            cache.set(cache_key, page, self.cache_timeout)
+            return paginator, page, page.object_list, page.has_other_pages()
+
+        paginator, page, object_list, is_paginated = super().paginate_queryset(queryset, page_size)
+        page.object_list = list(object_list)
+        cache.set(cache_key, (paginator.count, page.number, page.object_list), self.cache_timeout)
+        return paginator, page, page.object_list, is_paginated
+
+    def _paginate_from_cache(self, queryset, page_size, cached):
+        if self.cursor_pagination:
+            return CursorPaginator(queryset, page_size), cached, cached.object_list, cached.has_other_pages()
+
+        count, number, object_list = cached
+        paginator = self.get_paginator(queryset, page_size)
+        paginator.count = count
+        page = paginator.page(number)
+        page.object_list = object_list
+        return paginator, page, object_list, page.has_other_pages()
 
-        search = self.request.GET.get('search', '')
-        if search:
-            queryset = queryset.filter(title__icontains=search)
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
 
-        period = self.request.GET.get('period', '')
-        today = timezone.now().date()
+        context.update(self.filter.get_context_data())
+        context['categorias'] = Transaction.Category.choices
 
-        period_days = {
-            '7': 7, '15': 15, '30': 30, '45': 45, '60': 60,
-        }
+        return context
 
-        if period in period_days:
-            start_date = today - timedelta(days=period_days[period])
-            queryset = queryset.filter(date__gte=start_date, date__lte=today)
 
-        start_date = self.request.GET.get('start_date', '')
-        end_date = self.request.GET.get('end_date', '')
+class TransactionExportView(LoginRequiredMixin, View):
+    formats = {
+        'csv': (stream_csv, 'text/csv; charset=utf-8'),
+        'xlsx': (stream_xlsx, 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'),
+    }
 
-        if start_date and end_date:
-            queryset = queryset.filter(date__gte=start_date, date__lte=end_date)
+    def get(self, request):
+        export_format = request.GET.get('format', 'csv')
+        if export_format not in self.formats:
+            raise Http404('Formato de exportação inválido')
 
-        elif start_date:
-            queryset = queryset.filter(date__gte=start_date)
+        stream, content_type = self.formats[export_format]
+        queryset = TransactionFilter(request.GET, request.user).filter(
+            Transaction.objects.filter(user=request.user)
+        )
 
-        elif end_date:
-            queryset = queryset.filter(date__lte=end_date)
+        response = StreamingHttpResponse(stream(export_rows(queryset)), content_type=content_type)
+        filename = f'transacoes-{timezone.now():%Y%m%d}.{export_format}'
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
 
-        tipos_selecionados = []
 
-        if self.request.GET.get('type_in'):
-            tipos_selecionados.append('IN')
+class TransactionUpdateView(LoginRequiredMixin, UpdateView):
+    model = Transaction
+    template_name = 'transactions/transaction_update.html'
+    form_class = TransactionForm
+    success_url = reverse_lazy('transaction_list')
 
-        if self.request.GET.get('type_out'):
-            tipos_selecionados.append('OUT')
+    def get_queryset(self):
+        return Transaction.objects.filter(user=self.request.user)
 
-        if tipos_selecionados:
-            queryset = queryset.filter(type__in=tipos_selecionados)
+    def get_form_kwargs(self):
+        kwargs = super().get_form_kwargs()
+        kwargs['user'] = self.request.user
+        return kwargs
 
-        status_selecionados = []
 
-        if self.request.GET.get('status_completed'):
-            status_selecionados.append(True)
+class TransctionCompleteView(LoginRequiredMixin, View):
+    def post(self, request, pk):
+        transaction = get_object_or_404(Transaction, pk=pk, user=request.user)
 
-        if self.request.GET.get('status_pending'):
-            status_selecionados.append(False)
+        transaction.is_completed = True
+        transaction.save()
 
-        if status_selecionados:
-            queryset = queryset.filter(is_completed__in=status_selecionados)
+        return redirect('transaction_list')
 
-        categorias = self.request.GET.getlist('category')
 
-        if categorias:
-            queryset = queryset.filter(category__in=categorias)
+class TransactionDeleteView(LoginRequiredMixin, View):
+    def post(self, request, pk):
+        transaction = get_object_or_404(Transaction, pk=pk, user=request.user)
+        transaction.delete()
 
-        return queryset
+        return redirect('transaction_list')
 
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
 
-        context['search'] = self.request.GET.get('search', '')
-        context['current_period'] = self.request.GET.get('period', '')
-        context['start_date'] = self.request.GET.get('start_date', '')
-        context['end_date'] = self.request.GET.get('end_date', '')
+class TransactionBulkView(LoginRequiredMixin, View):
+    max_ids = 1000
 
-        context['selected_types'] = []
+    def post(self, request):
+        # Os filtros atuais vêm na query string, igual à listagem
+        redirect_url = f"{reverse('transaction_list')}?{request.GET.urlencode()}"
+        queryset = Transaction.objects.filter(user=request.user)
 
-        if self.request.GET.get('type_in'):
-            context['selected_types'].append('IN')
+        if request.POST.get('select_all'):
+            queryset = TransactionFilter(request.GET, request.user).filter(queryset)
+        else:
+            ids = [pk for pk in request.POST.getlist('ids') if pk.isdigit()][:self.max_ids]
+            if not ids:
+                return redirect(redirect_url)
+            queryset = queryset.filter(pk__in=ids)
+
+        action = request.POST.get('action')
+        if action == 'complete':
+            bulk_complete(request.user.pk, queryset)
+        elif action == 'delete':
+            bulk_delete(request.user.pk, queryset)
+        elif action == 'recategorize':
+            category = request.POST.get('category')
+            if category not in Transaction.Category.values:
+                return HttpResponseBadRequest('Categoria inválida')
+            bulk_recategorize(request.user.pk, queryset, category)
+        elif action == 'autocategorize':
+            bulk_autocategorize(request.user.pk, queryset)
+        else:
+            return HttpResponseBadRequest('Ação inválida')
 
-        if self.request.GET.get('type_out'):
-            context['selected_types'].append('OUT')
+        return redirect(redirect_url)
 
-        context['selected_status'] = []
 
-        if self.request.GET.get('status_completed'):
-            context['selected_status'].append('completed')
+class AccountView(LoginRequiredMixin, FormView):
+    form_class = AccountForm
+    template_name = 'transactions/accounts.html'
+    success_url = reverse_lazy('accounts')
 
-        if self.request.GET.get('status_pending'):
-            context['selected_status'].append('pending')
+    def get_form_kwargs(self):
+        kwargs = super().get_form_kwargs()
+        kwargs['user'] = self.request.user
+        return kwargs
 
-        context['selected_categories'] = self.request.GET.getlist('category')
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        Account.default_for(self.request.user.pk)
+        balance = consolidated_balance(self.request.user)
+        context.update({
+            'balance': balance,
+            'moedas_sem_cotacao': sorted(balance.missing),
+        })
+        return context
 
-        filtros_ativos = 0
+    def form_valid(self, form):
+        form.instance.user = self.request.user
+        form.save()
+        bump_data_version(self.request.user.pk)
+        return super().form_valid(form)
 
-        if context['search']: filtros_ativos += 1
-        if context['current_period']: filtros_ativos += 1
-        if context['current_period'] == 'custom': filtros_ativos -= 1
-        if context['start_date'] or context['end_date']: filtros_ativos += 1
-        if context['selected_types']: filtros_ativos += 1
-        if context['selected_status']: filtros_ativos += 1
-        if context['selected_categories']: filtros_ativos += 1
 
-        context['total_filtros_ativos'] = filtros_ativos
+class BudgetView(LoginRequiredMixin, FormView):
+    form_class = BudgetForm
+    template_name = 'transactions/budgets.html'
 
-        context['categorias'] = Transaction.Category.choices
+    def get_month(self):
+        month = self.request.GET.get('month')
+        if not month:
+            return timezone.now().date().replace(day=1)
 
-        return context
+        try:
+            month = date.fromisoformat(f'{month}-01')
+        except ValueError:
+            raise Http404('Mês inválido')
+        if not 1 <= month.year <= 9999:
+            raise Http404('Mês inválido')
+        return month
 
+    def get_initial(self):
+        return {'month': self.get_month()}
 
-class TransactionUpdateView(LoginRequiredMixin, UpdateView):
-    model = Transaction
-    template_name = 'transactions/transaction_update.html'
-    form_class = TransactionForm
-    success_url = reverse_lazy('transaction_list')
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        month = self.get_month()
+        # Nos extremos do calendário não há mês anterior ou seguinte
+        prev_month = (month - timedelta(days=1)).replace(day=1) if month > date.min else None
+        next_month = (month + timedelta(days=31)).replace(day=1) if month < date.max.replace(day=1) else None
 
+        budgets = self.request.user.budgets.filter(month=month).order_by('category')
+        context.update({
+            'month': month,
+            'prev_month': prev_month,
+            'next_month': next_month,
+            'budgets': budgets,
+            'total_limit': sum(budget.limit for budget in budgets),
+            'total_spent': sum(budget.spent for budget in budgets),
+        })
+        return context
 
-class TransctionCompleteView(LoginRequiredMixin, View):
+    def form_valid(self, form):
+        month = form.cleaned_data['month']
+        set_budget(self.request.user.pk, month, form.cleaned_data['category'], form.cleaned_data['limit'])
+        return redirect(f"{reverse('budgets')}?month={month:%Y-%m}")
+
+
+class BudgetDeleteView(LoginRequiredMixin, View):
     def post(self, request, pk):
-        transaction = get_object_or_404(Transaction, pk=pk, user=request.user)
+        budget = get_object_or_404(Budget, pk=pk, user=request.user)
+        budget.delete()
+        bump_data_version(request.user.pk)
 
-        transaction.is_completed = True
-        transaction.save()
+        return redirect(f"{reverse('budgets')}?month={budget.month:%Y-%m}")
 
-        return redirect('transaction_list')
 
+class ReportView(LoginRequiredMixin, TemplateView):
+    template_name = 'transactions/reports.html'
+    trend_years = (1, 2, 3, 5, 10)
 
-class TransactionDeleteView(LoginRequiredMixin, View):
-    def post(self, request, pk):
-        transaction = get_object_or_404(Transaction, pk=pk, user=request.user)
-        transaction.delete()
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        service = ReportService(self.request.user)
 
-        return redirect('transaction_list')
+        year = kwargs.get('year')
+        if year is None:
+            year = service.today.year
+        if not 1 <= year <= 9999:
+            raise Http404('Ano inválido')
 
+        years = self.request.GET.get('years', '1')
+        years = int(years) if years.isdigit() and int(years) in self.trend_years else 1
 
-@login_required
-def calendar_view(request, year=None, month=None):
-    today = timezone.now()
-    year = year or today.year
-    month = month or today.month
+        report = service.get_year(year)
+        # Perto do ano 1 a tendência começa no primeiro ano possível
+        trend_labels, trend_series = service.get_category_trends(max(1, year - years + 1), year)
 
-    year = int(year)
-    month = int(month)
+        context.update({
+            'year': year,
+            'prev_year': year - 1,
+            'next_year': year + 1,
+            'years': years,
+            'trend_years': self.trend_years,
+            'report': report,
+            'top_categories': report.top_expense_categories(5),
+            'meses_labels': json.dumps([month.label for month in report.months]),
+            'meses_entradas': json.dumps([float(month.income) for month in report.months]),
+            'meses_saidas': json.dumps([float(month.expense) for month in report.months]),
+            'tendencia_labels': json.dumps(trend_labels),
+            'tendencia_series': json.dumps(trend_series),
+        })
+        return context
 
-    transactions = Transaction.objects.filter(
-        user=request.user,
-        date__year=year,
-        date__month=month
-    )
 
-    days_data = {}
-    for t in transactions:
-        day = t.date.day
-        if day not in days_data:
-            days_data[day] = {'completed': 0, 'pending': 0}
+MESES = [
+    'Janeiro', 'Fevereiro', 'Março', 'Abril', 'Maio', 'Junho',
+    'Julho', 'Agosto', 'Setembro', 'Outubro', 'Novembro', 'Dezembro'
+]
 
-        if t.is_completed:
-            days_data[day]['completed'] += 1
-        else:
-            days_data[day]['pending'] += 1
+
+def _calendar_month_data(user, year, month):
+    if not 1 <= month <= 12:
+        raise Http404('Mês inválido')
+    if not 1 <= year <= 9999:
+        raise Http404('Ano inválido')
 
     if month == 1:
         prev_month, prev_year = 12, year - 1
@@ -223,20 +467,42 @@ def calendar_view(request, year=None, month=None):
     else:
         next_month, next_year = month + 1, year
 
-    meses = [
-        'Janeiro', 'Fevereiro', 'Março', 'Abril', 'Maio', 'Junho',
-        'Julho', 'Agosto', 'Setembro', 'Outubro', 'Novembro', 'Dezembro'
-    ]
-
-    context = {
+    return {
         'year': year,
         'month': month,
-        'month_name': meses[month - 1],
-        'days_data': json.dumps(days_data),
+        'month_name': MESES[month - 1],
+        'days': CalendarService(user).get_month(year, month),
         'prev_month': prev_month,
         'prev_year': prev_year,
         'next_month': next_month,
         'next_year': next_year,
     }
 
+
+def _calendar_etag(request, year, month):
+    return f'"{request.user.pk}-{get_data_version(request.user.pk)}-{year}-{month}"'
+
+
+def _calendar_last_modified(request, year, month):
+    return get_last_modified(request.user.pk)
+
+
+@login_required
+def calendar_view(request, year=None, month=None):
+    today = timezone.now()
+    year = today.year if year is None else year
+    month = today.month if month is None else month
+
+    context = _calendar_month_data(request.user, year, month)
+    context['days_data'] = json.dumps(context.pop('days'))
+
     return render(request, 'transactions/calendar.html', context)
+
+
+@login_required
+@condition(etag_func=_calendar_etag, last_modified_func=_calendar_last_modified)
+def calendar_month_json(request, year, month):
+    response = JsonResponse(_calendar_month_data(request.user, year, month))
+    # Dados por usuário: só o navegador guarda, sempre revalidando pelo ETag
+    patch_cache_control(response, private=True, no_cache=True)
+    return response